@@ -0,0 +1,166 @@
+import os
+
+import pandas as pd
+
+from catalog import CACHE_FOLDER
+from comparison import LOWER_IS_BETTER
+from incremental import FILES_SCHEMA, VERSION_COLUMNS, DayFileStore, day_files
+from ingest import load_metrics
+
+# Arquivo SQLite dos alertas (persistente, ao lado do índice de protocolos)
+ALERTS_FILE = os.path.join(CACHE_FOLDER, 'alertas.sqlite')
+
+# Metas configuradas: métrica -> ('max' | 'min', limite). Satisfação em 0-5, FCR em 0-1, tempos em minutos
+ALERT_TARGETS = {
+    'TMA': ('max', 20.0),
+    'FCR': ('min', 0.80),
+    'Satisfacao': ('min', 4.0),
+}
+
+# Linha de base por agente: média/variância exponencial (EWMA) de ~30 dias de dados
+BASELINE_SPAN = 30
+BASELINE_ALPHA = 2 / (BASELINE_SPAN + 1)
+MIN_BASELINE_DAYS = 5 # Dias de histórico antes de pontuar anomalias
+ANOMALY_Z = 3.0       # Desvios-padrão (no sentido ruim) para gerar alerta de anomalia
+MIN_RELATIVE_STD = 0.05 # Desvio mínimo (5% da média): agentes muito estáveis não alertam por qualquer variação
+
+# Dias com poucos atendimentos são ruidosos demais para alertar
+MIN_ALERT_VOLUME = 3
+
+_SCHEMA = FILES_SCHEMA + """
+CREATE TABLE IF NOT EXISTS linha_base (
+    agente TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    dias INTEGER NOT NULL,
+    media REAL NOT NULL,
+    variancia REAL NOT NULL,
+    PRIMARY KEY (agente, metrica)
+);
+CREATE TABLE IF NOT EXISTS linha_base_dia (
+    date_key INTEGER NOT NULL,
+    agente TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    dias INTEGER NOT NULL,
+    media REAL NOT NULL,
+    variancia REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_linha_base_dia ON linha_base_dia (date_key);
+CREATE TABLE IF NOT EXISTS alertas (
+    date_key INTEGER NOT NULL,
+    agente TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    valor REAL NOT NULL,
+    referencia REAL,
+    desvio REAL,
+    volume INTEGER NOT NULL,
+    caminho TEXT NOT NULL,
+    """ + VERSION_COLUMNS + """
+);
+CREATE INDEX IF NOT EXISTS idx_alertas_data ON alertas (date_key);
+"""
+
+
+def agent_day_metrics(df):
+    """Uma linha por agente com o volume e a média de cada métrica alertada no dia."""
+    metrics = [metric for metric in ALERT_TARGETS if metric in df.columns]
+    if df.empty or 'Agente' not in df.columns or 'QTD Atendimento' not in df.columns or not metrics:
+        return pd.DataFrame()
+    agg = {'QTD Atendimento': 'sum', **{metric: 'mean' for metric in metrics}}
+    return df.groupby('Agente').agg(agg)
+
+
+class AlertStore(DayFileStore):
+    """Alertas de metas e de anomalias por agente/dia, gerados de forma incremental.
+
+    Cada arquivo diário novo é pontuado uma única vez, em ordem cronológica: cada
+    (agente, métrica) do dia é comparado com a meta configurada e com a linha de base
+    do próprio agente (média e variância exponenciais, atualizadas em O(1) por dia).
+    A linha de base de cada dia fica gravada (linha_base_dia): um arquivo alterado ou
+    um dia que chega atrasado volta a linha de base para o dia anterior e repontua
+    só dali em diante.
+    """
+
+    SCHEMA = _SCHEMA
+    SCHEMA_VERSION = 2
+    VERSIONED_TABLES = ('alertas',)
+
+    def __init__(self, path=ALERTS_FILE):
+        super().__init__(path)
+
+    def update(self, catalog, usable=None):
+        """Pontua os dias novos do catálogo. `usable(tipo, entry)` pula arquivos em quarentena.
+
+        Retorna quantos arquivos diários foram (re)processados.
+        """
+        with self._lock, self._connect() as conn:
+            return self._sync(conn, day_files(catalog.iter_day_files(), usable=usable), self._score_file)
+
+    def _rewind(self, conn, start_key):
+        self._retire(conn, 'alertas', "date_key >= ?", (start_key,))
+        conn.execute("DELETE FROM linha_base_dia WHERE date_key >= ?", (start_key,))
+        conn.execute("DELETE FROM linha_base")
+        # Linha de base de cada (agente, métrica) no último dia anterior (coluna "solta" do MAX no SQLite)
+        conn.execute(
+            "INSERT INTO linha_base SELECT agente, metrica, dias, media, variancia FROM "
+            "(SELECT agente, metrica, dias, media, variancia, MAX(date_key) FROM linha_base_dia GROUP BY agente, metrica)"
+        )
+
+    def _score_file(self, conn, day_key, entry):
+        try:
+            day = agent_day_metrics(load_metrics(entry))
+        except Exception:
+            day = pd.DataFrame()
+        self._score_day(conn, day_key, entry, day)
+
+    @staticmethod
+    def _score_day(conn, day_key, entry, day):
+        baselines = {
+            (row[0], row[1]): (row[2], row[3], row[4])
+            for row in conn.execute("SELECT agente, metrica, dias, media, variancia FROM linha_base")
+        } if not day.empty else {}
+        alerts, updated = [], []
+
+        for agente, row in day.iterrows():
+            volume = row['QTD Atendimento']
+            if pd.isna(volume) or volume < MIN_ALERT_VOLUME:
+                continue
+            for metric, (direction, limit) in ALERT_TARGETS.items():
+                value = row.get(metric)
+                if value is None or pd.isna(value):
+                    continue
+
+                # 1. Meta configurada
+                if (direction == 'max' and value > limit) or (direction == 'min' and value < limit):
+                    alerts.append((day_key, agente, metric, 'meta', value, limit, None, int(volume), entry.path))
+
+                # 2. Anomalia em relação à linha de base do agente (só no sentido ruim)
+                days, mean, variance = baselines.get((agente, metric), (0, value, 0.0))
+                std = max(variance ** 0.5, MIN_RELATIVE_STD * abs(mean))
+                if days >= MIN_BASELINE_DAYS and std > 0:
+                    z = (value - mean) / std
+                    if (z if metric in LOWER_IS_BETTER else -z) >= ANOMALY_Z:
+                        alerts.append((day_key, agente, metric, 'anomalia', value, mean, z, int(volume), entry.path))
+
+                # Atualiza a linha de base com o dia (média/variância exponenciais)
+                diff = value - mean
+                mean += BASELINE_ALPHA * diff
+                variance = (1 - BASELINE_ALPHA) * (variance + BASELINE_ALPHA * diff * diff)
+                updated.append((agente, metric, days + 1, mean, variance))
+
+        conn.executemany("INSERT INTO alertas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)", alerts)
+        conn.executemany("INSERT OR REPLACE INTO linha_base VALUES (?, ?, ?, ?, ?)", updated)
+        conn.executemany("INSERT INTO linha_base_dia VALUES (?, ?, ?, ?, ?, ?)", [(day_key, *row) for row in updated])
+
+    def alerts(self, start_key=None, end_key=None, generation=None):
+        """Alertas entre dois DateKeys (inclusive), do mais recente para o mais antigo, como vistos na `generation`."""
+        visible, params = self._visible(generation)
+        query = ("SELECT date_key AS DateKey, agente AS Agente, metrica AS Métrica, tipo AS Tipo, "
+                 "valor AS Valor, referencia AS Referência, desvio AS Desvio, volume AS Volume FROM alertas "
+                 f"WHERE {visible}")
+        if start_key is not None and end_key is not None:
+            query += " AND date_key BETWEEN ? AND ?"
+            params += [int(start_key), int(end_key)]
+        query += " ORDER BY date_key DESC, agente, metrica"
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
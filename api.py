@@ -0,0 +1,204 @@
+"""API JSON local (somente leitura) com os KPIs por agente e os rankings do dashboard.
+
+Uso (na raiz do projeto):
+    python api.py --port 8502
+    curl -i "http://127.0.0.1:8502/api/agregados?mes=Novembro/2025&grao=semana"
+
+Rotas (GET):
+    /api/meses                                  meses disponíveis
+    /api/agregados?mes=&grao=mes|semana|dia&agente=   KPIs por agente no grão pedido
+    /api/rankings                               Top 3 de cada ranking (mesmas regras do modo TV)
+
+As respostas levam um ETag derivado da versão dos dados (hash dos arquivos indexados)
+e da rota. Um cliente que reenviar o ETag em If-None-Match recebe 304 sem que nada
+seja recalculado; as últimas API_CACHE_ENTRIES respostas 200 ficam em memória até os
+dados mudarem. Os dados vêm dos artefatos da ingestão offline (ingest.py) quando eles existem.
+"""
+import argparse
+import collections
+import hashlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from catalog import DATA_FOLDER, DataCatalog, MESES_ORDER, parse_month_label
+from date_dimension import build_date_dimension, date_key
+from quality import QualityStore
+from wallboard import TEAM_KPI_AGG, build_wallboard_snapshot, load_source
+
+API_HOST = '127.0.0.1' # Somente local por padrão
+API_PORT = 8502
+
+# Respostas guardadas por versão dos dados (as menos usadas saem primeiro): parâmetros
+# variados (agente=, mes=, chaves extras) não fazem o cache crescer sem limite
+API_CACHE_ENTRIES = 128
+
+# Grão -> colunas de agrupamento (além de Agente)
+API_GRAINS = {'mes': [], 'semana': ['WeekKey'], 'dia': ['DateKey', 'Data']}
+
+
+class ApiError(Exception):
+    """Erro de requisição (status HTTP + mensagem)."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df):
+    """DataFrame -> lista de dicts serializáveis em JSON (NaN -> null, datas ISO)."""
+    return json.loads(df.to_json(orient='records', date_format='iso', force_ascii=False))
+
+
+def _daily_frame(catalog, label, usable=None):
+    """Métricas diárias do mês com DateKey, Data e WeekKey (semana ISO), sem os arquivos em quarentena ou ilegíveis."""
+    year, month = parse_month_label(label)
+    df_list = []
+    for day, entry in catalog.day_files(label):
+        df_day = load_source('diario', entry, usable)
+        if df_day.empty:
+            continue
+        df_day['DateKey'] = date_key(year, MESES_ORDER.index(month) + 1, day)
+        df_list.append(df_day)
+    if not df_list:
+        return pd.DataFrame()
+    df = pd.concat(df_list, ignore_index=True)
+    date_dim = build_date_dimension([year])
+    return df.join(date_dim[['Data', 'WeekKey']], on='DateKey')
+
+
+def agent_aggregates(catalog, label, grain='mes', agente=None, usable=None):
+    """KPIs por agente (mesma agregação dos cards de KPI) no grão mês, semana ou dia.
+
+    `usable(tipo, entry)` pula os arquivos em quarentena.
+    """
+    if grain not in API_GRAINS:
+        raise ApiError(400, f"grão inválido: {grain} (use {', '.join(API_GRAINS)})")
+    if label not in catalog.months() and not catalog.has_daily_folder(label):
+        raise ApiError(404, f"mês não encontrado: {label}")
+
+    if grain == 'mes':
+        df = load_source('mensal', catalog.month_file(label), usable)
+    else:
+        df = _daily_frame(catalog, label, usable)
+    if df.empty or 'Agente' not in df.columns:
+        return pd.DataFrame()
+    if agente:
+        df = df[df['Agente'] == agente]
+
+    agg = {col: func for col, func in TEAM_KPI_AGG.items() if col in df.columns}
+    df_agg = df.groupby(['Agente'] + API_GRAINS[grain], as_index=False).agg(agg)
+    if 'Data' in df_agg.columns:
+        df_agg['Data'] = df_agg['Data'].dt.strftime('%Y-%m-%d')
+    return df_agg
+
+
+class DashboardApi:
+    """Roteamento e cache das respostas, invalidado pela versão (fingerprint) do catálogo."""
+
+    def __init__(self, root=DATA_FOLDER, max_entries=API_CACHE_ENTRIES):
+        self.catalog = DataCatalog(root)
+        self.quality = QualityStore() # Arquivos em quarentena não são relidos a cada requisição
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self._cache = collections.OrderedDict() # etag -> corpo JSON (bytes); o fim é o mais recente
+        self._cache_fingerprint = None
+
+    def etag(self, data, path, query):
+        """ETag da resposta: versão dos dados + rota + parâmetros (ordenados)."""
+        key = f"{data.fingerprint}|{path}|{sorted(query.items())}"
+        return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:32] + '"'
+
+    def respond(self, path, query, if_none_match=None):
+        """Retorna (status, etag, corpo). Com If-None-Match igual ao ETag atual, devolve 304 sem calcular nada."""
+        self.catalog.refresh()
+        data = self.catalog.snapshot # Uma única versão dos dados para toda a resposta
+        etag = self.etag(data, path, query)
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(',')]:
+            return 304, etag, b''
+
+        with self._lock:
+            if self._cache_fingerprint != data.fingerprint:
+                self._cache, self._cache_fingerprint = collections.OrderedDict(), data.fingerprint
+            body = self._cache.get(etag)
+            if body is not None:
+                self._cache.move_to_end(etag)
+        if body is None:
+            payload = {'versao': data.fingerprint, **self._route(data, path, query)}
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            with self._lock:
+                if self._cache_fingerprint == data.fingerprint: # Os dados podem ter mudado durante o cálculo
+                    self._cache[etag] = body
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+        return 200, etag, body
+
+    def _route(self, data, path, query):
+        if path == '/api/meses':
+            return {'meses': data.months()}
+        if path == '/api/agregados':
+            months = data.months()
+            label = query.get('mes') or (months[-1] if months else '')
+            grain = query.get('grao', 'mes')
+            df = agent_aggregates(data, label, grain, query.get('agente'), self.quality.usable)
+            return {'mes': label, 'grao': grain, 'dados': _records(df)}
+        if path == '/api/rankings':
+            snapshot = build_wallboard_snapshot(data, self.quality.usable)
+            rankings = {
+                title: {metric: _records(df_top) for metric, df_top in metrics.items()}
+                for title, metrics in snapshot.rankings.items()
+            }
+            return {'mes': snapshot.month, 'kpis': snapshot.kpis, 'rankings': rankings}
+        raise ApiError(404, f"rota não encontrada: {path}")
+
+
+def make_handler(api):
+    """Classe de handler HTTP ligada a uma instância de DashboardApi."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = dict(parse_qsl(url.query))
+            try:
+                status, etag, body = api.respond(url.path.rstrip('/'), query, self.headers.get('If-None-Match'))
+            except ApiError as e:
+                status, etag, body = e.status, None, json.dumps({'erro': str(e)}, ensure_ascii=False).encode('utf-8')
+            except Exception as e:
+                status, etag, body = 500, None, json.dumps({'erro': str(e)}, ensure_ascii=False).encode('utf-8')
+
+            self.send_response(status)
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache') # Cliente pode guardar, mas revalida com If-None-Match
+            if status != 304:
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--data', default=DATA_FOLDER, help="pasta de dados (padrão: 'data')")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(DashboardApi(args.data)))
+    print(f"API do dashboard em http://{args.host}:{args.port}/api/meses")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
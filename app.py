@@ -1,15 +1,37 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+# plotly.express é importado dentro das funções de gráfico (import tardio): a tela de
+# login, que é tudo o que um visitante não autenticado vê, não paga esse custo.
 import os 
-import pandas.api.types
 from auth import (
     check_password,
     get_user_info,
+    load_users,
     change_password_db,
     user_manager_interface
 )
 import datetime # Importa datetime para o calendário
+import functools
+import threading
+import weakref
+from cache_manager import CacheManager
+from catalog import DataCatalog, DATA_FOLDER, MESES_ORDER, is_valid_day, month_label, parse_month_label
+from date_dimension import build_date_dimension, build_month_dimension, date_key, month_key
+from export import EXPORT_FORMATS, export_file_name, export_frame
+from evaluations import NOTA_COLS, build_rating_rollup, summarize_ratings
+from protocol_index import ProtocolIndex
+from ingest import load_evaluations, load_metrics, load_sketches, plan_tasks, validate_metrics
+from quality import STATUS_QUARANTINE, QualityStore
+from uploads import JOB_PUBLISHED, JOB_REJECTED, JOB_FAILED, UPLOAD_KINDS, UPLOAD_POLL_SECONDS, UploadManager
+from wallboard import RANKING_RULES, RANKING_SOURCES, WALLBOARD_REFRESH_SECONDS, WallboardPublisher, is_valid_wallboard_token, top_agents
+from rolling import ROLLING_WINDOWS, RollingKpis
+from reconciliation import SOURCE_MONTHLY, ReconciliationStore
+from alerts import ALERT_TARGETS, AlertStore
+from cube import HIERARCHY_LEVELS, AggregationCube, read_hierarchy
+from goals import GoalStore, default_goals, load_goals
+from charts import CHART_BACKENDS, INITIAL_SERIES, line_figure, top_series
+from quantiles import BOX_QUANTILES, CARD_QUANTILES, merge_sketches, sketch_quantiles
+from comparison import COMPARISON_AGG, LOWER_IS_BETTER, calendar_periods, compare_periods, period_month_keys, range_period
 
 # --- Configuração Inicial ---
 st.set_page_config(
@@ -18,10 +40,41 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Mapeamento de meses (para facilitar a identificação dos arquivos e ordenação)
-MESES_ORDER = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", 
-               "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
-MESES = {month: f"{month}.csv" for month in MESES_ORDER}
+# Meses (MESES_ORDER) e rótulos 'Novembro/2025' vêm do catálogo de dados (catalog.py)
+
+# Granularidades do histórico -> título usado nos gráficos/tabela
+HISTORY_GRAINS = {"Mês": "Mês a Mês", "Trimestre": "por Trimestre", "Ano": "por Ano"}
+
+# Agregação por agente usada na exportação "Agregado" (mesma regra das tabelas consolidadas)
+EXPORT_AGG = {
+    'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean', 'TMIC': 'mean',
+    'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum'
+}
+
+# Visões do painel Admin ("Todos os Agentes"); apenas a visão ativa é calculada
+ADMIN_VIEWS = ["Visão Geral (Período Selecionado)", "Histórico Geral (Todos os Meses)", "Detalhe Diário (Período Selecionado)", "Comparação de Períodos", "Equipes (Drill-down)"]
+
+# O mapeamento de equipes pode vir de users.json (campos equipe/supervisor/site);
+# por isso o cubo também expira sozinho, além de ser limpo quando os dados mudam
+CUBE_TTL_SECONDS = 600
+
+# TTL (segundos) dos resultados dos loaders; o limite de memória é o orçamento do
+# CacheManager (variável DASHBOARD_CACHE_MB), compartilhado por todos os loaders
+MONTH_TTL_SECONDS = 3600 # Meses e rankings (a troca de versão dos dados já os invalida)
+QUERY_TTL_SECONDS = 600  # Consultas por período/agrupamento (chaves que raramente se repetem)
+
+# Séries dos gráficos diários: rótulo -> janela da média móvel (None = pontos diários)
+DAILY_SERIES = {"Diária": None, **{f"Média móvel {window} dias": window for window in ROLLING_WINDOWS}}
+
+# Métricas do mapa de calor agente × dia -> (rótulo, faixa fixa da escala de cor ou None)
+HEATMAP_METRICS = {
+    'Satisfacao': ('Satisfação (0-5)', (0, 5)), 'FCR': ('FCR (0-1)', (0, 1)), 'TMA': ('TMA (min)', None),
+    'TME': ('TME (min)', None), 'TMIA': ('TMIA (min)', None), 'NPS': ('NPS', (-100, 100)),
+    'QTD Atendimento': ('QTD Atendimento', None),
+}
+
+# Tipos de período da comparação (Semana e Mês vêm da dimensão de datas)
+COMPARISON_GRAINS = ["Semana", "Mês", "Intervalo personalizado"]
 
 
 # Inicialização de variáveis de estado
@@ -71,352 +124,468 @@ def apply_formatting(df):
     return df_copy
 
 
-# --- Funções de Carregamento e Tratamento de Dados ---
-# Função principal: Carrega UM mês (usada para o painel principal)
-@st.cache_data(show_spinner="Carregando dados do mês selecionado...")
-def load_and_preprocess_data(file_name):
-    """Carrega o CSV específico do mês na pasta 'data/'."""
-    
-    DATA_FOLDER = 'data' 
-    file_path = os.path.join(DATA_FOLDER, file_name)
-    
-    if not os.path.exists(file_path):
-        st.warning(f"Arquivo de dados '{file_name}' não encontrado na pasta '{DATA_FOLDER}/'.")
-        return pd.DataFrame()
-        
+# --- Catálogo da Árvore de Dados ---
+@st.cache_resource
+def _data_catalog():
+    """Instância única (por processo) do catálogo de 'data/'."""
+    return DataCatalog(DATA_FOLDER)
+
+@st.cache_resource
+def _published_data():
+    """Última versão publicada (processo): snapshot com os artefatos derivados já atualizados e,
+    por versão ainda em uso, a geração de cada artefato (caminho do SQLite -> geração).
+    """
+    return {'lock': threading.Lock(), 'snapshot': None, 'generations': {}}
+
+def derived_stores():
+    """Artefatos derivados lidos pelas telas com a geração da versão fixada na sessão."""
+    return (get_rolling_kpis(), get_alert_store(), get_goal_store(), get_reconciliation_store())
+
+def refresh_catalog(force=False):
+    """Reindexa o catálogo se as pastas mudaram (verificação limitada por intervalo) e retorna
+    a versão publicada mais recente (DataSnapshot).
+
+    `force` reindexa na hora (ex.: logo após publicar um arquivo enviado pelo app).
+    """
+    catalog = _data_catalog()
+    published = _published_data()
+    if catalog.refresh(force) or published['snapshot'] is None:
+        with published['lock']:
+            snapshot = catalog.snapshot
+            if published['snapshot'] is None:
+                # Início do processo: os artefatos já vêm prontos da ingestão (ingest.py); o
+                # worker só publica a versão atual e deixa a atualização para a próxima mudança
+                publish_snapshot(snapshot, update=False)
+            elif published['snapshot'].version < snapshot.version:
+                publish_snapshot(snapshot)
+    return published['snapshot']
+
+def publish_snapshot(snapshot, update=True):
+    """Atualiza os artefatos derivados com a versão nova e só então a publica para as sessões.
+
+    `update=False` publica sem validar arquivos nem atualizar os artefatos (usado na
+    primeira publicação do processo). Os resultados dos loaders não são limpos: a versão
+    faz parte da chave e as entradas de uma versão saem do cache quando o snapshot dela
+    é descartado (nenhuma sessão o usa).
+    """
+    published = _published_data()
+    if update:
+        get_quality_store().sync(plan_tasks(snapshot)) # Valida só os arquivos novos/alterados
+        # ...e atualiza (de forma incremental, sem os arquivos em quarentena) o índice de protocolos,
+        # as médias móveis, os alertas, as metas e a conciliação
+        get_protocol_index().update(snapshot, is_usable)
+        get_rolling_kpis().update(snapshot, is_usable)
+        get_alert_store().update(snapshot, is_usable)
+        get_goal_store().update(snapshot, load_goal_targets(snapshot), load_hierarchy(snapshot), is_usable)
+        get_reconciliation_store().update(snapshot, is_usable)
+
+    stores = derived_stores()
+    published['generations'][snapshot.version] = {store.path: store.generation() for store in stores}
+    weakref.finalize(snapshot, loader_cache.release_version, snapshot.version)
+    published['snapshot'] = snapshot
+
+    # Versões que nenhuma sessão fixa mais: as linhas que só elas enxergavam podem sair
+    live = set(_data_catalog().live_versions())
+    for version in [version for version in published['generations'] if version not in live]:
+        del published['generations'][version]
+    for store in stores:
+        store.purge(min(generations[store.path] for generations in published['generations'].values()))
+
+def pin_data_version():
+    """Fixa na sessão a versão mais recente dos dados (chamada no início de cada rerun).
+
+    O rerun inteiro (e os fragmentos até o próximo rerun) lê só esse snapshot e, nos
+    artefatos derivados (alertas, metas, médias móveis, conciliação), a geração publicada
+    com ele: uma publicação no meio do caminho não mistura totais antigos com dias novos.
+    O snapshot anterior é descartado quando nenhuma sessão o referencia mais.
+    """
+    st.session_state['data_snapshot'] = refresh_catalog()
+    return st.session_state['data_snapshot']
+
+def get_catalog():
+    """Versão dos dados (DataSnapshot) fixada para esta sessão."""
+    snapshot = st.session_state.get('data_snapshot')
+    return snapshot if snapshot is not None else pin_data_version()
+
+def data_version():
+    """Número da versão fixada na sessão; os loaders o recebem para que ele entre na chave do cache."""
+    return get_catalog().version
+
+def store_generation(store, version=None):
+    """Geração de um artefato derivado publicada com a versão dos dados (padrão: a fixada na sessão)."""
+    generations = _published_data()['generations'].get(data_version() if version is None else version, {})
+    return generations.get(store.path)
+
+@st.cache_resource
+def get_protocol_index():
+    """Índice persistente de protocolos (SQLite), sincronizado a cada versão publicada."""
+    return ProtocolIndex()
+
+
+@st.cache_resource
+def get_wallboard_publisher():
+    """Publicador (único por processo) dos snapshots do modo TV, atualizado em segundo plano."""
+    return WallboardPublisher(DATA_FOLDER)
+
+
+@st.cache_resource
+def get_rolling_kpis():
+    """Médias móveis por agente (estado persistente), atualizadas só com os dias novos a cada versão publicada."""
+    return RollingKpis()
+
+
+@st.cache_resource
+def get_alert_store():
+    """Tabela de alertas (SQLite), pontuada de forma incremental com os dias novos a cada versão publicada."""
+    return AlertStore()
+
+
+@st.cache_resource
+def get_quality_store():
+    """Resultado da validação dos arquivos (SQLite): cada arquivo é validado uma vez (sob demanda) e os reprovados ficam em quarentena."""
+    return QualityStore()
+
+
+@st.cache_resource
+def get_upload_manager():
+    """Fila (única por processo) dos arquivos enviados pelo app: valida e publica numa thread de trabalho."""
+    return UploadManager(get_quality_store())
+
+
+@st.cache_resource
+def get_reconciliation_store():
+    """Conciliação consolidado mensal x soma dos diários (SQLite), refeita só nos meses alterados a cada versão publicada."""
+    return ReconciliationStore()
+
+
+def is_usable(kind, entry):
+    """True se o arquivo passou na validação ('mensal', 'diario', 'ranking' ou 'notas'); arquivos em quarentena são pulados."""
+    return get_quality_store().usable(kind, entry)
+
+
+@st.cache_resource
+def get_goal_store():
+    """Atingimento de metas (SQLite), avaliado de forma incremental com os dias novos a cada versão publicada."""
+    return GoalStore()
+
+
+def load_goal_targets(catalog):
+    """Metas configuradas ('data/metas.csv'); se o arquivo estiver ilegível, usa as metas padrão."""
     try:
-        df = pd.read_csv(file_path, encoding='utf-8', engine='python')
+        return load_goals(catalog)
     except Exception as e:
-        st.error(f"Erro ao ler o arquivo {file_name}: {e}")
-        return pd.DataFrame()
+        st.warning(f"Erro ao ler o arquivo de metas: {e}. Usando as metas padrão.")
+        return default_goals()
 
-    # LIMPEZA E RENOMEAÇÃO DE COLUNAS
-    cols = df.columns.str.strip().str.upper()
-    df.columns = cols.str.replace('[^A-Z0-9_]+', '', regex=True) 
 
-    rename_mapping = {
-        'NOM_AGENTE': 'Agente',
-        'QTDATENDIMENTO': 'QTD Atendimento', # Corrigido (sem S)
-        'SATISFACAO': 'Satisfacao',
-        'QTDSATISFACAO': 'QTD Avaliacoes',
-    }
-    df = df.rename(columns=rename_mapping)
+# --- Cache dos loaders ---
+@st.cache_resource
+def get_cache_manager():
+    """Cache único (por processo) dos loaders: orçamento de bytes, LRU por tamanho, TTL e estatísticas.
 
-    EXPECTED_COLS = {
-        'QTD Atendimento', 'TMA', 'TME', 'TMIA', 'TMIC', 
-        'FCR', 'Satisfacao', 'NPS', 'QTD Avaliacoes', 'Agente'
-    }
-    
-    missing_cols = EXPECTED_COLS - set(df.columns)
-    if missing_cols:
-         st.warning(f"As seguintes colunas esperadas não foram encontradas após a limpeza: {missing_cols}")
+    Os avisos dos loaders ficam com o resultado e aparecem (st.warning/st.error) em toda sessão que o usa.
+    """
+    return CacheManager(emit=lambda level, message: getattr(st, level)(message))
 
-    # Conversão de colunas de tempo
-    def time_to_minutes(time_str):
-        if pd.isna(time_str) or time_str == '': return 0.0
-        try:
-            parts = str(time_str).split(':')
-            if len(parts) == 3: # Formato HH:MM:SS
-                hours, minutes, seconds = map(float, parts)
-                return (hours * 60) + minutes + seconds / 60
-            elif len(parts) == 2: # Formato MM:SS
-                minutes, seconds = map(float, parts)
-                return minutes + seconds / 60
-            else:
-                return 0.0
-        except:
-            return 0.0
+loader_cache = get_cache_manager()
 
-    time_cols = ['TMA', 'TME', 'TMIA', 'TMIC']
-    for col in time_cols:
-        if col in df.columns:
-             if not df[col].isnull().all():
-                  df[col] = df[col].apply(time_to_minutes)
 
+# --- Dimensão de Datas ---
+@loader_cache.memoize(copy=True)
+def load_date_dimension(years):
+    """Dimensão de datas (um registro por dia) para os anos presentes nos dados, indexada por DateKey."""
+    return build_date_dimension(years)
 
-    # Conversão de FCR, Satisfacao e NPS (Garantindo que são numéricos)
-    for col in ['FCR', 'Satisfacao', 'NPS']:
-        if col in df.columns:
-            current_col_name = col
-            df[current_col_name] = df[current_col_name].astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
-            df[current_col_name] = pd.to_numeric(df[current_col_name], errors='coerce')
+
+# --- Funções de Carregamento e Tratamento de Dados ---
+# Função principal: Carrega UM mês (usada para o painel principal)
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, copy=True, on_miss=lambda: st.spinner("Carregando dados do mês selecionado..."))
+def load_and_preprocess_data(selected_month_name, data_version):
+    """Carrega o CSV específico do mês ('Novembro/2025') na pasta 'data/'."""
     
-    # Normaliza FCR (0-1) e Satisfação (0-5)
-    if 'FCR' in df.columns and pd.api.types.is_numeric_dtype(df['FCR']):
-        df['FCR'] = df['FCR'] / 100
+    entry = get_catalog().month_file(selected_month_name)
     
-    if 'Satisfacao' in df.columns and pd.api.types.is_numeric_dtype(df['Satisfacao']):
-        df['Satisfacao'] = df['Satisfacao'] / 100 * 5 
+    if entry is None:
+        loader_cache.notify('warning', f"Arquivo de dados do mês '{selected_month_name}' não encontrado na pasta '{DATA_FOLDER}/'.")
+        return pd.DataFrame()
+    if not is_usable('mensal', entry):
+        loader_cache.notify('warning', f"Arquivo {entry.path} em quarentena (reprovado na validação). Veja o relatório de Qualidade dos Dados.")
+        return pd.DataFrame()
+        
+    # Normalização (nomes de colunas, tempos, percentuais) em ingest.py; usa o artefato
+    # pré-calculado pela ingestão offline quando ele existe
+    try:
+        df = load_metrics(entry)
+    except Exception as e:
+        loader_cache.notify('error', f"Erro ao ler o arquivo {entry.path}: {e}")
+        return pd.DataFrame()
+
+    missing_cols = validate_metrics(df)
+    if missing_cols:
+         loader_cache.notify('warning', f"Arquivo {entry.path}: {'; '.join(missing_cols)}")
     
     return df
 
 # --- Função 2: Carrega TODOS os dados (para Histórico e Admin) ---
-@st.cache_data(show_spinner="Carregando histórico completo...")
-def load_all_history_data():
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, copy=True, on_miss=lambda: st.spinner("Carregando histórico completo..."))
+def load_all_history_data(data_version):
     """Carrega TODOS os CSVs de TODOS os meses disponíveis na pasta 'data/' para o histórico."""
-    DATA_FOLDER = 'data' 
+    catalog = get_catalog()
     df_list = []
-    
-    if not os.path.exists(DATA_FOLDER):
-        return pd.DataFrame()
         
-    # 1. Leitura e Combinação dos Arquivos
-    for filename in os.listdir(DATA_FOLDER):
-        if filename.endswith(".csv"):
-            path = os.path.join(DATA_FOLDER, filename)
-            try:
-                df_temp = pd.read_csv(path, encoding='utf-8', engine='python')
-                
-                # Adiciona coluna de mês e ordenação
-                month_name = filename.replace('.csv', '').capitalize()
-                month_name_lower = month_name.lower()
-                if month_name_lower not in MESES: continue 
-                
-                # TRATAMENTO DE COLUNAS (ANTES de adicionar Mês/MonthSort)
-                df_temp.columns = df_temp.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True) 
-                rename_mapping_temp = {
-                    'NOM_AGENTE': 'Agente', 'QTDATENDIMENTO': 'QTD Atendimento', # Corrigido (sem S)
-                    'SATISFACAO': 'Satisfacao', 'QTDSATISFACAO': 'QTD Avaliacoes',
-                }
-                df_temp = df_temp.rename(columns=rename_mapping_temp)
-                
-                # Adiciona Mês e MonthSort DEPOIS da limpeza
-                df_temp['Mês'] = month_name
-                df_temp['MonthSort'] = MESES_ORDER.index(month_name_lower)
+    # 1. Leitura e Combinação dos Arquivos (apenas meses válidos, indexados pelo catálogo)
+    for year, month_name_lower in catalog.month_keys():
+        month_name = month_label(year, month_name_lower)
+        entry = catalog.month_file(month_name)
+        if not is_usable('mensal', entry):
+            continue # Em quarentena: listado no relatório de qualidade do Admin
+        try:
+            df_temp = load_metrics(entry) # Já normalizado (ingest.py)
+            
+            # Adiciona Mês e MonthSort (chave inteira AAAAMM, ordena entre anos) DEPOIS da limpeza
+            df_temp['Mês'] = month_name
+            df_temp['MonthSort'] = month_key(year, MESES_ORDER.index(month_name_lower) + 1)
 
-                if df_temp.empty or 'Agente' not in df_temp.columns: continue
-                
-                df_list.append(df_temp)
-            except Exception as e:
-                continue
+            if df_temp.empty or 'Agente' not in df_temp.columns: continue
+            
+            df_list.append(df_temp)
+        except Exception as e:
+            loader_cache.notify('warning', f"Erro ao ler o arquivo {entry.path} (fora do histórico): {e}")
 
     if not df_list: return pd.DataFrame()
     df = pd.concat(df_list, ignore_index=True)
 
-    # --- Tratamento Final (Geral para Histórico) ---
-    time_cols = ['TMA', 'TME', 'TMIA', 'TMIC']
-    def time_to_minutes(time_str):
-        if pd.isna(time_str) or time_str == '': return 0.0
-        try: parts = str(time_str).split(':')
-        except: return 0.0
-        try:
-            if len(parts) == 3: h, m, s = map(float, parts); return (h * 60) + m + s / 60
-            elif len(parts) == 2: m, s = map(float, parts); return m + s / 60
-            else: return 0.0
-        except: return 0.0
-    for col in time_cols:
-        if col in df.columns and not df[col].isnull().all(): 
-             df[col] = df[col].apply(time_to_minutes)
-    for col in ['FCR', 'Satisfacao', 'NPS']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    if 'FCR' in df.columns and pd.api.types.is_numeric_dtype(df['FCR']): df['FCR'] = df['FCR'] / 100
-    if 'Satisfacao' in df.columns and pd.api.types.is_numeric_dtype(df['Satisfacao']): df['Satisfacao'] = df['Satisfacao'] / 100 * 5 
-    
+    # Junta os atributos de calendário (Ano, Trimestre) pela chave inteira do mês
+    month_dim = build_month_dimension(load_date_dimension(tuple(catalog.years())))
+    df = df.join(month_dim[['Ano', 'Trimestre', 'QuarterKey']], on='MonthSort')
+
     return df
 
-# --- Função 3: Carrega os dados DIÁRIOS de uma subpasta ---
-@st.cache_data(show_spinner="Carregando detalhes diários...")
+# --- Índice por agente: o mês é lido uma vez e cada agente vira uma fatia ---
+# Os meses ficam no cache como um objeto compartilhado (sem cópia a cada acesso), com no
+# máximo MONTH_CACHE_ENTRIES meses por loader (os menos usados são descartados).
+MONTH_CACHE_ENTRIES = 6
+
+def index_by_agent(df):
+    """Ordena por Agente/DaySort e retorna (df, {agente: (início, fim)}) com as posições de cada agente."""
+    if df.empty or 'Agente' not in df.columns:
+        return df, {}
+    sort_cols = ['Agente', 'DaySort'] if 'DaySort' in df.columns else ['Agente']
+    df = df.sort_values(by=sort_cols, kind='stable').reset_index(drop=True)
+    offsets = {agent: (int(positions[0]), int(positions[-1]) + 1) for agent, positions in df.groupby('Agente', sort=False).indices.items()}
+    return df, offsets
+
+def slice_agent(month_index, agente_name):
+    """Fatia O(linhas do agente) do mês indexado; sem agente, retorna o mês inteiro."""
+    df, offsets = month_index[:2]
+    if not agente_name:
+        return df.copy()
+    if agente_name not in offsets:
+        return pd.DataFrame()
+    start, stop = offsets[agente_name]
+    return df.iloc[start:stop].copy()
+
 def load_daily_data(selected_month_name, agente_name=None):
-    """Carrega todos os CSVs da subpasta 'data/[mês]' e filtra pelo agente (se fornecido)."""
+    """Dados diários do mês, filtrados pelo agente (se fornecido), a partir do mês em cache."""
+    return slice_agent(load_daily_month(selected_month_name, data_version()), agente_name)
+
+# --- Função 3: Carrega os dados DIÁRIOS de uma subpasta ---
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, max_entries=MONTH_CACHE_ENTRIES, on_miss=lambda: st.spinner("Carregando detalhes diários..."))
+def load_daily_month(selected_month_name, data_version):
+    """Carrega todos os CSVs da subpasta 'data/[mês]' uma única vez e indexa por agente."""
     
-    month_folder_lower = selected_month_name.lower()
-    DATA_FOLDER = os.path.join('data', month_folder_lower) # Caminho: data/outubro
+    catalog = get_catalog()
+    year, month_folder_lower = parse_month_label(selected_month_name)
+    month_num = MESES_ORDER.index(month_folder_lower) + 1
     
     df_list = []
     
-    if not os.path.exists(DATA_FOLDER) or not os.path.isdir(DATA_FOLDER):
-        return pd.DataFrame()
-        
-    for filename in os.listdir(DATA_FOLDER):
-        if filename.endswith(".csv"):
-            path = os.path.join(DATA_FOLDER, filename)
-            try:
-                df_temp = pd.read_csv(path, encoding='utf-8', engine='python')
-                
-                # Limpa colunas ANTES de adicionar Dia/DaySort
-                df_temp.columns = df_temp.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True) 
-                rename_mapping_temp = {
-                    'NOM_AGENTE': 'Agente', 'QTDATENDIMENTO': 'QTD Atendimento', # Corrigido (sem S)
-                    'SATISFACAO': 'Satisfacao', 'QTDSATISFACAO': 'QTD Avaliacoes',
-                }
-                df_temp = df_temp.rename(columns=rename_mapping_temp)
-
-                # Adiciona coluna de Dia (01.10.csv -> 01/10)
-                day_month_str = filename.replace('.csv', '').replace('.', '/')
-                df_temp['Dia'] = day_month_str 
-                # Adiciona ordenação (01.10.csv -> 1)
-                df_temp['DaySort'] = int(filename.split('.')[0])
-                
-                # Adiciona a coluna de Data real (para o filtro de calendário)
-                month_num_index = MESES_ORDER.index(month_folder_lower)
-                month_num = month_num_index + 1
-                year = datetime.date.today().year # Usa o ano atual
-                
-                # Cria um DataFrame de datas para garantir que a conversão funcione
-                date_components = pd.DataFrame({
-                    'year': [year] * len(df_temp),
-                    'month': [month_num] * len(df_temp),
-                    'day': df_temp['DaySort']
-                })
-                df_temp['Data'] = pd.to_datetime(date_components, errors='coerce')
-                
-                # Filtra pelo agente (se fornecido)
-                if agente_name and 'Agente' in df_temp.columns:
-                    df_temp = df_temp[df_temp['Agente'] == agente_name]
-                
-                if df_temp.empty: 
-                    continue
-                
-                df_list.append(df_temp)
-            except Exception as e:
-                st.warning(f"Erro ao processar o arquivo diário {filename}: {e}")
+    # Arquivos diários (data/[ano/]outubro/DD.MM.csv) indexados pelo catálogo
+    for day, entry in catalog.day_files(selected_month_name):
+        filename = os.path.basename(entry.path)
+        if not is_usable('diario', entry):
+            continue # Em quarentena: listado no relatório de qualidade do Admin
+        try:
+            df_temp = load_metrics(entry) # Já normalizado (ingest.py)
+
+            # Adiciona coluna de Dia (01.10.csv -> 01/10)
+            day_month_str = filename.replace('.csv', '').replace('.', '/')
+            df_temp['Dia'] = day_month_str 
+            # Adiciona ordenação (01.10.csv -> 1)
+            df_temp['DaySort'] = day
+            
+            # Chave inteira do dia (AAAAMMDD) para juntar com a dimensão de datas
+            df_temp['DateKey'] = date_key(year, month_num, day)
+            
+            if df_temp.empty: 
                 continue
+            
+            df_list.append(df_temp)
+        except Exception as e:
+            loader_cache.notify('warning', f"Erro ao processar o arquivo diário {filename}: {e}")
+            continue
 
-    if not df_list: return pd.DataFrame()
+    if not df_list: return index_by_agent(pd.DataFrame())
     df = pd.concat(df_list, ignore_index=True)
 
-    # Tratamento de tipos (copiado de load_all_history_data)
-    time_cols = ['TMA', 'TME', 'TMIA', 'TMIC']
-    def time_to_minutes(time_str):
-        if pd.isna(time_str) or time_str == '': return 0.0
-        try: parts = str(time_str).split(':')
-        except: return 0.0
-        try:
-            if len(parts) == 3: h, m, s = map(float, parts); return (h * 60) + m + s / 60
-            elif len(parts) == 2: m, s = map(float, parts); return m + s / 60
-            else: return 0.0
-        except: return 0.0
-    for col in time_cols:
-        if col in df.columns and not df[col].isnull().all(): 
-             df[col] = df[col].apply(time_to_minutes)
-    for col in ['FCR', 'Satisfacao', 'NPS']:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    if 'FCR' in df.columns and pd.api.types.is_numeric_dtype(df['FCR']): df['FCR'] = df['FCR'] / 100
-    if 'Satisfacao' in df.columns and pd.api.types.is_numeric_dtype(df['Satisfacao']): df['Satisfacao'] = df['Satisfacao'] / 100 * 5 
-    
-    return df
+    # Adiciona a Data real (para o filtro de calendário) e os atributos de calendário
+    # (Semana ISO, dia da semana, dia útil) a partir da dimensão de datas
+    date_dim = load_date_dimension(tuple(catalog.years()))
+    dim_cols = ['Data', 'Ano', 'Trimestre', 'SemanaISO', 'WeekKey', 'DiaSemana', 'DiaUtil']
+    df = df.join(date_dim[dim_cols], on='DateKey')
+
+    return index_by_agent(df)
 
 # --- Função 4: Carrega dados do Ranking Semanal ---
-@st.cache_data(show_spinner="Carregando dados do ranking semanal...")
-def load_ranking_data(filename): # Recebe o nome do arquivo
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, copy=True, on_miss=lambda: st.spinner("Carregando dados do ranking semanal..."))
+def load_ranking_data(filename, data_version): # Recebe o nome do arquivo
     """Carrega um arquivo CSV de ranking da pasta 'data/semana/'."""
     
-    RANKING_FILE_PATH = os.path.join('data', 'semana', filename)
+    entry = get_catalog().ranking_file(filename)
     
-    if not os.path.exists(RANKING_FILE_PATH):
+    if entry is None:
         # Retorna um DF vazio, o erro será tratado na função de exibição
         return pd.DataFrame()
+    if not is_usable('ranking', entry):
+        loader_cache.notify('warning', f"Arquivo de ranking {entry.path} em quarentena (reprovado na validação).")
+        return pd.DataFrame()
+    RANKING_FILE_PATH = entry.path
         
     try:
-        df = pd.read_csv(RANKING_FILE_PATH, encoding='utf-8', engine='python')
+        df = load_metrics(entry) # Já normalizado (ingest.py)
     except Exception as e:
-        st.error(f"Erro ao ler o arquivo de ranking {RANKING_FILE_PATH}: {e}")
+        loader_cache.notify('error', f"Erro ao ler o arquivo de ranking {RANKING_FILE_PATH}: {e}")
         return pd.DataFrame()
 
-    # LIMPEZA E RENOMEAÇÃO DE COLUNAS
-    cols = df.columns.str.strip().str.upper()
-    df.columns = cols.str.replace('[^A-Z0-9_]+', '', regex=True) 
-
-    rename_mapping = {
-        'NOM_AGENTE': 'Agente',
-        'QTDATENDIMENTO': 'QTD Atendimento', # Corrigido (sem S)
-        'SATISFACAO': 'Satisfacao',
-        'QTDSATISFACAO': 'QTD Avaliacoes',
-    }
-    df = df.rename(columns=rename_mapping)
-
     if 'Agente' not in df.columns:
-        st.error(f"Arquivo de ranking {filename} não contém a coluna 'Agente'.")
+        loader_cache.notify('error', f"Arquivo de ranking {filename} não contém a coluna 'Agente'.")
         return pd.DataFrame()
 
-    # Conversão de colunas de tempo
-    def time_to_minutes(time_str):
-        if pd.isna(time_str) or time_str == '': return 0.0
-        try:
-            parts = str(time_str).split(':')
-            if len(parts) == 3: hours, minutes, seconds = map(float, parts); return (hours * 60) + minutes + seconds / 60
-            elif len(parts) == 2: minutes, seconds = map(float, parts); return minutes + seconds / 60
-            else: return 0.0
-        except: return 0.0
-
-    time_cols = ['TMA', 'TME', 'TMIA', 'TMIC']
-    for col in time_cols:
-        if col in df.columns and not df[col].isnull().all():
-             df[col] = df[col].apply(time_to_minutes)
-
-    # Conversão de FCR, Satisfacao e NPS (Garantindo que são numéricos)
-    for col in ['FCR', 'Satisfacao', 'NPS']:
-        if col in df.columns:
-            current_col_name = col
-            df[current_col_name] = df[current_col_name].astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
-            df[current_col_name] = pd.to_numeric(df[current_col_name], errors='coerce')
-    
-    # Normaliza FCR (0-1) e Satisfação (0-5)
-    if 'FCR' in df.columns and pd.api.types.is_numeric_dtype(df['FCR']):
-        df['FCR'] = df['FCR'] / 100
-    
-    if 'Satisfacao' in df.columns and pd.api.types.is_numeric_dtype(df['Satisfacao']):
-        df['Satisfacao'] = df['Satisfacao'] / 100 * 5 
-    
     return df
 
-# --- Função 5: Carrega os dados de AVALIAÇÃO Diária ---
-@st.cache_data(show_spinner="Carregando avaliações diárias...")
 def load_evaluation_data(selected_month_name, agente_name):
-    """Carrega todos os CSVs da subpasta 'data/[mês]/notas/' e filtra pelo agente."""
-    
-    month_folder_lower = selected_month_name.lower()
-    EVAL_FOLDER = os.path.join('data', month_folder_lower, 'notas') # Caminho: data/outubro/notas
+    """Avaliações do mês filtradas pelo agente, a partir do mês em cache."""
+    return slice_agent(load_evaluation_month(selected_month_name, data_version()), agente_name)
+
+def load_rating_rollup(selected_month_name, agente_name=None):
+    """Rollup aditivo de notas (histograma por agente/dia) do mês, sem reler as notas brutas."""
+    rollup = load_evaluation_month(selected_month_name, data_version())[2]
+    if agente_name and not rollup.empty:
+        rollup = rollup[rollup['Agente'] == agente_name]
+    return rollup
+
+# --- Função 5: Carrega os dados de AVALIAÇÃO Diária ---
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, max_entries=MONTH_CACHE_ENTRIES, on_miss=lambda: st.spinner("Carregando avaliações diárias..."))
+def load_evaluation_month(selected_month_name, data_version):
+    """Carrega todos os CSVs da subpasta 'data/[mês]/notas/' uma única vez e indexa por agente.
+
+    Retorna (df, posições por agente, rollup de notas por agente/dia).
+    """
     
     df_list = []
+    rollup_list = []
     
-    if not os.path.exists(EVAL_FOLDER) or not os.path.isdir(EVAL_FOLDER):
-        return pd.DataFrame()
-        
-    for filename in os.listdir(EVAL_FOLDER):
-        if filename.endswith(".csv"):
-            path = os.path.join(EVAL_FOLDER, filename)
-            try:
-                df_temp = pd.read_csv(path, encoding='utf-8', engine='python')
-                
-                # Limpa colunas ANTES
-                df_temp.columns = df_temp.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True) 
-
-                # Renomeia (Baseado no seu input: nom_agente, num_protocolo, nom_valor)
-                rename_mapping_temp = {
-                    'NOM_AGENTE': 'Agente', 
-                    'NUM_PROTOCOLO': 'Protocolo',
-                    'NOM_VALOR': 'Nota', # 'nom_valor' vira 'NOMVALOR' -> 'Nota'
-                    'DIA': 'Dia (CSV)' # Coluna 'Dia' original do CSV
-                }
-                df_temp = df_temp.rename(columns=rename_mapping_temp)
-
-                # Adiciona Dia e DaySort (do nome do arquivo)
-                day_month_str = filename.replace('.csv', '').replace('.', '/')
-                df_temp['Dia'] = day_month_str 
-                df_temp['DaySort'] = int(filename.split('.')[0])
-
-                # Filtra pelo agente
-                if 'Agente' in df_temp.columns:
-                    df_temp = df_temp[df_temp['Agente'] == agente_name]
-                else:
-                    continue # Pula se não tiver coluna Agente
-
-                if df_temp.empty: 
-                    continue
-                    
-                df_list.append(df_temp)
-            except Exception as e:
-                st.warning(f"Erro ao ler arquivo de avaliação {filename}: {e}")
+    # Arquivos de avaliação (data/[ano/]outubro/notas/DD.MM.csv) indexados pelo catálogo
+    for day, entry in get_catalog().notas_files(selected_month_name):
+        filename = os.path.basename(entry.path)
+        if not is_usable('notas', entry):
+            continue # Em quarentena (ex.: sem a coluna Agente): listado no relatório do Admin
+        try:
+            # Notas com Dia/DaySort e rollup do arquivo (pré-calculados pela ingestão, se houver)
+            df_temp, rollup_temp = load_evaluations(entry, day)
+
+            if 'Agente' not in df_temp.columns:
+                continue # Pula se não tiver coluna Agente
+
+            if df_temp.empty: 
                 continue
+                
+            df_list.append(df_temp)
+            rollup_list.append(rollup_temp)
+        except Exception as e:
+            loader_cache.notify('warning', f"Erro ao ler arquivo de avaliação {filename}: {e}")
+            continue
 
-    if not df_list: return pd.DataFrame()
+    if not df_list: return index_by_agent(pd.DataFrame()) + (build_rating_rollup(pd.DataFrame()),)
     df = pd.concat(df_list, ignore_index=True)
-    return df
+    rollup = pd.concat(rollup_list, ignore_index=True)
+    return index_by_agent(df) + (rollup,)
+
+# --- Função 6: Comparação entre dois períodos (em cache por par de períodos) ---
+@loader_cache.memoize(ttl=QUERY_TTL_SECONDS, copy=True, on_miss=lambda: st.spinner("Comparando períodos..."))
+def load_period_comparison(period_base, period_current, metric, data_version):
+    """Compara dois períodos (Period) por agente, carregando apenas os meses diários envolvidos."""
+    df_list = []
+    for year, month_num in period_month_keys(period_base, period_current):
+        label = month_label(year, MESES_ORDER[month_num - 1])
+        if get_catalog().has_daily_folder(label):
+            df_list.append(load_daily_month(label, data_version)[0])
+    df_daily = pd.concat(df_list, ignore_index=True) if df_list else pd.DataFrame()
+    return compare_periods(df_daily, period_base, period_current, metric)
+
+# --- Função 7: Hierarquia (site > equipe > agente) e cubo de agregação do mês ---
+def load_hierarchy(catalog=None):
+    """Mapeamento agente -> equipe/supervisor/site: 'data/hierarquia.csv' ou, na falta dele, users.json."""
+    entry = (catalog or get_catalog()).hierarchy_file()
+    if entry is not None:
+        try:
+            return read_hierarchy(entry.path)
+        except Exception as e:
+            loader_cache.notify('warning', f"Erro ao ler o arquivo de hierarquia {entry.path}: {e}")
+    rows = [
+        {'Agente': info.get('agente'), 'Equipe': info.get('equipe'), 'Supervisor': info.get('supervisor'), 'Site': info.get('site')}
+        for info in load_users().values() if info.get('agente') and info.get('equipe')
+    ]
+    return pd.DataFrame(rows, columns=['Agente', 'Equipe', 'Supervisor', 'Site']).drop_duplicates('Agente')
+
+@loader_cache.memoize(ttl=CUBE_TTL_SECONDS, max_entries=MONTH_CACHE_ENTRIES, on_miss=lambda: st.spinner("Montando o cubo de equipes..."))
+def load_month_cube(selected_month_name, data_version):
+    """Cubo nível (site/equipe/agente) × grão (mês/semana/dia) do mês; usa o consolidado se não houver dados diários."""
+    df = load_daily_month(selected_month_name, data_version)[0]
+    if df.empty:
+        df = load_and_preprocess_data(selected_month_name, data_version)
+    return AggregationCube(df, load_hierarchy())
+
+# --- Função 8: Sketches de quantis dos tempos (um por agente-dia, mesclados sob demanda) ---
+@loader_cache.memoize(ttl=MONTH_TTL_SECONDS, max_entries=MONTH_CACHE_ENTRIES, copy=True)
+def load_month_sketches(selected_month_name, data_version):
+    """Centroides dos sketches de TMA/TME/TMIA/TMIC de cada dia do mês, com o DateKey do dia."""
+    catalog = get_catalog()
+    year, month = parse_month_label(selected_month_name)
+    parts = []
+    for day, entry in catalog.day_files(selected_month_name):
+        if not is_usable('diario', entry):
+            continue
+        try:
+            parts.append(load_sketches(entry).assign(DateKey=date_key(year, MESES_ORDER.index(month) + 1, day)))
+        except Exception:
+            continue # O arquivo com problema já é avisado pelo carregamento diário
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+# --- Função 9: Pivô agente × dia de uma métrica (mapa de calor), em cache por mês/métrica/série ---
+@loader_cache.memoize(ttl=QUERY_TTL_SECONDS, max_entries=MONTH_CACHE_ENTRIES * len(HEATMAP_METRICS), copy=True)
+def load_month_heatmap(selected_month_name, metric, data_version, window=None):
+    """Matriz densa Agente × DateKey da métrica no mês: valores diários ou média móvel de `window` dias."""
+    if window is None:
+        df = load_daily_data(selected_month_name)
+    else:
+        year, month = parse_month_label(selected_month_name)
+        start_key = date_key(year, MESES_ORDER.index(month) + 1, 1)
+        rolling = get_rolling_kpis()
+        df = rolling.series(window, start_key, start_key + 30, generation=store_generation(rolling, data_version))
+    if df.empty or metric not in df.columns or 'DateKey' not in df.columns:
+        return pd.DataFrame()
+    aggfunc = 'sum' if metric.startswith('QTD') else 'mean'
+    return df.pivot_table(index='Agente', columns='DateKey', values=metric, aggfunc=aggfunc).sort_index()
+
+# --- Função 10: Agregação em cache (reaproveitada ao revisitar as visões do Admin) ---
+@loader_cache.memoize(ttl=QUERY_TTL_SECONDS, copy=True)
+def aggregate_by_group(df, group_cols, agg_dict):
+    """Agrupa o DataFrame pelas colunas informadas usando apenas as agregações disponíveis."""
+    valid_agg = {col: agg for col, agg in agg_dict.items() if col in df.columns}
+    if not valid_agg or df.empty:
+        return pd.DataFrame()
+    return df.groupby(list(group_cols), as_index=False).agg(valid_agg)
 
 # --- Funções de Dashboard KPI e Histórico ---
 
@@ -456,6 +625,42 @@ def display_kpi_metrics(kpi_data):
     display_metric(cols[7], "QTD Avaliacoes")
     st.markdown("---")
 
+def display_time_percentiles(selected_month, agente_name=None, df_period=None):
+    """Cards p50/p90/p99 e box plot dos tempos, mesclando os sketches dos dias do período.
+
+    Os arquivos trazem a média do dia de cada agente, então os percentis são dos dias por
+    agente (não de atendimentos individuais) e os rótulos dizem isso.
+    """
+    import plotly.graph_objects as go
+    df_centroids = load_month_sketches(selected_month, data_version())
+    if df_centroids.empty:
+        return
+    if df_period is not None and 'DateKey' in df_period.columns and not df_period.empty:
+        df_centroids = df_centroids[df_centroids['DateKey'].between(df_period['DateKey'].min(), df_period['DateKey'].max())]
+    if agente_name:
+        df_centroids = df_centroids[df_centroids['Agente'] == agente_name]
+    sketches = merge_sketches(df_centroids)
+    if not sketches:
+        return
+
+    with st.expander("⏱️ Distribuição dos Tempos (percentis dos dias por agente)"):
+        st.caption("Percentis das médias diárias de cada agente (um ponto por agente-dia, ponderado pelo número "
+                   "de atendimentos do dia), não de atendimentos individuais: um atendimento muito longo "
+                   "aparece diluído na média do seu dia.")
+        df_cards = sketch_quantiles(sketches, CARD_QUANTILES)
+        for col, row in zip(st.columns(len(df_cards)), df_cards.itertuples(index=False)):
+            col.metric(f"{row.Métrica} (p50 dos dias)", format_time(row.p50))
+            col.caption(f"p90 {format_time(row.p90)} · p99 {format_time(row.p99)}")
+
+        # Caixa p25-p75 e bigodes p1-p99, desenhados a partir dos percentis (sem as linhas brutas)
+        df_box = sketch_quantiles(sketches, BOX_QUANTILES)
+        fig = go.Figure([
+            go.Box(name=row.Métrica, q1=[row.p25], median=[row.p50], q3=[row.p75], lowerfence=[row.p1], upperfence=[row.p99])
+            for row in df_box.itertuples(index=False)
+        ])
+        fig.update_layout(title='Médias diárias por agente (minutos; bigodes em p1 e p99)', showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
 
 def display_monthly_history(agente_name=None): # Nome do agente é opcional
     """Carrega todos os dados, filtra pelo agente (se houver) e exibe o histórico."""
@@ -466,7 +671,7 @@ def display_monthly_history(agente_name=None): # Nome do agente é opcional
         st.header("📈 Histórico Mês a Mês (Geral)")
 
     # Carrega todos os dados históricos DENTRO desta função
-    df_full_history = load_all_history_data()
+    df_full_history = load_all_history_data(data_version())
 
     if df_full_history.empty:
         st.info("Não há dados históricos disponíveis.")
@@ -487,11 +692,29 @@ def display_monthly_history(agente_name=None): # Nome do agente é opcional
         st.info("Colunas 'Mês' ou 'MonthSort' não encontradas nos dados históricos do agente.")
         return
 
+    # Granularidade: agrupa pelas chaves inteiras da dimensão de datas (AAAAMM, AAAAT, AAAA)
+    grain = st.radio(
+        "Agrupar por:",
+        list(HISTORY_GRAINS),
+        horizontal=True,
+        key=f"history_grain_{agente_name or 'geral'}"
+    )
+    grain_title = HISTORY_GRAINS[grain]
+    if grain == "Trimestre" and 'QuarterKey' in df_agent_history.columns:
+        df_agent_history['PeriodSort'] = df_agent_history['QuarterKey']
+        df_agent_history['Trimestre'] = 'T' + df_agent_history['Trimestre'].astype(str) + '/' + df_agent_history['Ano'].astype(str)
+    elif grain == "Ano" and 'Ano' in df_agent_history.columns:
+        df_agent_history['PeriodSort'] = df_agent_history['Ano']
+        df_agent_history['Ano'] = df_agent_history['Ano'].astype(str)
+    else:
+        grain, grain_title = "Mês", HISTORY_GRAINS["Mês"]
+        df_agent_history['PeriodSort'] = df_agent_history['MonthSort']
+
     # Define as agregações
     agg_dict = {
         'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean',
         'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum',
-        'MonthSort': 'first' # Coluna auxiliar para manter a ordem
+        'PeriodSort': 'first' # Coluna auxiliar para manter a ordem
     }
 
     # Filtra as colunas válidas e agrupa
@@ -501,11 +724,11 @@ def display_monthly_history(agente_name=None): # Nome do agente é opcional
         st.info("Não há métricas suficientes para exibir o histórico mensal.")
         return
 
-    # Agrupa por Mês e MonthSort
-    df_monthly = df_agent_history.groupby(['MonthSort', 'Mês'], as_index=False).agg(valid_agg_cols)
+    # Agrupa pelo período (Mês, Trimestre ou Ano) e sua chave de ordenação
+    df_monthly = df_agent_history.groupby(['PeriodSort', grain], as_index=False).agg(valid_agg_cols)
     
-    # Ordena usando a coluna MonthSort
-    df_monthly = df_monthly.sort_values(by='MonthSort')
+    # Ordena usando a chave inteira do período (ordena corretamente entre anos)
+    df_monthly = df_monthly.sort_values(by='PeriodSort')
     
     # --- Gráficos de Tendência Mensal ---
     st.subheader("Gráficos de Tendência Mensal")
@@ -515,51 +738,110 @@ def display_monthly_history(agente_name=None): # Nome do agente é opcional
     # Gráfico de Satisfação Mensal (usa dados numéricos de df_monthly)
     if 'Satisfacao' in df_monthly.columns:
         with col1:
-            fig_sat = px.line(
-                df_monthly, 
-                x='Mês', 
-                y='Satisfacao', 
-                title='Satisfação Mês a Mês (0-5)',
-                markers=True,
-                # Garante que a ordem do eixo X siga a ordenação dos dados (MonthSort)
-                category_orders={"Mês": df_monthly['Mês']} 
-            )
+            # A ordem do eixo X segue a ordenação dos dados (PeriodSort)
+            fig_sat = line_figure(df_monthly, grain, 'Satisfacao', f'Satisfação {grain_title} (0-5)', backend=chart_backend())
             fig_sat.update_yaxes(range=[0, 5])
             st.plotly_chart(fig_sat, use_container_width=True)
 
     # Gráfico de FCR Mensal (usa dados numéricos de df_monthly)
     if 'FCR' in df_monthly.columns:
          with col2:
-            fig_fcr = px.line(
-                df_monthly, 
-                x='Mês', 
-                y='FCR', 
-                title='FCR Mês a Mês (0-1)',
-                markers=True,
-                category_orders={"Mês": df_monthly['Mês']}
-            )
+            fig_fcr = line_figure(df_monthly, grain, 'FCR', f'FCR {grain_title} (0-1)', backend=chart_backend())
             fig_fcr.update_yaxes(range=[0, 1], tickformat=".0%")
             st.plotly_chart(fig_fcr, use_container_width=True)
     
     st.markdown("---")
 
     # Tabela de Histórico
-    st.subheader("Tabela de Histórico Mês a Mês")
+    st.subheader(f"Tabela de Histórico {grain_title}")
 
     # Descarta a coluna de ordenação
-    df_monthly_display = df_monthly.drop(columns=['MonthSort'])
+    df_monthly_display = df_monthly.drop(columns=['PeriodSort'])
 
     # Aplica formatação de exibição
     df_display = apply_formatting(df_monthly_display)
 
     # Reordena e exibe as colunas
-    cols = ['Mês'] + [col for col in df_display.columns if col != 'Mês']
+    cols = [grain] + [col for col in df_display.columns if col != grain]
     df_display = df_display[cols]
     
     st.dataframe(df_display, use_container_width=True)
     st.markdown("---")
 
+# --- Renderização dos gráficos de linha (WebGL/SVG, downsampling e séries sob demanda) ---
+def chart_backend():
+    """Modo de renderização escolhido na barra lateral ('auto', 'webgl' ou 'svg')."""
+    return CHART_BACKENDS.get(st.session_state.get('chart_backend'), 'auto')
+
+def select_chart_series(df_chart, color, key):
+    """Séries (agentes) enviadas ao navegador: as de maior volume e, sob demanda, as escolhidas.
+
+    Retorna None (todas) quando há poucas séries; as demais só são carregadas quando
+    o usuário as adiciona ao seletor.
+    """
+    if color is None or color not in df_chart.columns or df_chart[color].nunique() <= INITIAL_SERIES:
+        return None
+    options = sorted(df_chart[color].dropna().astype(str).unique())
+    return st.multiselect(
+        f"Séries exibidas ({INITIAL_SERIES} de maior volume; adicione outras para carregá-las):",
+        options, default=top_series(df_chart, color), key=key
+    )
+
 # --- FUNÇÃO DE DETALHE DIÁRIO (com Gráficos) ---
+def daily_chart_data(df_daily_agg, key, agente_name=None):
+    """Seletor da série dos gráficos diários: pontos diários ou média móvel ponderada pelo volume.
+
+    Retorna (DataFrame para os gráficos, sufixo do título).
+    """
+    series_label = st.radio("Série dos gráficos:", list(DAILY_SERIES), horizontal=True, key=key)
+    window = DAILY_SERIES[series_label]
+    if window is None or 'DateKey' not in df_daily_agg.columns or df_daily_agg.empty:
+        return df_daily_agg, ""
+
+    rolling = get_rolling_kpis()
+    df_rolling = rolling.series(window, df_daily_agg['DateKey'].min(), df_daily_agg['DateKey'].max(), agente_name,
+                                generation=store_generation(rolling))
+    if df_rolling.empty:
+        return df_daily_agg, ""
+    # Rótulo do dia no mesmo formato dos arquivos diários (01/11) e ordenação por data
+    df_rolling = df_rolling.sort_values('DateKey')
+    df_rolling['Dia'] = (df_rolling['DateKey'] % 100).map('{:02d}'.format) + '/' + (df_rolling['DateKey'] // 100 % 100).map('{:02d}'.format)
+    if 'Agente' in df_daily_agg.columns:
+        df_rolling = df_rolling[df_rolling['Agente'].isin(df_daily_agg['Agente'].unique())]
+    return df_rolling, f" - média móvel {window} dias (ponderada pelo volume)"
+
+def display_daily_heatmap(selected_month, df_daily_agg, key):
+    """Mapa de calor agente × dia (um único trace denso), recortado pelos dias/agentes do período."""
+    import plotly.graph_objects as go
+    series_label = st.radio("Série do mapa:", list(DAILY_SERIES), horizontal=True, key=key)
+    window = DAILY_SERIES[series_label]
+    metric_options = [metric for metric in HEATMAP_METRICS if metric in df_daily_agg.columns]
+    if not metric_options:
+        return
+    metric = st.selectbox("Métrica do mapa:", metric_options, format_func=lambda col: HEATMAP_METRICS[col][0], key=f"{key}_metric")
+
+    pivot = load_month_heatmap(selected_month, metric, data_version(), window)
+    if not pivot.empty and 'DateKey' in df_daily_agg.columns:
+        days = [day for day in pivot.columns if df_daily_agg['DateKey'].min() <= day <= df_daily_agg['DateKey'].max()]
+        pivot = pivot.loc[pivot.index.isin(df_daily_agg['Agente'].unique()), days]
+    if pivot.empty:
+        st.info(f"Não há valores de {HEATMAP_METRICS[metric][0]} para a série '{series_label}' no período.")
+        return
+
+    label, value_range = HEATMAP_METRICS[metric]
+    day_labels = [f"{day % 100:02d}/{day // 100 % 100:02d}" for day in pivot.columns]
+    fig = go.Figure(go.Heatmap(
+        z=pivot.to_numpy(), x=day_labels, y=pivot.index.astype(str).tolist(),
+        colorscale='RdYlGn_r' if metric in LOWER_IS_BETTER else 'RdYlGn',
+        zmin=value_range[0] if value_range else None, zmax=value_range[1] if value_range else None,
+        colorbar=dict(title=label), hoverongaps=False,
+        hovertemplate='%{y} · %{x}<br>' + label + ': %{z:.2f}<extra></extra>',
+    ))
+    title_suffix = f" - média móvel {window} dias" if window else ""
+    fig.update_layout(title=f'{label} por Agente e Dia{title_suffix}', height=max(320, 22 * len(pivot) + 120),
+                      yaxis=dict(autorange='reversed', type='category'), xaxis=dict(type='category'))
+    st.plotly_chart(fig, use_container_width=True)
+
 def display_daily_detail(selected_month, agente_name=None): # Agente opcional
     st.header(f"📅 Detalhe Dia a Dia ({selected_month.capitalize()})")
     
@@ -568,16 +850,16 @@ def display_daily_detail(selected_month, agente_name=None): # Agente opcional
     
     if df_daily.empty:
         if agente_name:
-            st.info(f"Nenhum dado diário encontrado para {agente_name} na subpasta 'data/{selected_month.lower()}/'.")
+            st.info(f"Nenhum dado diário encontrado para {agente_name} na subpasta '{get_catalog().month_dir(selected_month)}/'.")
         else:
-            st.info(f"Nenhum dado diário encontrado na subpasta 'data/{selected_month.lower()}/'.")
+            st.info(f"Nenhum dado diário encontrado na subpasta '{get_catalog().month_dir(selected_month)}/'.")
         return
 
     # Define as agregações
     agg_dict = {
         'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean',
         'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum',
-        'DaySort': 'first', 'Data': 'first' # Mantém a coluna Data
+        'DaySort': 'first', 'Data': 'first', 'DateKey': 'first' # Mantém a coluna Data
     }
     # Se for admin (agente_name=None), precisamos agrupar por Dia E Agente
     group_by_cols = ['DaySort', 'Dia']
@@ -599,27 +881,29 @@ def display_daily_detail(selected_month, agente_name=None): # Agente opcional
 
     # --- Gráficos de Tendência Diária ---
     st.subheader("Gráficos de Tendência Diária")
+    df_chart, title_suffix = daily_chart_data(df_daily_agg, f"daily_series_{agente_name or 'geral'}", agente_name)
     
     col1, col2 = st.columns(2)
     
     plot_color = 'Agente' if agente_name is None else None # Colore por agente se for admin
+    series = select_chart_series(df_chart, plot_color, f"daily_agents_{agente_name or 'geral'}")
     
     # Gráfico de Satisfação
-    if 'Satisfacao' in df_daily_agg.columns:
+    if 'Satisfacao' in df_chart.columns:
         with col1:
-            fig_sat = px.line(
-                df_daily_agg, x='Dia', y='Satisfacao', title='Satisfação Diária (0-5)',
-                markers=True, color=plot_color
+            fig_sat = line_figure(
+                df_chart, 'Dia', 'Satisfacao', f'Satisfação Diária (0-5){title_suffix}',
+                color=plot_color, series=series, backend=chart_backend()
             )
             fig_sat.update_yaxes(range=[0, 5])
             st.plotly_chart(fig_sat, use_container_width=True)
 
     # Gráfico de FCR
-    if 'FCR' in df_daily_agg.columns:
+    if 'FCR' in df_chart.columns:
          with col2:
-            fig_fcr = px.line(
-                df_daily_agg, x='Dia', y='FCR', title='FCR Diário (0-1)',
-                markers=True, color=plot_color
+            fig_fcr = line_figure(
+                df_chart, 'Dia', 'FCR', f'FCR Diário (0-1){title_suffix}',
+                color=plot_color, series=series, backend=chart_backend()
             )
             fig_fcr.update_yaxes(range=[0, 1], tickformat=".0%")
             st.plotly_chart(fig_fcr, use_container_width=True)
@@ -630,7 +914,7 @@ def display_daily_detail(selected_month, agente_name=None): # Agente opcional
     st.subheader("Tabela de Detalhe Diário")
     
     # Descarta a coluna de ordenação
-    df_daily_agg = df_daily_agg.drop(columns=['DaySort', 'Data']) # Remove Data também
+    df_daily_agg = df_daily_agg.drop(columns=['DaySort', 'Data', 'DateKey'], errors='ignore') # Remove Data também
 
     # Aplica formatação de exibição
     df_display = apply_formatting(df_daily_agg)
@@ -650,7 +934,7 @@ def display_evaluation_details(selected_month, agente_name):
     df_evals = load_evaluation_data(selected_month_name=selected_month, agente_name=agente_name)
     
     if df_evals.empty:
-        st.info(f"Nenhuma avaliação encontrada para {agente_name} na subpasta 'data/{selected_month.lower()}/notas/'.")
+        st.info(f"Nenhuma avaliação encontrada para {agente_name} na subpasta '{get_catalog().month_dir(selected_month)}/notas/'.")
         return
 
     # Garante que 'DaySort' existe para ordenação
@@ -672,11 +956,61 @@ def display_evaluation_details(selected_month, agente_name):
     final_cols = [col for col in cols_to_show if col in df_evals.columns]
     
     df_display = df_evals[final_cols]
+
+    # Resumo calculado a partir das contagens do rollup (não da média de percentuais)
+    display_rating_summary(load_rating_rollup(selected_month, agente_name))
     
     st.dataframe(df_display, use_container_width=True, hide_index=True)
     st.markdown("---")
 # 🚨 --- FIM DA ADIÇÃO --- 🚨
 
+def display_rating_summary(rollup):
+    """Cards de Avaliações/Média/CSAT/NPS e histograma de notas a partir do rollup."""
+    import plotly.express as px
+    summary = summarize_ratings(rollup)
+    if summary.empty or summary['Avaliacoes'].iloc[0] == 0:
+        return
+    totals = summary.iloc[0]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Avaliações", f"{totals['Avaliacoes']:.0f}")
+    col2.metric("Média das Notas", f"{totals['Media Nota']:.2f}")
+    col3.metric("CSAT", f"{totals['CSAT']:.2%}")
+    col4.metric("NPS", f"{totals['NPS']:.1f}")
+
+    df_hist = pd.DataFrame({'Nota': [col.replace('Nota ', '') for col in NOTA_COLS], 'Quantidade': totals[NOTA_COLS].to_numpy()})
+    fig_hist = px.bar(df_hist, x='Nota', y='Quantidade', title='Distribuição das Notas')
+    st.plotly_chart(fig_hist, use_container_width=True)
+
+
+# --- Exportação do Recorte Atual ---
+def display_export_section(df_raw, df_agg, name_parts, key):
+    """Botões de download do recorte atual (bruto e agregado) em CSV, Excel ou Parquet."""
+    with st.expander("⬇️ Exportar Dados (Recorte Atual)"):
+        fmt = st.radio("Formato:", list(EXPORT_FORMATS), horizontal=True, key=f"export_fmt_{key}")
+        mime = EXPORT_FORMATS[fmt][1]
+        col1, col2 = st.columns(2)
+        # data=callable: o arquivo só é gerado no clique, numa thread separada do rerun,
+        # então exportações grandes não bloqueiam a página (nem as outras sessões)
+        col1.download_button(
+            "Dados Brutos",
+            data=functools.partial(export_frame, df_raw, fmt),
+            file_name=export_file_name(*name_parts, 'bruto', fmt=fmt),
+            mime=mime,
+            on_click="ignore",
+            disabled=df_raw.empty,
+            key=f"export_raw_{key}"
+        )
+        col2.download_button(
+            "Dados Agregados (por Agente)",
+            data=functools.partial(export_frame, df_agg, fmt),
+            file_name=export_file_name(*name_parts, 'agregado', fmt=fmt),
+            mime=mime,
+            on_click="ignore",
+            disabled=df_agg.empty,
+            key=f"export_agg_{key}"
+        )
+
 
 # --- FUNÇÕES DE PAINEL ---
 
@@ -686,6 +1020,14 @@ def display_user_dashboard(df_agent_current_month): # Recebe dados do mês selec
     selected_month = st.session_state['selected_month_name']
     
     st.title(f"👤 Dashboard de Desempenho - {agente_name}")
+
+    # Exportação: dias do agente no mês (bruto) e o consolidado do mês (agregado)
+    display_export_section(
+        load_daily_data(selected_month_name=selected_month, agente_name=agente_name),
+        df_agent_current_month,
+        (selected_month, agente_name),
+        key="user"
+    )
     
     # --- Painel do Mês Selecionado (Tabela 1) ---
     st.header(f"📊 {selected_month.capitalize()} - Resultado do Mês")
@@ -695,6 +1037,8 @@ def display_user_dashboard(df_agent_current_month): # Recebe dados do mês selec
     else:
         # KPIs Agregados do Mês
         display_kpi(df_agent_current_month)
+        display_time_percentiles(selected_month, agente_name)
+        display_goal_matrix(selected_month, agente_name)
 
         # Tabela Detalhada do Mês
         st.subheader("📋 Tabela de Detalhe Mensal")
@@ -720,19 +1064,372 @@ def display_user_dashboard(df_agent_current_month): # Recebe dados do mês selec
     # 🚨 --- FIM DA ADIÇÃO --- 🚨
 
 
+def display_alerts(selected_month):
+    """Alertas de meta e de anomalia do mês (lidos da tabela de alertas, sem recalcular)."""
+    year, month = parse_month_label(selected_month)
+    start_key = date_key(year, MESES_ORDER.index(month) + 1, 1)
+    alert_store = get_alert_store()
+    df_alerts = alert_store.alerts(start_key, start_key + 30, generation=store_generation(alert_store))
+
+    with st.expander(f"🚨 Alertas do Mês ({len(df_alerts)})", expanded=not df_alerts.empty):
+        targets = ", ".join(f"{metric} {'≤' if direction == 'max' else '≥'} {limit}" for metric, (direction, limit) in ALERT_TARGETS.items())
+        st.caption(f"Metas: {targets}. Anomalia: dia muito pior que a linha de base do próprio agente.")
+        if df_alerts.empty:
+            st.success("Nenhum alerta no mês.")
+            return
+        df_alerts['Dia'] = (df_alerts['DateKey'] % 100).map('{:02d}'.format) + '/' + (df_alerts['DateKey'] // 100 % 100).map('{:02d}'.format)
+        df_alerts['Desvio'] = pd.to_numeric(df_alerts['Desvio'], errors='coerce').round(1)
+        st.dataframe(df_alerts[['Dia', 'Agente', 'Métrica', 'Tipo', 'Valor', 'Referência', 'Desvio', 'Volume']], use_container_width=True, hide_index=True)
+
+def display_goal_matrix(selected_month, agente_name=None, df_period=None):
+    """Matriz agente × métrica do atingimento de metas (consulta à tabela já calculada)."""
+    if df_period is not None and 'DateKey' in df_period.columns and not df_period.empty:
+        start_key, end_key = df_period['DateKey'].min(), df_period['DateKey'].max()
+    else:
+        year, month = parse_month_label(selected_month)
+        start_key = date_key(year, MESES_ORDER.index(month) + 1, 1)
+        end_key = start_key + 30
+    goal_store = get_goal_store()
+    df_goals = goal_store.attainment(start_key, end_key, agente_name, generation=store_generation(goal_store))
+    if df_goals.empty:
+        return
+
+    with st.expander("🎯 Metas: Atingimento no Período"):
+        st.caption("Cada célula: dias na meta / dias com dados e a sequência atual "
+                   "(✅ +N = N dias seguidos na meta; ❌ -N = N dias seguidos fora dela). "
+                   "Metas configuráveis em 'data/metas.csv' (geral, por equipe ou por agente).")
+        df_goals['Célula'] = [
+            f"{'✅' if streak > 0 else '❌'} {met}/{days} ({streak:+d})"
+            for met, days, streak in zip(df_goals['Dias na Meta'], df_goals['Dias'], df_goals['Sequência'])
+        ]
+        matrix = df_goals.pivot(index='Agente', columns='Métrica', values='Célula')
+        st.dataframe(matrix, use_container_width=True)
+
+        # Metas em vigor (a mais específica vence: agente > equipe > geral)
+        targets = df_goals.groupby('Métrica')['Meta'].agg(['min', 'max'])
+        st.caption("Metas: " + ", ".join(
+            f"{metric} {'≤' if metric in LOWER_IS_BETTER else '≥'} {row['min']:g}" + (f"-{row['max']:g}" if row['max'] != row['min'] else "")
+            for metric, row in targets.iterrows()
+        ))
+
+def display_top3(df_compare):
+    """Top 3 de FCR, Satisfação e TMIA (mesmas regras do modo TV) de uma tabela por agente."""
+    for metric in RANKING_RULES:
+        if metric in df_compare.columns and 'QTD Atendimento' in df_compare.columns:
+            st.dataframe(format_ranking(top_agents(df_compare, metric), metric), use_container_width=True, hide_index=True)
+        else:
+            st.info(f"Métrica '{metric}' não disponível.")
+
+def display_admin_overview(df_filtered, df_monthly_aggregate, selected_month):
+    """Visão Geral do Admin: KPIs, rankings e comparação de agentes do período."""
+    import plotly.express as px
+    st.subheader("📈 Métricas Agregadas (Período Selecionado)")
+    display_kpi(df_filtered) # Usa o DF filtrado (diário ou mensal)
+    display_time_percentiles(selected_month, df_period=df_filtered)
+    display_goal_matrix(selected_month, df_period=df_filtered)
+    display_alerts(selected_month)
+
+    # Rankings (Sempre visíveis, não filtrados pelo calendário)
+    st.subheader("🏆 Ranking Top 3")
+    st.info("Os rankings abaixo são baseados nos arquivos consolidados (semanais e mensal) e **não** são afetados pelo filtro de calendário. "
+            "Para comparar quaisquer dois períodos, use a visão **Comparação de Períodos**.")
+
+    # Semana atual, semana anterior (arquivos de 'data/semana/') e consolidado do mês
+    for col_rank, medal, (title, filename) in zip(st.columns(3), ["🥇", "🥈", "🥉"], RANKING_SOURCES.items()):
+        with col_rank:
+            if filename is None:
+                st.markdown(f"##### {medal} Consolidado do Mês ({selected_month})")
+                df_source = df_monthly_aggregate # Já é agregado por agente
+            else:
+                st.markdown(f"##### {medal} {title}")
+                df_source = load_ranking_data(filename, data_version())
+
+            if df_source.empty:
+                st.warning(f"Arquivo '{filename or 'consolidado do mês'}' não encontrado.")
+            elif 'Agente' not in df_source.columns:
+                st.error(f"{title}: Coluna 'Agente' não encontrada.")
+            else:
+                if filename is not None:
+                    agg_cols = [col for col in ['QTD Atendimento', 'Satisfacao', 'FCR', 'TMIA'] if col in df_source.columns]
+                    agg_dict = {col: ('sum' if col.startswith('QTD') else 'mean') for col in agg_cols}
+                    df_source = aggregate_by_group(df_source, ('Agente',), agg_dict)
+                display_top3(df_source)
+
+    st.markdown("---")
+
+    # Gráficos de Comparação (Baseados no FILTRO DE CALENDÁRIO)
+    st.subheader("⚖️ Comparação de Agentes (Período Selecionado)")
+
+    agg_cols = [col for col in ['QTD Atendimento', 'Satisfacao', 'NPS', 'FCR', 'TMA', 'TME', 'TMIA'] if col in df_filtered.columns]
+
+    if 'Agente' in df_filtered.columns and agg_cols:
+        agg_dict_cal = {col: ('sum' if col.startswith('QTD') else 'mean') 
+                        for col in agg_cols if col in df_filtered.columns}
+
+        if agg_dict_cal:
+            df_compare_calendario = aggregate_by_group(df_filtered, ('Agente',), agg_dict_cal)
+
+            if 'Satisfacao' in df_compare_calendario.columns:
+                fig_sat_agent = px.bar(df_compare_calendario.sort_values(by='Satisfacao', ascending=False), x='Agente', y='Satisfacao', title='Média de Satisfação por Agente', color='Satisfacao', color_continuous_scale=px.colors.sequential.Plotly3)
+                st.plotly_chart(fig_sat_agent, use_container_width=True)
+            if 'TMA' in df_compare_calendario.columns:
+                fig_tma_agent = px.bar(df_compare_calendario.sort_values(by='TMA', ascending=False), x='Agente', y='TMA', title='TMA (Tempo Médio de Atendimento) por Agente (em minutos)', color='TMA', color_continuous_scale=px.colors.sequential.Reds)
+                st.plotly_chart(fig_tma_agent, use_container_width=True)
+
+            # Tabela Consolidada de Agentes (Período Selecionado)
+            st.markdown("---")
+            st.subheader("📋 Tabela Consolidada de Agentes (Período Selecionado)")
+
+            df_compare_sorted = df_compare_calendario.sort_values(by=['Satisfacao', 'QTD Atendimento'], ascending=[False, False])
+            df_display_admin_agg = apply_formatting(df_compare_sorted)
+            st.dataframe(df_display_admin_agg, use_container_width=True, hide_index=True)
+
+        else: 
+            st.warning("Não há colunas de métricas suficientes no período selecionado para comparar agentes.")
+    else: 
+        st.warning("Não há dados de 'Agente' no período selecionado.")
+
+
+def display_admin_daily_detail(df_filtered, is_date_available, selected_month):
+    """Detalhe Diário do Admin (todos os agentes) para o período selecionado."""
+    st.header(f"📅 Detalhe Dia a Dia ({selected_month.capitalize()})")
+
+    if not is_date_available:
+        st.info("Detalhe diário não disponível (nenhuma subpasta encontrada).")
+        # Se não houver dados diários, exibe o consolidado mensal
+        df_display = apply_formatting(df_filtered)
+        st.dataframe(df_display, use_container_width=True)
+    else:
+        # Agrupamento para métricas diárias (Médias por Data e Agente)
+        agg_dict_full = {
+            'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean',
+            'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum',
+            'DaySort': 'first', 'Agente': 'first', 'Data': 'first', 'DateKey': 'first'
+        }
+
+        df_daily_agg = aggregate_by_group(df_filtered, ('DaySort', 'Dia', 'Agente'), agg_dict_full).sort_values(by='DaySort')
+
+        # Mapa de calor (uma matriz só) por padrão: legível com centenas de agentes.
+        # As linhas por agente usam WebGL/downsampling e carregam as séries sob demanda
+        chart_type = st.radio("Visualização:", ["Mapa de calor", "Linhas por agente"], horizontal=True, key="admin_daily_chart_type")
+        if chart_type == "Mapa de calor":
+            st.subheader("Mapa de Calor Agente × Dia (Todos Agentes)")
+            display_daily_heatmap(selected_month, df_daily_agg, "admin_daily_series")
+        else:
+            st.subheader("Gráficos de Tendência Diária (Todos Agentes)")
+            df_chart, title_suffix = daily_chart_data(df_daily_agg, "admin_daily_lines_series")
+            series = select_chart_series(df_chart, 'Agente', "admin_daily_agents")
+            col1, col2 = st.columns(2)
+            if 'Satisfacao' in df_chart.columns:
+                with col1:
+                    fig_sat = line_figure(df_chart, 'Dia', 'Satisfacao', f'Satisfação Diária (0-5){title_suffix}', color='Agente', series=series, backend=chart_backend())
+                    fig_sat.update_yaxes(range=[0, 5])
+                    st.plotly_chart(fig_sat, use_container_width=True)
+            if 'FCR' in df_chart.columns:
+                with col2:
+                    fig_fcr = line_figure(df_chart, 'Dia', 'FCR', f'FCR Diário (0-1){title_suffix}', color='Agente', series=series, backend=chart_backend())
+                    fig_fcr.update_yaxes(range=[0, 1], tickformat=".0%")
+                    st.plotly_chart(fig_fcr, use_container_width=True)
+
+        st.markdown("---")
+        st.subheader("Tabela de Detalhe Diário (Todos Agentes)")
+        df_daily_agg = df_daily_agg.drop(columns=['DaySort', 'Data', 'DateKey'], errors='ignore') 
+        df_display = apply_formatting(df_daily_agg)
+        cols = ['Dia'] + [col for col in df_display.columns if col != 'Dia']
+        st.dataframe(df_display[cols], use_container_width=True)
+
+
 def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o MENSAL
     """Dashboard para o administrador."""
     st.title(f"🧑‍💼 Dashboard Global - {st.session_state['selected_month_name']}")
 
     selected_month = st.session_state['selected_month_name']
 
+    display_protocol_search()
+    display_quality_report()
+    display_reconciliation_report()
+    display_cache_stats()
+
+    display_admin_panel(df_monthly_aggregate, selected_month)
+
+
+def display_quality_report():
+    """Relatório dos arquivos pulados (quarentena) ou carregados com avisos, e o motivo."""
+    df_report = get_quality_store().report()
+    quarantined = int((df_report['Situação'] == STATUS_QUARANTINE).sum()) if not df_report.empty else 0
+    invalid = get_catalog().invalid_files()
+    with st.expander(f"🧪 Qualidade dos Dados ({quarantined} arquivo(s) em quarentena)", expanded=quarantined > 0 or bool(invalid)):
+        if invalid:
+            st.warning(f"{len(invalid)} arquivo(s) com data inexistente ignorado(s). Renomeie-os com o dia correto.")
+            st.dataframe(pd.DataFrame([{'Arquivo': entry.path, 'Motivo': reason} for entry, reason in invalid]),
+                         use_container_width=True, hide_index=True)
+        if df_report.empty:
+            st.success("Todos os arquivos validados estão de acordo com o esquema esperado.")
+            return
+        st.caption("Arquivos em quarentena não são lidos até o conteúdo mudar. Corrija o CSV e copie-o de novo para a pasta.")
+        st.dataframe(df_report, use_container_width=True, hide_index=True)
+
+
+def display_upload_page():
+    """Envio de arquivos pelo Admin: o arquivo entra na fila e é validado/publicado em segundo plano."""
+    st.title("📤 Enviar Dados")
+    st.caption("O arquivo é validado e normalizado em segundo plano e só aparece no dashboard depois de aprovado. "
+               "Um arquivo com o mesmo destino substitui o atual.")
+    catalog = get_catalog()
+
+    kind_label = st.selectbox("Tipo de arquivo:", list(UPLOAD_KINDS), key="upload_kind")
+    kind = UPLOAD_KINDS[kind_label]
+    label, day, ranking_name, valid_day = None, None, None, True
+    if kind == 'ranking':
+        ranking_name = st.selectbox("Ranking:", list(RANKING_SOURCES.values()), key="upload_ranking",
+                                    format_func=lambda name: next(title for title, f in RANKING_SOURCES.items() if f == name))
+    else:
+        col_month, col_year, col_day = st.columns(3)
+        today = datetime.date.today()
+        month = col_month.selectbox("Mês:", MESES_ORDER, index=today.month - 1, key="upload_month", format_func=str.capitalize)
+        year = col_year.number_input("Ano:", min_value=2000, max_value=2100, value=today.year, step=1, key="upload_year")
+        label = month_label(int(year), month)
+        if kind in ('diario', 'notas'):
+            day = int(col_day.number_input("Dia:", min_value=1, max_value=31, value=today.day, step=1, key="upload_day"))
+            valid_day = is_valid_day(int(year), MESES_ORDER.index(month) + 1, day)
+            if not valid_day:
+                st.error(f"O dia {day} não existe em {label}.")
+
+    uploaded = st.file_uploader("Arquivo CSV:", type=['csv'], key="upload_file")
+    if st.button("Enviar", key="upload_submit", disabled=uploaded is None or not valid_day):
+        destination = catalog.upload_path(kind, label, day=day, filename=ranking_name)
+        get_upload_manager().submit(kind, destination, uploaded.getvalue(), uploaded.name, label, day)
+        st.toast(f"'{uploaded.name}' enviado para validação.")
+
+    display_upload_jobs()
+
+
+def display_upload_jobs():
+    """Situação dos envios: atualizada sozinha só enquanto há arquivo na fila ou em validação."""
+    manager = get_upload_manager()
+    if manager.pending():
+        poll_upload_jobs()
+    else:
+        show_upload_jobs(manager)
+
+# Fragmento: a lista de envios se atualiza sozinha enquanto há arquivos na fila
+@st.fragment(run_every=UPLOAD_POLL_SECONDS)
+def poll_upload_jobs():
+    """Lista de envios consultada a cada UPLOAD_POLL_SECONDS; sem envios pendentes, para de consultar."""
+    manager = get_upload_manager()
+    show_upload_jobs(manager)
+    if not manager.pending():
+        st.rerun() # Reexecuta a página: a lista volta a ser exibida sem atualização automática
+
+def show_upload_jobs(manager):
+    """Situação dos envios; quando um arquivo é publicado, reindexa o catálogo na hora."""
+    if st.session_state.get('upload_published', 0) != manager.published:
+        st.session_state['upload_published'] = manager.published
+        # Nova versão dos dados: reexecuta o app para a sessão passar a lê-la
+        if refresh_catalog(force=True).version != data_version():
+            st.rerun()
+
+    jobs = manager.jobs()
+    if not jobs:
+        st.info("Nenhum arquivo enviado nesta sessão do servidor.")
+        return
+    icons = {JOB_PUBLISHED: '✅', JOB_REJECTED: '⛔', JOB_FAILED: '❌'}
+    df_jobs = pd.DataFrame([{
+        'Arquivo': job.filename,
+        'Destino': os.path.relpath(job.destination, DATA_FOLDER),
+        'Situação': f"{icons.get(job.status, '⏳')} {job.status}",
+        'Mensagens': '; '.join(job.messages),
+        'Enviado em': job.submitted_at.strftime('%d/%m %H:%M:%S'),
+    } for job in jobs])
+    st.dataframe(df_jobs, use_container_width=True, hide_index=True)
+
+
+def display_reconciliation_report():
+    """Meses em que a soma dos diários não fecha com o consolidado mensal (ou faltam dias)."""
+    store = get_reconciliation_store()
+    generation = store_generation(store)
+    df_summary = store.summary(generation)
+    flagged = df_summary[df_summary['Fonte de Referência'] == SOURCE_MONTHLY] if not df_summary.empty else df_summary
+    with st.expander(f"⚖️ Conciliação Mensal x Diário ({len(flagged)} mês(es) com diferenças)"):
+        if df_summary.empty:
+            st.info("Nenhum mês conciliado ainda.")
+            return
+        st.caption("Compara por agente os totais aditivos (atendimentos, avaliações e média × volume) do consolidado "
+                   "com a soma dos arquivos diários. Onde não fecham, o consolidado mensal é a fonte de referência.")
+        st.dataframe(df_summary, use_container_width=True, hide_index=True)
+        if flagged.empty:
+            return
+        month = st.selectbox("Divergências do mês:", flagged['Mês'].tolist(), key="reconciliation_month")
+        df_divergences = store.divergences(month, generation)
+        if df_divergences.empty:
+            st.info("Totais por agente conferem; a diferença está nos dias faltando.")
+        else:
+            st.dataframe(df_divergences.style.format({'Mensal': '{:.2f}', 'Diário': '{:.2f}', 'Diferença': '{:+.2f}', 'Relativa': '{:.1%}'}, na_rep='-'),
+                         use_container_width=True, hide_index=True)
+
+
+def display_cache_stats():
+    """Uso do cache dos loaders neste processo: memória, entradas, taxa de acerto e despejos."""
+    cache = get_cache_manager()
+    df_stats = cache.stats()
+    with st.expander(f"🧠 Cache em Memória ({cache.total_bytes / (1024 * 1024):.1f} de {cache.budget_bytes / (1024 * 1024):.0f} MB)"):
+        lookups = df_stats['Acertos'].sum() + df_stats['Faltas'].sum()
+        col_entries, col_memory, col_hits, col_evictions = st.columns(4)
+        col_entries.metric("Entradas", int(df_stats['Entradas'].sum()))
+        col_memory.metric("Memória", f"{cache.total_bytes / (1024 * 1024):.1f} MB")
+        col_hits.metric("Taxa de Acerto", f"{df_stats['Acertos'].sum() / lookups:.0%}" if lookups else "-")
+        col_evictions.metric("Despejos", int(df_stats['Despejos'].sum()))
+        st.caption("Os resultados menos usados saem primeiro quando o orçamento (DASHBOARD_CACHE_MB) é atingido; cada loader também expira pelo seu TTL.")
+        st.dataframe(df_stats.style.format({'MB': '{:.2f}', 'Taxa de Acerto': '{:.0%}'}, na_rep='-'),
+                     use_container_width=True, hide_index=True)
+        if st.button("Limpar cache", key="clear_loader_cache"):
+            cache.clear()
+            st.rerun()
+
+
+# Fragmento: a busca por protocolo consulta o índice e não reexecuta o painel
+@st.fragment
+def display_protocol_search():
+    """Busca de protocolo pelo índice persistente, com as métricas do agente naquele dia."""
+    with st.expander("🔎 Buscar Protocolo"):
+        protocolo = st.text_input("Número do Protocolo:", key="protocol_search")
+        if not protocolo:
+            return
+
+        df_found = get_protocol_index().lookup(protocolo)
+        if df_found.empty:
+            st.info(f"Protocolo **{protocolo}** não encontrado nos arquivos de notas.")
+            return
+
+        st.dataframe(df_found.drop(columns=['DateKey']), use_container_width=True, hide_index=True)
+
+        # Junta com as métricas diárias do agente no dia do protocolo (fatia do mês em cache)
+        for _, found in df_found.iterrows():
+            df_day = load_daily_data(selected_month_name=found['Mês'], agente_name=found['Agente'])
+            if df_day.empty or 'DateKey' not in df_day.columns:
+                continue
+            df_day = df_day[df_day['DateKey'] == found['DateKey']]
+            if not df_day.empty:
+                st.markdown(f"**Desempenho de {found['Agente']} em {df_day['Dia'].iloc[0]}**")
+                relevant_cols = ['Dia', 'Agente', 'QTD Atendimento', 'TMA', 'TME', 'TMIA', 'FCR', 'Satisfacao', 'NPS']
+                df_display = apply_formatting(df_day)
+                st.dataframe(df_display[[col for col in relevant_cols if col in df_display.columns]], use_container_width=True, hide_index=True)
+
+
+# Fragmento: mudar o agente, o período ou a visão reexecuta apenas este painel,
+# sem repetir a varredura de 'data/', o carregamento mensal e o roteamento do main().
+@st.fragment
+def display_admin_panel(df_monthly_aggregate, selected_month):
+    """Filtros e conteúdo do painel Admin (reexecutados de forma independente do restante da página)."""
+
     # 1. Carrega os dados DIÁRIOS para este mês (para todos os agentes)
     df_daily_full = load_daily_data(selected_month_name=selected_month, agente_name=None)
     
     is_date_available = not df_daily_full.empty and 'Data' in df_daily_full.columns
 
-    # --- Filtros do Admin na Sidebar ---
-    st.sidebar.subheader(f"Filtros (Admin - {selected_month})")
+    # --- Filtros do Admin (no corpo do fragmento; fragmentos não escrevem na sidebar) ---
+    st.subheader(f"Filtros (Admin - {selected_month})")
+    col_filter_agent, col_filter_period = st.columns(2)
     
     # 2. Filtro de Agente
     agent_list = ["Todos os Agentes"]
@@ -744,7 +1441,7 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
         valid_agents = [str(agent) for agent in unique_agents if str(agent).strip() != '']
         agent_list.extend(sorted(list(set(valid_agents))))
 
-    selected_agent = st.sidebar.selectbox(
+    selected_agent = col_filter_agent.selectbox(
         "Filtrar por Agente:", 
         agent_list,
         key="admin_agent_filter"
@@ -757,7 +1454,7 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
             min_date = valid_dates.min().date()
             max_date = valid_dates.max().date()
             
-            selected_date_range = st.sidebar.date_input(
+            selected_date_range = col_filter_period.date_input(
                 "Selecione o Período (Calendário):",
                 value=(min_date, max_date),
                 min_value=min_date,
@@ -781,14 +1478,24 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
                 ].copy()
         
         else: # Datas inválidas
-            st.sidebar.info(f"Nenhum dado diário com data válida encontrado.")
+            col_filter_period.info(f"Nenhum dado diário com data válida encontrado.")
             df_filtered_daily = pd.DataFrame() 
             is_date_available = False
         
     else:
-        st.sidebar.info(f"Nenhum dado diário encontrado na subpasta 'data/{selected_month.lower()}/'. Exibindo o consolidado mensal.")
+        col_filter_period.info(f"Nenhum dado diário encontrado na subpasta '{get_catalog().month_dir(selected_month)}/'. Exibindo o consolidado mensal.")
         df_filtered_daily = pd.DataFrame() 
         is_date_available = False
+
+    # Avisa quando a soma dos diários não fecha com o consolidado (resultado já gravado pela conciliação)
+    reconciliation_store = get_reconciliation_store()
+    reconciliation = reconciliation_store.status(selected_month, store_generation(reconciliation_store)) if is_date_available else None
+    if reconciliation and reconciliation[0] == SOURCE_MONTHLY:
+        _, gaps, divergences = reconciliation
+        problems = ([f"dias sem arquivo: {', '.join(str(day) for day in gaps)}"] if gaps else []) + \
+                   ([f"{divergences} divergência(s) por agente"] if divergences else [])
+        st.warning(f"Os dados diários de {selected_month} não fecham com o consolidado mensal ({'; '.join(problems)}). "
+                   "Para os totais do mês, o consolidado é a referência; veja a Conciliação Mensal x Diário.")
         
     
     # 4. Decide qual DataFrame usar com base nos filtros
@@ -805,6 +1512,15 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
         st.warning("Nenhum dado encontrado para a seleção atual.")
         return
 
+    # Exportação do recorte filtrado (mês, agente e período do calendário)
+    period_parts = (start_date, end_date) if is_date_available else ()
+    display_export_section(
+        df_filtered,
+        aggregate_by_group(df_filtered, ('Agente',), EXPORT_AGG) if 'Agente' in df_filtered.columns else pd.DataFrame(),
+        (selected_month, selected_agent, *period_parts),
+        key="admin"
+    )
+
     # --- Lógica de Exibição (Admin vs Agente) ---
     if selected_agent != "Todos os Agentes":
         # 1. Se um agente foi selecionado, o Admin vê o PAINEL DO USUÁRIO
@@ -819,6 +1535,8 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
             st.warning(f"Não há dados consolidados para o agente {selected_agent} no mês de {selected_month}.")
         else:
             display_kpi(df_agent_current_month)
+            display_time_percentiles(selected_month, selected_agent, df_period=df_filtered)
+            display_goal_matrix(selected_month, selected_agent, df_period=df_filtered)
             st.subheader("📋 Tabela de Detalhe Mensal")
             df_display = apply_formatting(df_agent_current_month)
             df_display.insert(0, 'Mês', selected_month.capitalize()) 
@@ -838,212 +1556,170 @@ def display_admin_dashboard(df_monthly_aggregate): # df (passado do main) é o M
     else:
         # 2. Se "Todos os Agentes", mostra o painel de Admin (Ranking, etc.)
         
-        # Criação das abas
-        tab1, tab2, tab3 = st.tabs(["Visão Geral (Período Selecionado)", "Histórico Geral (Todos os Meses)", "Detalhe Diário (Período Selecionado)"])
+        # Seletor de visão: ao contrário de st.tabs (que executa o corpo de TODAS as abas
+        # a cada rerun), apenas a visão ativa é calculada. As demais são recalculadas
+        # sob demanda e reaproveitam o cache dos loaders quando revisitadas.
+        admin_view = st.radio(
+            "Visão:",
+            ADMIN_VIEWS,
+            horizontal=True,
+            key="admin_view",
+            label_visibility="collapsed"
+        )
 
-        with tab1:
-            st.subheader("📈 Métricas Agregadas (Período Selecionado)")
-            display_kpi(df_filtered) # Usa o DF filtrado (diário ou mensal)
-            
-            # Rankings (Sempre visíveis, não filtrados pelo calendário)
-            st.subheader("🏆 Ranking Top 3")
-            st.info("Os rankings abaixo são baseados nos arquivos consolidados (semanais e mensal) e **não** são afetados pelo filtro de calendário.")
-            
-            col_rank1, col_rank2, col_rank3 = st.columns(3)
-            
-            # --- RANKING 1: SEMANAL ATUAL ---
-            with col_rank1:
-                st.markdown("##### 🥇 Semana Atual")
-                df_ranking_atual = load_ranking_data("ranking_semanal_atual.csv")
-                
-                if df_ranking_atual.empty:
-                    st.warning("Arquivo 'ranking_semanal_atual.csv' não encontrado.")
-                elif 'Agente' not in df_ranking_atual.columns:
-                     st.error("Ranking Atual: Coluna 'Agente' não encontrada.")
-                else:
-                    agg_cols = [col for col in ['QTD Atendimento', 'Satisfacao', 'FCR', 'TMIA'] if col in df_ranking_atual.columns]
-                    agg_dict = {col: ('sum' if col.startswith('QTD') else 'mean') for col in agg_cols}
-                    df_compare_atual = df_ranking_atual.groupby('Agente').agg(agg_dict).reset_index()
-
-                    # FCR
-                    if 'FCR' in df_compare_atual.columns and 'QTD Atendimento' in df_compare_atual.columns:
-                        df_fcr_filtered = df_compare_atual[(df_compare_atual['FCR'] > 0.0) & (df_compare_atual['FCR'] < 1.0)]
-                        top_fcr = df_fcr_filtered.sort_values(by=['FCR', 'QTD Atendimento'], ascending=[False, False]).head(3) 
-                        top_fcr = top_fcr[['Agente', 'FCR']] 
-                        top_fcr['FCR'] = (top_fcr['FCR'] * 100).map('{:.2f}%'.format) 
-                        st.dataframe(top_fcr, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'FCR' não disponível.")
-                    # Satisfacao
-                    if 'Satisfacao' in df_compare_atual.columns and 'QTD Atendimento' in df_compare_atual.columns:
-                        df_satisfacao_filtered = df_compare_atual[(df_compare_atual['Satisfacao'] > 0.0) & (df_compare_atual['Satisfacao'] < 5.0)]
-                        top_satisfacao = df_satisfacao_filtered.sort_values(by=['Satisfacao', 'QTD Atendimento'], ascending=[False, False]).head(3)
-                        top_satisfacao = top_satisfacao[['Agente', 'Satisfacao']]
-                        top_satisfacao['Satisfacao'] = (top_satisfacao['Satisfacao'] / 5.0 * 100).map('{:.2f}%'.format)
-                        st.dataframe(top_satisfacao, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'Satisfacao' não disponível.")
-                    # TMIA
-                    if 'TMIA' in df_compare_atual.columns and 'QTD Atendimento' in df_compare_atual.columns:
-                        df_tmia_filtered = df_compare_atual[(df_compare_atual['TMIA'] > 0.0)]
-                        top_tmia = df_tmia_filtered.sort_values(by=['TMIA', 'QTD Atendimento'], ascending=[True, False]).head(3)
-                        top_tmia = top_tmia[['Agente', 'TMIA']]
-                        top_tmia['TMIA'] = top_tmia['TMIA'].apply(format_time)
-                        st.dataframe(top_tmia, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'TMIA' não disponível.")
-
-            # --- RANKING 2: SEMANAL ANTERIOR ---
-            with col_rank2:
-                st.markdown("##### 🥈 Semana Anterior")
-                df_ranking_anterior = load_ranking_data("ranking_semanal_anterior.csv")
-                
-                if df_ranking_anterior.empty:
-                    st.warning("Arquivo 'ranking_semanal_anterior.csv' não encontrado.")
-                elif 'Agente' not in df_ranking_anterior.columns:
-                     st.error("Ranking Anterior: Coluna 'Agente' não encontrada.")
-                else:
-                    agg_cols_ant = [col for col in ['QTD Atendimento', 'Satisfacao', 'FCR', 'TMIA'] if col in df_ranking_anterior.columns]
-                    agg_dict_ant = {col: ('sum' if col.startswith('QTD') else 'mean') for col in agg_cols_ant}
-                    df_compare_anterior = df_ranking_anterior.groupby('Agente').agg(agg_dict_ant).reset_index()
-
-                    # FCR
-                    if 'FCR' in df_compare_anterior.columns and 'QTD Atendimento' in df_compare_anterior.columns:
-                        df_fcr_filtered_ant = df_compare_anterior[(df_compare_anterior['FCR'] > 0.0) & (df_compare_anterior['FCR'] < 1.0)]
-                        top_fcr_ant = df_fcr_filtered_ant.sort_values(by=['FCR', 'QTD Atendimento'], ascending=[False, False]).head(3) 
-                        top_fcr_ant = top_fcr_ant[['Agente', 'FCR']] 
-                        top_fcr_ant['FCR'] = (top_fcr_ant['FCR'] * 100).map('{:.2f}%'.format) 
-                        st.dataframe(top_fcr_ant, use_container_width=True, hide_index=True)
-                    # Satisfacao
-                    if 'Satisfacao' in df_compare_anterior.columns and 'QTD Atendimento' in df_compare_anterior.columns:
-                        df_satisfacao_filtered_ant = df_compare_anterior[(df_compare_anterior['Satisfacao'] > 0.0) & (df_compare_anterior['Satisfacao'] < 5.0)]
-                        top_satisfacao_ant = df_satisfacao_filtered_ant.sort_values(by=['Satisfacao', 'QTD Atendimento'], ascending=[False, False]).head(3)
-                        top_satisfacao_ant = top_satisfacao_ant[['Agente', 'Satisfacao']]
-                        top_satisfacao_ant['Satisfacao'] = (top_satisfacao_ant['Satisfacao'] / 5.0 * 100).map('{:.2f}%'.format)
-                        st.dataframe(top_satisfacao_ant, use_container_width=True, hide_index=True)
-                    # TMIA
-                    if 'TMIA' in df_compare_anterior.columns and 'QTD Atendimento' in df_compare_anterior.columns:
-                        df_tmia_filtered_ant = df_compare_anterior[(df_compare_anterior['TMIA'] > 0.0)]
-                        top_tmia_ant = df_tmia_filtered_ant.sort_values(by=['TMIA', 'QTD Atendimento'], ascending=[True, False]).head(3)
-                        top_tmia_ant = top_tmia_ant[['Agente', 'TMIA']]
-                        top_tmia_ant['TMIA'] = top_tmia_ant['TMIA'].apply(format_time)
-                        st.dataframe(top_tmia_ant, use_container_width=True, hide_index=True)
-
-            # --- RANKING 3: MÊS ATUAL (CONSOLIDADO) ---
-            with col_rank3:
-                st.markdown(f"##### 🥉 Consolidado do Mês ({selected_month})")
-                
-                # Usa o df_monthly_aggregate (o CSV do mês inteiro)
-                if df_monthly_aggregate.empty:
-                    st.warning("Arquivo consolidado do mês não encontrado.")
-                elif 'Agente' not in df_monthly_aggregate.columns:
-                     st.error("Ranking Mensal: Coluna 'Agente' não encontrada.")
-                else:
-                    # Não precisa agregar, pois df_monthly_aggregate já é agregado
-                    df_compare_monthly = df_monthly_aggregate.copy() 
-
-                    # FCR
-                    if 'FCR' in df_compare_monthly.columns and 'QTD Atendimento' in df_compare_monthly.columns:
-                        df_fcr_filtered_cal = df_compare_monthly[(df_compare_monthly['FCR'] > 0.0) & (df_compare_monthly['FCR'] < 1.0)]
-                        top_fcr_cal = df_fcr_filtered_cal.sort_values(by=['FCR', 'QTD Atendimento'], ascending=[False, False]).head(3) 
-                        top_fcr_cal = top_fcr_cal[['Agente', 'FCR']] 
-                        top_fcr_cal['FCR'] = (top_fcr_cal['FCR'] * 100).map('{:.2f}%'.format) 
-                        st.dataframe(top_fcr_cal, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'FCR' não disponível.")
-                    # Satisfacao
-                    if 'Satisfacao' in df_compare_monthly.columns and 'QTD Atendimento' in df_compare_monthly.columns:
-                        df_satisfacao_filtered_cal = df_compare_monthly[(df_compare_monthly['Satisfacao'] > 0.0) & (df_compare_monthly['Satisfacao'] < 5.0)]
-                        top_satisfacao_cal = df_satisfacao_filtered_cal.sort_values(by=['Satisfacao', 'QTD Atendimento'], ascending=[False, False]).head(3)
-                        top_satisfacao_cal = top_satisfacao_cal[['Agente', 'Satisfacao']]
-                        top_satisfacao_cal['Satisfacao'] = (top_satisfacao_cal['Satisfacao'] / 5.0 * 100).map('{:.2f}%'.format)
-                        st.dataframe(top_satisfacao_cal, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'Satisfacao' não disponível.")
-                    # TMIA
-                    if 'TMIA' in df_compare_monthly.columns and 'QTD Atendimento' in df_compare_monthly.columns:
-                        df_tmia_filtered_cal = df_compare_monthly[(df_compare_monthly['TMIA'] > 0.0)]
-                        top_tmia_cal = df_tmia_filtered_cal.sort_values(by=['TMIA', 'QTD Atendimento'], ascending=[True, False]).head(3)
-                        top_tmia_cal = top_tmia_cal[['Agente', 'TMIA']]
-                        top_tmia_cal['TMIA'] = top_tmia_cal['TMIA'].apply(format_time)
-                        st.dataframe(top_tmia_cal, use_container_width=True, hide_index=True)
-                    else: st.info("Métrica 'TMIA' não disponível.")
+        if admin_view == ADMIN_VIEWS[0]:
+            display_admin_overview(df_filtered, df_monthly_aggregate, selected_month)
+        elif admin_view == ADMIN_VIEWS[1]:
+            # Chama a função de histórico SEM nome de agente (visão admin/geral)
+            display_monthly_history(agente_name=None)
+        elif admin_view == ADMIN_VIEWS[2]:
+            display_admin_daily_detail(df_filtered, is_date_available, selected_month)
+        elif admin_view == ADMIN_VIEWS[3]:
+            display_period_comparison()
+        else:
+            display_hierarchy_drilldown(selected_month)
 
-            st.markdown("---")
-            
-            # Gráficos de Comparação (Baseados no FILTRO DE CALENDÁRIO)
-            st.subheader("⚖️ Comparação de Agentes (Período Selecionado)")
-            
-            agg_cols = [col for col in ['QTD Atendimento', 'Satisfacao', 'NPS', 'FCR', 'TMA', 'TME', 'TMIA'] if col in df_filtered.columns]
 
-            if 'Agente' in df_filtered.columns and agg_cols:
-                agg_dict_cal = {col: ('sum' if col.startswith('QTD') else 'mean') 
-                                for col in agg_cols if col in df_filtered.columns}
-                
-                if agg_dict_cal:
-                    df_compare_calendario = df_filtered.groupby('Agente').agg(agg_dict_cal).reset_index()
-
-                    if 'Satisfacao' in df_compare_calendario.columns:
-                        fig_sat_agent = px.bar(df_compare_calendario.sort_values(by='Satisfacao', ascending=False), x='Agente', y='Satisfacao', title='Média de Satisfação por Agente', color='Satisfacao', color_continuous_scale=px.colors.sequential.Plotly3)
-                        st.plotly_chart(fig_sat_agent, use_container_width=True)
-                    if 'TMA' in df_compare_calendario.columns:
-                        fig_tma_agent = px.bar(df_compare_calendario.sort_values(by='TMA', ascending=False), x='Agente', y='TMA', title='TMA (Tempo Médio de Atendimento) por Agente (em minutos)', color='TMA', color_continuous_scale=px.colors.sequential.Reds)
-                        st.plotly_chart(fig_tma_agent, use_container_width=True)
-                    
-                    # Tabela Consolidada de Agentes (Período Selecionado)
-                    st.markdown("---")
-                    st.subheader("📋 Tabela Consolidada de Agentes (Período Selecionado)")
-                    
-                    df_compare_sorted = df_compare_calendario.sort_values(by=['Satisfacao', 'QTD Atendimento'], ascending=[False, False])
-                    df_display_admin_agg = apply_formatting(df_compare_sorted)
-                    st.dataframe(df_display_admin_agg, use_container_width=True, hide_index=True)
-                
-                else: 
-                    st.warning("Não há colunas de métricas suficientes no período selecionado para comparar agentes.")
-            else: 
-                st.warning("Não há dados de 'Agente' no período selecionado.")
+def display_period_comparison():
+    """Comparação de dois períodos quaisquer (semana, mês ou intervalo): variações e movimentos no ranking."""
+    st.header("🔀 Comparação de Períodos")
 
-        with tab2:
-            # Chama a função de histórico SEM nome de agente (visão admin/geral)
-            display_monthly_history(agente_name=None)
-            
-        with tab3:
-            # Chama a função de detalhe diário (que já usa df_filtered)
-            st.header(f"📅 Detalhe Dia a Dia ({selected_month.capitalize()})")
-            
-            if not is_date_available:
-                st.info("Detalhe diário não disponível (nenhuma subpasta encontrada).")
-                # Se não houver dados diários, exibe o consolidado mensal
-                df_display = apply_formatting(df_filtered)
-                st.dataframe(df_display, use_container_width=True)
-            else:
-                # Agrupamento para métricas diárias (Médias por Data e Agente)
-                agg_dict_full = {
-                    'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean',
-                    'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum',
-                    'DaySort': 'first', 'Agente': 'first', 'Data': 'first'
-                }
-                
-                agg_cols_full = [col for col in agg_dict_full.keys() if col in df_filtered.columns]
-                
-                df_daily_agg = df_filtered.groupby(['DaySort', 'Dia', 'Agente'], as_index=False).agg({
-                    col: agg_dict_full[col] for col in agg_cols_full
-                }).sort_values(by='DaySort')
-
-                st.subheader("Gráficos de Tendência Diária (Todos Agentes)")
-                col1, col2 = st.columns(2)
-                if 'Satisfacao' in df_daily_agg.columns:
-                    with col1:
-                        fig_sat = px.line(df_daily_agg, x='Dia', y='Satisfacao', title='Satisfação Diária (0-5)', markers=True, color='Agente')
-                        fig_sat.update_yaxes(range=[0, 5])
-                        st.plotly_chart(fig_sat, use_container_width=True)
-                if 'FCR' in df_daily_agg.columns:
-                     with col2:
-                        fig_fcr = px.line(df_daily_agg, x='Dia', y='FCR', title='FCR Diário (0-1)', markers=True, color='Agente')
-                        fig_fcr.update_yaxes(range=[0, 1], tickformat=".0%")
-                        st.plotly_chart(fig_fcr, use_container_width=True)
-                
-                st.markdown("---")
-                st.subheader("Tabela de Detalhe Diário (Todos Agentes)")
-                df_daily_agg = df_daily_agg.drop(columns=['DaySort', 'Data']) 
-                df_display = apply_formatting(df_daily_agg)
-                cols = ['Dia'] + [col for col in df_display.columns if col != 'Dia']
-                st.dataframe(df_display[cols], use_container_width=True)
+    catalog = get_catalog()
+    date_keys = [date_key(year, MESES_ORDER.index(month) + 1, day) for year, month, day, _ in catalog.iter_day_files()]
+    if not date_keys:
+        st.info("Não há dados diários disponíveis para comparar períodos.")
+        return
+    date_dim = load_date_dimension(tuple(catalog.years()))
+
+    col_grain, col_metric = st.columns(2)
+    grain = col_grain.radio("Comparar:", COMPARISON_GRAINS, horizontal=True, key="comparison_grain")
+    metric = col_metric.selectbox("Ranking por:", list(COMPARISON_AGG), index=list(COMPARISON_AGG).index('Satisfacao'), key="comparison_metric")
+
+    col_base, col_current = st.columns(2)
+    if grain == "Intervalo personalizado":
+        min_date = date_dim.loc[min(date_keys), 'Data'].date()
+        max_date = date_dim.loc[max(date_keys), 'Data'].date()
+        ranges = []
+        for col, name, key in ((col_base, "Período base:", "comparison_base_range"), (col_current, "Período atual:", "comparison_current_range")):
+            selected = col.date_input(name, value=(min_date, max_date), min_value=min_date, max_value=max_date, format="DD/MM/YYYY", key=key)
+            ranges.append(selected if isinstance(selected, tuple) and len(selected) == 2 else (min_date, max_date))
+        period_base, period_current = (range_period(start, end) for start, end in ranges)
+    else:
+        periods = calendar_periods(date_dim, date_keys, grain)
+        if len(periods) < 2:
+            st.info(f"É preciso ter dados diários de pelo menos dois períodos ({grain}) para comparar.")
+            return
+        labels = [period.label for period in periods]
+        # Padrão: penúltimo (base) vs último (atual), como "semana anterior x semana atual"
+        base_label = col_base.selectbox("Período base:", labels, index=len(labels) - 2, key=f"comparison_base_{grain}")
+        current_label = col_current.selectbox("Período atual:", labels, index=len(labels) - 1, key=f"comparison_current_{grain}")
+        period_base, period_current = periods[labels.index(base_label)], periods[labels.index(current_label)]
+
+    df_comparison = load_period_comparison(period_base, period_current, metric, data_version())
+    if df_comparison.empty:
+        st.warning("Não há dados de agentes nos períodos selecionados.")
+        return
+
+    st.caption(f"Base: {period_base.label} · Atual: {period_current.label} · "
+               f"{'menor' if metric in LOWER_IS_BETTER else 'maior'} {metric} = melhor posição")
+    value_cols = [f"{metric} (Base)", f"{metric} (Atual)", f"Δ {metric}"]
+    qtd_cols = [col for col in ["QTD Atendimento (Base)", "QTD Atendimento (Atual)"] if col in df_comparison.columns and metric != 'QTD Atendimento']
+    df_display = df_comparison[['Agente', 'Posição (Atual)', 'Posição (Base)', 'Movimento'] + value_cols + qtd_cols]
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
+
+
+def format_cube_period(df):
+    """Troca as chaves de tempo do cubo (DateKey/WeekKey) por rótulos legíveis."""
+    df = df.copy()
+    if 'DateKey' in df.columns:
+        df.insert(0, 'Dia', (df['DateKey'] % 100).map('{:02d}'.format) + '/' + (df['DateKey'] // 100 % 100).map('{:02d}'.format))
+        df = df.drop(columns=['DateKey'])
+    if 'WeekKey' in df.columns:
+        df.insert(0, 'Semana', 'Semana ' + (df['WeekKey'] % 100).map('{:02d}'.format))
+        df = df.drop(columns=['WeekKey'])
+    return df
+
+def display_hierarchy_drilldown(selected_month):
+    """Drill-down site > equipe > agente > dia, servido pelas tabelas prontas do cubo do mês."""
+    st.header(f"🏢 Equipes ({selected_month})")
+    cube = load_month_cube(selected_month, data_version())
+    if not cube.grains or not cube.members('Site'):
+        st.info("Não há dados do mês para montar a visão por equipes.")
+        return
+    if load_hierarchy().empty:
+        st.info("Nenhuma hierarquia cadastrada: crie 'data/hierarquia.csv' (agente, equipe, supervisor, site) "
+                "ou preencha 'equipe', 'supervisor' e 'site' no cadastro de usuários.")
+
+    # Seletores em cascata: cada um lista apenas os membros do nível acima
+    selection = {}
+    for col, level in zip(st.columns(len(HIERARCHY_LEVELS)), HIERARCHY_LEVELS):
+        choice = col.selectbox(f"{level}:", ["Todos"] + cube.members(level, **selection), key=f"drill_{level}")
+        if choice == "Todos":
+            break
+        selection[level] = choice
+
+    grain = st.radio("Grão:", cube.grains, horizontal=True, key="drill_grain")
+    if len(selection) == len(HIERARCHY_LEVELS):
+        # Agente escolhido: último nível do drill-down, dia a dia
+        level, grain = 'Agente', ('Dia' if 'Dia' in cube.grains else grain)
+    else:
+        level = HIERARCHY_LEVELS[len(selection)]
+
+    df_view = cube.view(level, grain, **selection)
+    if df_view.empty:
+        st.info("Não há dados para a seleção atual.")
+        return
+    sort_cols = [col for col in ['DateKey', 'WeekKey'] if col in df_view.columns] or ['QTD Atendimento']
+    df_view = df_view.sort_values(sort_cols, ascending=sort_cols != ['QTD Atendimento'])
+    st.subheader(f"{level} · {grain}" + (f" ({' > '.join(selection.values())})" if selection else ""))
+    st.dataframe(apply_formatting(format_cube_period(df_view)), use_container_width=True, hide_index=True)
+
+
+# --- Modo TV (wallboard): somente leitura, servido a partir do snapshot compartilhado ---
+def format_ranking(df_top, metric):
+    """Formata a métrica do Top 3 para exibição (percentual ou MM:SS)."""
+    df_top = df_top.copy()
+    if metric == 'FCR':
+        df_top[metric] = (df_top[metric] * 100).map('{:.2f}%'.format)
+    elif metric == 'Satisfacao':
+        df_top[metric] = (df_top[metric] / 5.0 * 100).map('{:.2f}%'.format)
+    else:
+        df_top[metric] = df_top[metric].apply(format_time)
+    return df_top
+
+def display_wallboard(token):
+    """Painel de TV acessado por '?wallboard=<token>', sem login."""
+    if not is_valid_wallboard_token(token):
+        st.title("Dashboard de Desempenho de Agentes")
+        st.error("Link do painel de TV inválido ou desativado.")
+        return
+    display_wallboard_snapshot()
+
+# A cada WALLBOARD_REFRESH_SECONDS só este fragmento é reexecutado, e ele apenas lê o
+# snapshot já montado pelo publicador: nenhuma tela recalcula KPIs ou rankings.
+@st.fragment(run_every=WALLBOARD_REFRESH_SECONDS)
+def display_wallboard_snapshot():
+    """KPIs da equipe e Top 3 de cada ranking, a partir do último snapshot publicado."""
+    snapshot = get_wallboard_publisher().latest()
+
+    st.title(f"📺 Painel da Equipe ({snapshot.month or 'sem dados'})")
+    st.caption(f"Atualizado em {snapshot.generated_at:%d/%m/%Y %H:%M}")
+
+    if snapshot.kpis:
+        display_kpi_metrics(pd.DataFrame([snapshot.kpis]))
+    else:
+        st.info("Não há dados consolidados disponíveis.")
+
+    st.subheader("🏆 Ranking Top 3")
+    columns = st.columns(len(snapshot.rankings) or 1)
+    for col, (title, rankings) in zip(columns, snapshot.rankings.items()):
+        with col:
+            st.markdown(f"##### {title}")
+            if not rankings:
+                st.info("Ranking não disponível.")
+            for metric, df_top in rankings.items():
+                if not df_top.empty:
+                    st.dataframe(format_ranking(df_top, metric), use_container_width=True, hide_index=True)
 
 
 # --- Funções de Autenticação na UI (Inalterada) ---
@@ -1096,25 +1772,37 @@ def logout_button():
 # --- Lógica Principal da Aplicação ---
 def main():
     
+    # Modo TV: '?wallboard=<token>' mostra apenas o painel somente leitura, sem login
+    wallboard_token = st.query_params.get('wallboard')
+    if wallboard_token is not None:
+        display_wallboard(wallboard_token)
+        return
+
+    # Tela de login: nada de catálogo, artefatos ou CSVs antes da autenticação
+    if not st.session_state['authenticated']:
+        st.title("Dashboard de Desempenho de Agentes")
+        st.info("Entre com suas credenciais na barra lateral para acessar o sistema.")
+        st.markdown("---")
+        st.write("Atenção: O administrador inicial tem login: `admin` e senha: `12345`.")
+        login_form()
+        
+        # 🚨 --- ADIÇÃO DA ASSINATURA --- 🚨
+        st.sidebar.markdown("---")
+        st.sidebar.caption("Desenvolvido por Vinicios Oliveira")
+        # 🚨 --- FIM DA ADIÇÃO --- 🚨
+        return
+
     # --- Configuração do Filtro Mensal na Sidebar ---
     st.sidebar.markdown("---")
-    DATA_FOLDER = 'data'
+    catalog = pin_data_version() # Todo este rerun lê uma única versão dos dados
     
-    # 1. Busca pelos arquivos CSV disponíveis na pasta 'data'
-    available_files = []
-    if os.path.exists(DATA_FOLDER):
-        for filename in os.listdir(DATA_FOLDER):
-            if filename.endswith(".csv"):
-                month_name = filename.replace('.csv', '').capitalize()
-                if month_name.lower() in MESES: # Garante que só meses válidos entrem na lista
-                    available_files.append(month_name)
-        # Ordena os meses disponíveis
-        available_files.sort(key=lambda x: list(MESES.keys()).index(x.lower()) if x.lower() in MESES else 99)
+    # 1. Meses disponíveis na pasta 'data' (já validados e ordenados pelo catálogo)
+    available_files = catalog.months()
     
     # 2. Inicialização e Seleção do Mês
     if 'selected_month_name' not in st.session_state:
         # Define o último mês disponível como padrão, ou o primeiro se não houver último
-        st.session_state['selected_month_name'] = available_files[-1] if available_files else list(MESES.keys())[0].capitalize()
+        st.session_state['selected_month_name'] = available_files[-1] if available_files else month_label(datetime.date.today().year, MESES_ORDER[0])
 
     selected_month_name = st.session_state['selected_month_name']
     file_to_load = None
@@ -1126,80 +1814,71 @@ def main():
             index=available_files.index(selected_month_name) if selected_month_name in available_files else 0
         )
         st.session_state['selected_month_name'] = selected_month_key
-        file_to_load = MESES.get(selected_month_key.lower())
+        file_to_load = selected_month_key # Rótulo 'Novembro/2025', resolvido pelo catálogo
     else:
-        st.sidebar.warning(f"Crie a pasta '{DATA_FOLDER}/' e adicione os arquivos mensais (ex: janeiro.csv).")
+        st.sidebar.warning(f"Crie a pasta '{DATA_FOLDER}/' e adicione os arquivos mensais (ex: janeiro.csv ou 2025/janeiro.csv).")
     
-    # 3. Carrega o DataFrame (apenas o mês selecionado para a visão principal)
+    # 3. Carrega o DataFrame (apenas o mês selecionado para a visão principal).
     df = pd.DataFrame()
     if file_to_load:
-        df = load_and_preprocess_data(file_to_load)
+        df = load_and_preprocess_data(file_to_load, data_version())
     
     
-    if st.session_state['authenticated']:
-        change_password_form()
-        logout_button()
-        
-        # 🚨 --- ADIÇÃO DA ASSINATURA --- 🚨
-        st.sidebar.markdown("---")
-        st.sidebar.caption("Desenvolvido por Vinicios Oliveira")
-        # 🚨 --- FIM DA ADIÇÃO --- 🚨
+    change_password_form()
+    logout_button()
+    # Gráficos com muitos pontos ficam mais leves em WebGL (o modo automático decide pelo volume)
+    st.sidebar.selectbox("Renderização dos gráficos:", list(CHART_BACKENDS), key="chart_backend")
+    
+    # 🚨 --- ADIÇÃO DA ASSINATURA --- 🚨
+    st.sidebar.markdown("---")
+    st.sidebar.caption("Desenvolvido por Vinicios Oliveira")
+    # 🚨 --- FIM DA ADIÇÃO --- 🚨
 
-        if st.session_state.get('primeiro_acesso'):
-            st.title("Bem-vindo(a)! 🔑")
-            st.warning("É o seu primeiro acesso. Você deve alterar a senha no menu lateral para continuar.")
-            if st.sidebar.button("Prosseguir para Dashboard"):
-                st.session_state['primeiro_acesso'] = False 
-                st.rerun() 
-            return 
-            
-        # Verifica se há dados carregados para o mês selecionado
-        if df.empty and not os.path.exists('data'): 
-             st.warning(f"Não há dados disponíveis para o mês de **{st.session_state.get('selected_month_name', 'N/A')}**. Verifique o console para erros ou a estrutura de pastas.")
-             # Permite continuar para mostrar o histórico se houver
+    if st.session_state.get('primeiro_acesso'):
+        st.title("Bem-vindo(a)! 🔑")
+        st.warning("É o seu primeiro acesso. Você deve alterar a senha no menu lateral para continuar.")
+        if st.sidebar.button("Prosseguir para Dashboard"):
+            st.session_state['primeiro_acesso'] = False 
+            st.rerun() 
+        return 
         
-        agente_name = st.session_state.get('agente_name')
-        df_agent_filtered = df[df['Agente'] == agente_name].copy() if agente_name and 'Agente' in df.columns and not df.empty else pd.DataFrame()
-
-        if st.session_state['role'] == 'admin':
-            
-            admin_selection = st.sidebar.radio(
-                "Painel do Administrador", 
-                ["Dashboard Global", "Gerenciar Usuários"]
-            )
-            
-            if admin_selection == "Dashboard Global":
-                display_admin_dashboard(df) # Passa o DF MENSAL
-            elif admin_selection == "Gerenciar Usuários":
-                # Gerenciador de usuários precisa de todos os dados históricos para funcionar
-                df_full_history = load_all_history_data() 
-                if 'Agente' in df_full_history.columns:
-                    user_manager_interface(df_full_history) # Passa o DF completo
-                else:
-                    st.error("A coluna 'Agente' não foi encontrada. Não é possível gerenciar usuários a partir do CSV.")
-                
-        else: # Usuário Comum
-            # Verifica se há algum dado histórico para o agente antes de dar o aviso final
-            df_full_history_check = load_all_history_data()
-            df_agent_hist_check = df_full_history_check[df_full_history_check['Agente'] == agente_name].copy() if 'Agente' in df_full_history_check.columns else pd.DataFrame()
+    # Verifica se há dados carregados para o mês selecionado
+    if df.empty and not available_files: 
+         st.warning(f"Não há dados disponíveis para o mês de **{st.session_state.get('selected_month_name', 'N/A')}**. Verifique o console para erros ou a estrutura de pastas.")
+         # Permite continuar para mostrar o histórico se houver
+    
+    agente_name = st.session_state.get('agente_name')
+    df_agent_filtered = df[df['Agente'] == agente_name].copy() if agente_name and 'Agente' in df.columns and not df.empty else pd.DataFrame()
 
-            if not df_agent_filtered.empty or not df_agent_hist_check.empty :
-                 display_user_dashboard(df_agent_filtered) # Passa apenas os dados do mês selecionado
+    if st.session_state['role'] == 'admin':
+        
+        admin_selection = st.sidebar.radio(
+            "Painel do Administrador", 
+            ["Dashboard Global", "Gerenciar Usuários", "Enviar Dados"]
+        )
+        
+        if admin_selection == "Dashboard Global":
+            display_admin_dashboard(df) # Passa o DF MENSAL
+        elif admin_selection == "Enviar Dados":
+            display_upload_page()
+        elif admin_selection == "Gerenciar Usuários":
+            # Gerenciador de usuários precisa de todos os dados históricos para funcionar
+            df_full_history = load_all_history_data(data_version()) 
+            if 'Agente' in df_full_history.columns:
+                user_manager_interface(df_full_history) # Passa o DF completo
             else:
-                 st.warning(f"Não foram encontrados dados de desempenho para o agente: **{agente_name}** em nenhum mês.")
+                st.error("A coluna 'Agente' não foi encontrada. Não é possível gerenciar usuários a partir do CSV.")
+            
+    else: # Usuário Comum
+        # Verifica se há algum dado histórico para o agente antes de dar o aviso final
+        df_full_history_check = load_all_history_data(data_version())
+        df_agent_hist_check = df_full_history_check[df_full_history_check['Agente'] == agente_name].copy() if 'Agente' in df_full_history_check.columns else pd.DataFrame()
 
+        if not df_agent_filtered.empty or not df_agent_hist_check.empty :
+             display_user_dashboard(df_agent_filtered) # Passa apenas os dados do mês selecionado
+        else:
+             st.warning(f"Não foram encontrados dados de desempenho para o agente: **{agente_name}** em nenhum mês.")
 
-    else:
-        st.title("Dashboard de Desempenho de Agentes")
-        st.info("Entre com suas credenciais na barra lateral para acessar o sistema.")
-        st.markdown("---")
-        st.write("Atenção: O administrador inicial tem login: `admin` e senha: `12345`.")
-        login_form()
-        
-        # 🚨 --- ADIÇÃO DA ASSINATURA --- 🚨
-        st.sidebar.markdown("---")
-        st.sidebar.caption("Desenvolvido por Vinicios Oliveira")
-        # 🚨 --- FIM DA ADIÇÃO --- 🚨
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,7 @@
 import json
 import streamlit as st
 import pandas as pd
+from streamlit.errors import StreamlitAPIException
 # A linha 'import pandas.api.types' não é necessária aqui.
 
 # Nome do arquivo JSON de usuários
@@ -114,7 +115,19 @@ def delete_user_db(username_to_delete, current_admin_username):
         return False, f"Usuário '{username_to_delete}' não encontrado."
 
 
+def rerun_fragment():
+    """Reexecuta apenas o fragmento atual (ou o app inteiro, se chamado durante uma execução completa)."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        # scope="fragment" só é aceito durante reruns do próprio fragmento
+        st.rerun()
+
+
 # 🚨 --- FUNÇÃO ATUALIZADA --- 🚨
+# Fragmento: enviar um formulário ou clicar em um botão daqui reexecuta apenas o
+# gerenciador de usuários (via rerun_fragment), e não o dashboard inteiro.
+@st.fragment
 def user_manager_interface(df):
     """Interface do Streamlit para o gerenciamento de usuários (apenas Admin)."""
     st.subheader("⚙️ Gerenciamento de Usuários") 
@@ -149,7 +162,7 @@ def user_manager_interface(df):
                 add_user_from_csv(login_sugerido, agente)
 
             st.success("Novos usuários adicionados com sucesso! Senha padrão: **12345**.")
-            st.rerun() # Atualiza a interface
+            rerun_fragment() # Atualiza a interface
         else:
             st.success("Todos os agentes no CSV já possuem login de usuário.")
     else:
@@ -174,7 +187,7 @@ def user_manager_interface(df):
             success, message = add_manual_user(new_login, new_agente_name, new_role)
             if success:
                 st.success(message)
-                st.rerun() # Recarrega para atualizar la tabela
+                rerun_fragment() # Recarrega para atualizar la tabela
             else:
                 st.error(message)
 
@@ -223,7 +236,7 @@ def user_manager_interface(df):
                 users[user_to_reset]['primeiro_acesso'] = True # Força a mudança
                 save_users(users)
                 st.success(f"Senha do usuário **{user_to_reset}** redefinida com sucesso. O usuário será forçado a alterar esta senha no próximo login.")
-                st.rerun()
+                rerun_fragment()
             else:
                 st.error("Erro ao redefinir a senha.")
         else:
@@ -253,6 +266,6 @@ def user_manager_interface(df):
                 success, message = delete_user_db(user_to_delete, current_admin)
                 if success:
                     st.success(message)
-                    st.rerun()
+                    rerun_fragment()
                 else:
                     st.error(message)
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""Relatório de tempo de import e de tempo até o formulário de login do app.py.
+
+Uso (na raiz do projeto):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --top 15 --budget-ms 1500 > bench_output.txt
+
+Executa `python -X importtime -c "import app"` num processo novo (como um pod recém
+criado), lista os módulos mais caros e verifica que os módulos pesados de gráfico e
+exportação NÃO são importados antes de algum gráfico ser renderizado. Em seguida,
+mede o tempo da primeira execução do app (tela de login) com o AppTest do Streamlit.
+Sai com código 1 se um módulo pesado vazar para o import ou se o orçamento estourar.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que só devem ser importados quando um gráfico/exportação é usado
+# (o plotly base e o pyarrow já são importados pelo próprio Streamlit/pandas)
+LAZY_MODULES = ('plotly.express', 'pyarrow.parquet', 'openpyxl')
+
+
+def _is_lazy(name):
+    return any(name == module or name.startswith(module + '.') for module in LAZY_MODULES)
+
+
+def run_importtime(module='app'):
+    """Importa o módulo num processo novo com -X importtime e retorna [(self_us, cumulative_us, nome)]."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def time_login_form():
+    """Tempo (s) da primeira execução do app.py, que para um visitante é a tela de login."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    app_test = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=120)
+    app_test.run()
+    elapsed = time.perf_counter() - start
+    if app_test.exception:
+        raise RuntimeError(app_test.exception[0].value)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10, help='quantos módulos mostrar')
+    parser.add_argument('--budget-ms', type=float, default=None, help='orçamento do import do app (ms)')
+    parser.add_argument('--skip-login', action='store_true', help='não mede a tela de login')
+    args = parser.parse_args()
+
+    rows = run_importtime('app')
+    if not rows:
+        print("Falha ao importar app.py (rode na raiz do projeto, com as dependências instaladas).")
+        return 1
+
+    total_ms = sum(self_us for self_us, _, _ in rows) / 1000
+    print(f"Import do app.py: {total_ms:.0f} ms ({len(rows)} módulos)")
+
+    print(f"\nTop {args.top} imports feitos pelo app.py (tempo acumulado):")
+    # O -X importtime indenta o nome 2 espaços por nível (após 1 espaço separador):
+    # '   pandas' (3 espaços) foi importado direto pelo app
+    direct = [row for row in rows if len(row[2]) - len(row[2].lstrip()) == 3]
+    for _, cumulative_us, name in sorted(direct, reverse=True, key=lambda row: row[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name.strip()}")
+
+    leaked = sorted({name.strip() for _, _, name in rows if _is_lazy(name.strip())})
+    status = 0
+    if leaked:
+        print(f"\nERRO: módulos que deveriam ser importados sob demanda: {', '.join(leaked)}")
+        status = 1
+    else:
+        print(f"\nOK: {', '.join(LAZY_MODULES)} não são importados no carregamento.")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"ERRO: import acima do orçamento ({total_ms:.0f} ms > {args.budget_ms:.0f} ms)")
+        status = 1
+
+    if not args.skip_login:
+        print(f"\nTempo até o formulário de login (primeira execução): {time_login_form() * 1000:.0f} ms")
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import collections
+import contextlib
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Orçamento de memória (MB) dos resultados em cache do processo; configurável por variável de ambiente
+CACHE_BUDGET_ENV = 'DASHBOARD_CACHE_MB'
+DEFAULT_CACHE_BUDGET_MB = 512
+
+
+def cache_budget_bytes():
+    """Orçamento em bytes (DASHBOARD_CACHE_MB ou o padrão)."""
+    try:
+        return int(float(os.environ.get(CACHE_BUDGET_ENV, DEFAULT_CACHE_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_CACHE_BUDGET_MB * 1024 * 1024
+
+
+def estimate_size(value, _seen=None):
+    """Tamanho aproximado (bytes) de um resultado: DataFrames e arrays pelo uso real de memória."""
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True).sum()) if not isinstance(value, pd.Index) else int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item, _seen) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return sys.getsizeof(value) + estimate_size(vars(value), _seen)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Converte um argumento numa chave hashable (DataFrames pelo hash do conteúdo).
+
+    O digest é feito sobre os hashes das linhas em sequência: a mesma tabela com as
+    linhas em outra ordem é outra chave (agregações como 'first' dependem da ordem).
+    """
+    if isinstance(value, pd.DataFrame):
+        digest = hashlib.sha1(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()).hexdigest()
+        return ('DataFrame', tuple(value.columns), tuple(str(dtype) for dtype in value.dtypes), value.shape, digest)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class CacheManager:
+    """Cache único do processo para os loaders, com orçamento de bytes, LRU por tamanho e TTL.
+
+    Cada resultado guarda o tamanho estimado; ao passar do orçamento, os menos usados
+    recentemente (de qualquer loader) saem primeiro. Cada loader tem seu TTL e,
+    opcionalmente, um limite de entradas. Os contadores (acertos, faltas, despejos,
+    expirações) ficam por loader para o painel do Admin.
+
+    Avisos de um loader (notify) são guardados junto com o resultado e repassados a
+    `emit(nível, mensagem)` a cada chamada, acerto ou falta: toda sessão que usa o
+    resultado vê os avisos, não só a que o calculou.
+
+    Loaders com o argumento `version_arg` (a versão dos dados) têm as entradas
+    agrupadas por versão: release_version() descarta só as de uma versão que nenhuma
+    sessão usa mais, sem tocar nas das versões ainda fixadas.
+    """
+
+    def __init__(self, budget_bytes=None, emit=None, version_arg='data_version'):
+        self.budget_bytes = cache_budget_bytes() if budget_bytes is None else budget_bytes
+        self.emit = emit or (lambda level, message: warnings.warn(message, stacklevel=3))
+        self.version_arg = version_arg
+        self._collecting = threading.local() # Pilha (por thread) dos avisos dos loaders em cálculo
+        self._lock = threading.RLock()
+        self._entries = collections.OrderedDict() # (loader, chave) -> (valor, bytes, expira_em, versão); o fim é o mais recente
+        self._by_version = collections.defaultdict(set) # versão dos dados -> chaves das entradas
+        self._released = collections.deque() # Versões liberadas, descartadas na próxima operação
+        self._bytes = 0
+        self._stats = collections.defaultdict(lambda: collections.Counter())
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get(self, loader, key):
+        """(True, valor) se a entrada existe e não expirou; (False, None) caso contrário."""
+        with self._lock:
+            self._drop_released()
+            item = self._entries.get((loader, key))
+            if item is not None and item[2] is not None and item[2] <= time.monotonic():
+                self._drop((loader, key))
+                self._stats[loader]['expiracoes'] += 1
+                item = None
+            if item is None:
+                self._stats[loader]['faltas'] += 1
+                return False, None
+            self._entries.move_to_end((loader, key))
+            self._stats[loader]['acertos'] += 1
+            return True, item[0]
+
+    def put(self, loader, key, value, ttl=None, max_entries=None, version=None):
+        """Guarda um resultado e despeja os menos usados até caber no orçamento (e no limite do loader)."""
+        size = estimate_size(value)
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._drop_released()
+            self._drop((loader, key))
+            if size > self.budget_bytes:
+                self._stats[loader]['grandes_demais'] += 1
+                return # Não cabe nem sozinho: devolve o valor sem guardar
+            self._entries[(loader, key)] = (value, size, expires_at, version)
+            self._bytes += size
+            if version is not None:
+                self._by_version[version].add((loader, key))
+            if max_entries:
+                own = [entry_key for entry_key in self._entries if entry_key[0] == loader]
+                for entry_key in own[:-max_entries]:
+                    self._evict(entry_key)
+            while self._bytes > self.budget_bytes and self._entries:
+                self._evict(next(iter(self._entries)))
+
+    def _drop(self, entry_key):
+        item = self._entries.pop(entry_key, None)
+        if item is not None:
+            self._bytes -= item[1]
+            keys = self._by_version.get(item[3])
+            if keys is not None:
+                keys.discard(entry_key)
+                if not keys:
+                    del self._by_version[item[3]]
+
+    def _evict(self, entry_key):
+        self._drop(entry_key)
+        self._stats[entry_key[0]]['despejos'] += 1
+
+    def release_version(self, version):
+        """Marca uma versão dos dados como fora de uso (ex.: weakref.finalize do snapshot).
+
+        Só enfileira: pode ser chamada pelo coletor de lixo no meio de outra operação.
+        """
+        self._released.append(version)
+
+    def _drop_released(self):
+        while self._released:
+            version = self._released.popleft()
+            for entry_key in list(self._by_version.get(version, ())):
+                self._evict(entry_key)
+
+    def clear(self, loader=None):
+        """Esvazia o cache inteiro ou só as entradas de um loader (os contadores continuam)."""
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if loader is None or entry_key[0] == loader]:
+                self._drop(entry_key)
+
+    def notify(self, level, message):
+        """Aviso de um loader ('warning', 'error' ou 'info'). Dentro de um loader em cálculo, fica
+        guardado com o resultado (e repetido a cada uso); fora dele, é emitido na hora.
+        """
+        stack = getattr(self._collecting, 'stack', None)
+        if stack:
+            stack[-1].append((level, message))
+        else:
+            self.emit(level, message)
+
+    def memoize(self, ttl=None, max_entries=None, copy=False, on_miss=None):
+        """Decorador: guarda o resultado por argumentos. `copy` devolve uma cópia dos DataFrames
+        (para quem altera o resultado); `on_miss` é um context manager aberto durante o cálculo
+        (ex.: lambda: st.spinner(...)). A função ganha .clear() como os caches do Streamlit.
+        """
+        def decorator(func):
+            loader = func.__qualname__
+            signature = inspect.signature(func)
+            versioned = self.version_arg in signature.parameters
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = _freeze((args, kwargs))
+                found, item = self.get(loader, key)
+                if not found:
+                    stack = self._collecting.__dict__.setdefault('stack', [])
+                    stack.append([])
+                    try:
+                        with (on_miss() if on_miss else contextlib.nullcontext()):
+                            value = func(*args, **kwargs)
+                    finally:
+                        notices = tuple(stack.pop())
+                    item = (value, notices)
+                    version = signature.bind(*args, **kwargs).arguments.get(self.version_arg) if versioned else None
+                    self.put(loader, key, item, ttl, max_entries, version)
+                value, notices = item
+                # Fora do cálculo: cada chamada repete os avisos (ou os repassa ao loader que a chamou)
+                for level, message in notices:
+                    self.notify(level, message)
+                return value.copy() if copy and isinstance(value, pd.DataFrame) else value
+
+            wrapper.clear = lambda: self.clear(loader)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Uma linha por loader: entradas, MB, acertos, faltas, taxa de acerto, despejos e expirações."""
+        with self._lock:
+            self._drop_released()
+            usage = collections.defaultdict(lambda: [0, 0])
+            for (loader, _), (_, size, _, _) in self._entries.items():
+                usage[loader][0] += 1
+                usage[loader][1] += size
+            rows = []
+            for loader in sorted(set(usage) | set(self._stats)):
+                counts = self._stats[loader]
+                lookups = counts['acertos'] + counts['faltas']
+                rows.append({
+                    'Loader': loader, 'Entradas': usage[loader][0], 'MB': usage[loader][1] / (1024 * 1024),
+                    'Acertos': counts['acertos'], 'Faltas': counts['faltas'],
+                    'Taxa de Acerto': counts['acertos'] / lookups if lookups else np.nan,
+                    'Despejos': counts['despejos'], 'Expirações': counts['expiracoes'],
+                })
+        return pd.DataFrame(rows, columns=['Loader', 'Entradas', 'MB', 'Acertos', 'Faltas', 'Taxa de Acerto', 'Despejos', 'Expirações'])
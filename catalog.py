@@ -0,0 +1,396 @@
+import calendar
+import datetime
+import hashlib
+import os
+import threading
+import time
+import types
+import weakref
+from collections import namedtuple
+
+# Pasta raiz dos dados e ordem dos meses (usada para validar e ordenar os arquivos)
+DATA_FOLDER = 'data'
+RANKING_FOLDER = 'semana'
+NOTAS_FOLDER = 'notas'
+HIERARCHY_FILE = 'hierarquia.csv' # Mapeamento agente -> equipe/supervisor/site (opcional)
+GOALS_FILE = 'metas.csv' # Metas por métrica (geral, por equipe ou por agente; opcional)
+# Artefatos gerados a partir dos dados (índices, caches em disco); fora de 'data/'
+CACHE_FOLDER = '.dashboard_cache'
+MESES_ORDER = ["janeiro", "fevereiro", "março", "abril", "maio", "junho",
+               "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+# Intervalo mínimo (segundos) entre duas verificações de mtime das pastas
+MIN_CHECK_INTERVAL = 5.0
+
+# Um arquivo indexado: caminho, tamanho (bytes) e mtime
+FileEntry = namedtuple('FileEntry', ['path', 'size', 'mtime'])
+
+
+def month_label(year, month):
+    """(2025, 'novembro') -> 'Novembro/2025' (rótulo exibido no seletor de mês)."""
+    return f"{month.capitalize()}/{year}"
+
+
+def parse_month_label(label):
+    """'Novembro/2025' -> (2025, 'novembro'). Sem ano ('Novembro'), usa o ano atual."""
+    month, _, year = label.partition('/')
+    year = int(year) if year.isdigit() else datetime.date.today().year
+    return year, month.strip().lower()
+
+
+def _file_entry(path):
+    """Cria um FileEntry a partir do stat do arquivo (ou None se ele sumiu)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return FileEntry(path, stat.st_size, stat.st_mtime)
+
+
+def file_hash(path):
+    """SHA-1 do conteúdo do arquivo (identifica o arquivo mesmo se só o mtime mudar)."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def infer_year(month, mtime):
+    """Ano de um mês do layout sem pasta de ano, pelo mtime do arquivo mais antigo do mês.
+
+    Os dados de um mês não são gravados antes de ele começar: um arquivo gravado num
+    mês do calendário anterior ao dos dados (ex.: dezembro gravado em janeiro) é do
+    ano anterior ao da gravação.
+    """
+    written = datetime.date.fromtimestamp(mtime)
+    return written.year if MESES_ORDER.index(month) + 1 <= written.month else written.year - 1
+
+
+def _dir_mtime(path):
+    """mtime de uma pasta ou arquivo (ou None se não existir)."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def is_valid_day(year, month, day):
+    """True se o dia existe no mês (month = 1-12); ex.: 31/02 ou 29/02 fora de ano bissexto não existem."""
+    return 1 <= day <= calendar.monthrange(year, month)[1]
+
+
+def _day_from_filename(filename):
+    """'01.11.csv' -> 1 (ou None se o nome não começar com o dia)."""
+    try:
+        return int(filename.split('.')[0])
+    except ValueError:
+        return None
+
+
+class DataSnapshot:
+    """Uma versão imutável do índice de 'data/' (a mesma interface de consulta do catálogo).
+
+    Cada reindexação que muda algum arquivo gera uma nova versão numerada; os meses
+    sem mudança compartilham as listas de arquivos com a versão anterior. Os arquivos
+    são identificados por (caminho, tamanho, mtime), e os artefatos da ingestão seguem
+    essa mesma chave, então uma versão antiga continua lendo os dados que indexou.
+    """
+
+    def __init__(self, root=DATA_FOLDER, version=0, months=None, days=None, notas=None,
+                 month_dirs=None, rankings=None, hierarchy=None, goals=None, invalid=None):
+        self.root = root
+        self.version = version # Número da versão (crescente no processo)
+        self._months = types.MappingProxyType(months or {})   # (2025, 'novembro') -> FileEntry do consolidado mensal
+        self._days = types.MappingProxyType(days or {})       # (2025, 'novembro') -> ((dia, FileEntry), ...) ordenado por dia
+        self._notas = types.MappingProxyType(notas or {})     # (2025, 'novembro') -> ((dia, FileEntry), ...) ordenado por dia
+        self._month_dirs = types.MappingProxyType(month_dirs or {}) # (2025, 'novembro') -> pasta diária do mês
+        self._rankings = types.MappingProxyType(rankings or {}) # 'ranking_semanal_atual.csv' -> FileEntry
+        self._hierarchy = hierarchy # FileEntry de 'data/hierarquia.csv', se existir
+        self._goals = goals         # FileEntry de 'data/metas.csv', se existir
+        self._invalid = tuple(invalid or ()) # (FileEntry, motivo) dos arquivos diários ignorados (ex.: 31.02.csv)
+        self.fingerprint = self._fingerprint() # Hash do conteúdo indexado (estável entre processos e reinícios)
+
+    def _fingerprint(self):
+        """Hash de todos os arquivos indexados (caminho, tamanho, mtime): muda se qualquer um mudar."""
+        entries = list(self._months.values()) + list(self._rankings.values()) + [entry for entry in (self._hierarchy, self._goals) if entry]
+        entries.extend(entry for entry, _ in self._invalid)
+        for files in list(self._days.values()) + list(self._notas.values()):
+            entries.extend(entry for _, entry in files)
+        digest = hashlib.sha1()
+        for entry in sorted(entries):
+            digest.update(f"{entry.path}|{entry.size}|{entry.mtime}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    # --- Consultas (somente memória) ---
+
+    @staticmethod
+    def _sort_key(key):
+        year, month = key
+        return year, MESES_ORDER.index(month)
+
+    def month_keys(self):
+        """Chaves (ano, mês) com consolidado mensal disponível, em ordem cronológica."""
+        return sorted(self._months, key=self._sort_key)
+
+    def months(self):
+        """Rótulos ('Novembro/2025') dos meses com consolidado mensal, em ordem cronológica."""
+        return [month_label(year, month) for year, month in self.month_keys()]
+
+    def years(self):
+        """Anos presentes na árvore (consolidados ou pastas diárias)."""
+        return sorted({year for year, _ in list(self._months) + list(self._month_dirs)})
+
+    def month_file(self, label):
+        """FileEntry do consolidado mensal ('novembro.csv') ou None."""
+        return self._months.get(parse_month_label(label))
+
+    def day_files(self, label):
+        """Lista [(dia, FileEntry)] dos CSVs diários do mês."""
+        return list(self._days.get(parse_month_label(label), []))
+
+    def notas_files(self, label):
+        """Lista [(dia, FileEntry)] dos CSVs de avaliação ('notas') do mês."""
+        return list(self._notas.get(parse_month_label(label), []))
+
+    def iter_day_files(self):
+        """Todos os CSVs diários da árvore: (ano, mês, dia, FileEntry)."""
+        for year, month in sorted(self._days, key=self._sort_key):
+            for day, entry in self._days[(year, month)]:
+                yield year, month, day, entry
+
+    def iter_notas_files(self):
+        """Todos os CSVs de notas da árvore: (ano, mês, dia, FileEntry)."""
+        for year, month in sorted(self._notas, key=self._sort_key):
+            for day, entry in self._notas[(year, month)]:
+                yield year, month, day, entry
+
+    def has_daily_folder(self, label):
+        """True se existe a subpasta diária do mês."""
+        return parse_month_label(label) in self._days
+
+    def month_dir(self, label):
+        """Caminho da subpasta diária do mês (para mensagens), existente ou esperado."""
+        key = parse_month_label(label)
+        if key in self._month_dirs:
+            return self._month_dirs[key]
+        return os.path.join(self.root, key[1])
+
+    def upload_path(self, kind, label, day=None, filename=None):
+        """Destino de um arquivo enviado pelo app: onde o mês já está ou, se for novo, 'data/<ano>/'."""
+        if kind == 'ranking':
+            return os.path.join(self.root, RANKING_FOLDER, os.path.basename(filename))
+        year, month = parse_month_label(label)
+        if kind == 'mensal':
+            entry = self._months.get((year, month))
+            return entry.path if entry else os.path.join(self.root, str(year), f"{month}.csv")
+        month_dir = self._month_dirs.get((year, month)) or os.path.join(self.root, str(year), month)
+        folder = os.path.join(month_dir, NOTAS_FOLDER) if kind == 'notas' else month_dir
+        return os.path.join(folder, f"{day:02d}.{MESES_ORDER.index(month) + 1:02d}.csv")
+
+    def ranking_file(self, filename):
+        """FileEntry de um arquivo de ranking em 'data/semana/' ou None."""
+        return self._rankings.get(filename)
+
+    def hierarchy_file(self):
+        """FileEntry do mapeamento de hierarquia ('data/hierarquia.csv') ou None."""
+        return self._hierarchy
+
+    def goals_file(self):
+        """FileEntry das metas ('data/metas.csv') ou None."""
+        return self._goals
+
+    def ranking_files(self):
+        """Nomes dos arquivos de ranking disponíveis."""
+        return sorted(self._rankings)
+
+    def invalid_files(self):
+        """Arquivos diários/de notas ignorados na indexação: [(FileEntry, motivo)]."""
+        return list(self._invalid)
+
+
+class DataCatalog:
+    """Índice da árvore 'data/' (meses, dias, notas e rankings), montado uma única vez.
+
+    Layouts aceitos (o de pasta por ano tem prioridade sobre o legado para o mesmo mês):
+        data/2025/novembro.csv, data/2025/novembro/DD.MM.csv, data/2025/novembro/notas/
+        data/novembro.csv, data/novembro/DD.MM.csv, data/novembro/notas/ (ano inferido, ver infer_year)
+    Além de 'data/semana/' (rankings), 'data/hierarquia.csv' (equipes) e 'data/metas.csv'
+    (metas), os dois últimos opcionais.
+
+    O índice só é refeito quando o mtime de alguma pasta conhecida muda, e essa
+    verificação é limitada a uma a cada MIN_CHECK_INTERVAL segundos. Assim, os
+    reruns do Streamlit consultam apenas a memória e não tocam o sistema de arquivos.
+    Observação: sobrescrever um arquivo no lugar não altera o mtime da pasta; para
+    publicar dados novos, copie/renomeie o arquivo (ou chame refresh(force=True)).
+    No layout legado o ano vem do mtime dos arquivos do mês (não muda na virada do
+    ano); copiar o mês de novo com outra data pode mudá-lo, por isso prefira as pastas por ano.
+
+    Cada reindexação que muda o conteúdo publica uma nova versão imutável
+    (DataSnapshot, em `self.snapshot`); as consultas feitas direto no catálogo vão
+    para a versão mais recente. Quem precisa de uma visão consistente (um rerun,
+    uma resposta da API) guarda o snapshot e consulta só ele.
+    """
+
+    def __init__(self, root=DATA_FOLDER, min_check_interval=MIN_CHECK_INTERVAL):
+        self.root = root
+        self.min_check_interval = min_check_interval
+        self.snapshot = DataSnapshot(root) # Versão mais recente (versão 0: árvore ainda não lida)
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._dir_mtimes = {}
+        # Versões ainda em uso (sessões, respostas em andamento): somem sozinhas quando ninguém mais as referencia
+        self._versions = weakref.WeakValueDictionary()
+        self._versions[0] = self.snapshot
+        self.refresh(force=True)
+
+    def __getattr__(self, name):
+        # Consultas (months(), day_files(), version, fingerprint...) vão para a versão mais recente
+        if name == 'snapshot':
+            raise AttributeError(name)
+        return getattr(self.snapshot, name)
+
+    def get_version(self, version):
+        """Snapshot de uma versão ainda referenciada (ou None se já foi descartada)."""
+        return self._versions.get(version)
+
+    def live_versions(self):
+        """Números das versões ainda em memória (a atual e as fixadas por alguma sessão)."""
+        return sorted(self._versions.keys())
+
+    # --- Atualização do índice ---
+
+    def _year_dirs(self):
+        """Pastas de ano ('data/2025') existentes e, por último, a raiz (layout legado, ano=None)."""
+        year_dirs = []
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name)
+                if name.isdigit() and len(name) == 4 and os.path.isdir(path):
+                    year_dirs.append((int(name), path))
+        year_dirs.append((None, self.root))
+        return year_dirs
+
+    def _watched_dirs(self):
+        """Pastas cujo mtime indica mudança na árvore de dados."""
+        dirs = [os.path.join(self.root, RANKING_FOLDER)]
+        for _, base in self._year_dirs():
+            dirs.append(base)
+            for month in MESES_ORDER:
+                month_dir = os.path.join(base, month)
+                dirs.append(month_dir)
+                dirs.append(os.path.join(month_dir, NOTAS_FOLDER))
+        return dirs
+
+    def refresh(self, force=False):
+        """Reindexa a árvore se alguma pasta mudou. Retorna True se uma nova versão foi publicada."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.min_check_interval:
+            return False
+
+        with self._lock:
+            if not force and now - self._last_check < self.min_check_interval:
+                return False
+            self._last_check = now
+
+            dir_mtimes = {path: _dir_mtime(path) for path in self._watched_dirs()}
+            if not force and dir_mtimes == self._dir_mtimes:
+                return False
+
+            snapshot = self._scan()
+            self._dir_mtimes = dir_mtimes
+            if snapshot.fingerprint == self.snapshot.fingerprint:
+                return False # Pastas tocadas, mas nenhum arquivo mudou: mantém a versão
+            self.snapshot = snapshot
+            self._versions[snapshot.version] = snapshot
+            return True
+
+    def _scan(self):
+        """Percorre 'data/' uma vez e monta a próxima versão do índice."""
+        months, days, notas, month_dirs, rankings, invalid = {}, {}, {}, {}, {}, []
+        hierarchy = _file_entry(os.path.join(self.root, HIERARCHY_FILE))
+        goals = _file_entry(os.path.join(self.root, GOALS_FILE))
+
+        if os.path.isdir(self.root):
+            legacy_years = self._legacy_years() # Layout sem pasta de ano: ano inferido por mês
+            for year, base in self._year_dirs():
+                is_legacy = year is None
+                for filename in os.listdir(base):
+                    month = filename.replace('.csv', '').lower()
+                    if filename.endswith(".csv") and month in MESES_ORDER:
+                        key = (legacy_years[month] if is_legacy else year, month)
+                        if is_legacy and key in months: continue # Pasta do ano tem prioridade
+                        entry = _file_entry(os.path.join(base, filename))
+                        if entry: months[key] = entry
+
+                for month in MESES_ORDER:
+                    month_dir = os.path.join(base, month)
+                    if not os.path.isdir(month_dir):
+                        continue
+                    key = (legacy_years[month] if is_legacy else year, month)
+                    if is_legacy and key in month_dirs:
+                        continue
+                    month_dirs[key] = month_dir
+                    days[key] = self._scan_day_folder(month_dir, key, invalid)
+                    notas_dir = os.path.join(month_dir, NOTAS_FOLDER)
+                    if os.path.isdir(notas_dir):
+                        notas[key] = self._scan_day_folder(notas_dir, key, invalid)
+
+            ranking_dir = os.path.join(self.root, RANKING_FOLDER)
+            if os.path.isdir(ranking_dir):
+                for filename in os.listdir(ranking_dir):
+                    if filename.endswith(".csv"):
+                        entry = _file_entry(os.path.join(ranking_dir, filename))
+                        if entry: rankings[filename] = entry
+
+        return DataSnapshot(self.root, self.snapshot.version + 1, months, self._share(days, self.snapshot._days),
+                            self._share(notas, self.snapshot._notas), month_dirs, rankings, hierarchy, goals, invalid)
+
+    def _legacy_years(self):
+        """Ano de cada mês do layout legado (data/novembro.csv, data/novembro/), pelo arquivo mais antigo do mês."""
+        mtimes = {}
+        for filename in os.listdir(self.root):
+            path = os.path.join(self.root, filename)
+            month = filename.replace('.csv', '').lower()
+            if month not in MESES_ORDER:
+                continue
+            if filename.endswith(".csv"):
+                paths = [path]
+            elif filename == month and os.path.isdir(path):
+                paths = [os.path.join(path, name) for name in os.listdir(path) if name.endswith(".csv")] or [path]
+            else:
+                continue
+            stats = [mtime for mtime in map(_dir_mtime, paths) if mtime is not None]
+            if stats:
+                mtimes[month] = min(stats + ([mtimes[month]] if month in mtimes else []))
+        return {month: infer_year(month, mtime) for month, mtime in mtimes.items()}
+
+    @staticmethod
+    def _share(partitions, previous):
+        """Copy-on-write: meses cujos arquivos não mudaram reaproveitam a lista da versão anterior."""
+        shared = {}
+        for key, files in partitions.items():
+            files = tuple(files)
+            shared[key] = previous[key] if previous.get(key) == files else files
+        return shared
+
+    @staticmethod
+    def _scan_day_folder(folder, key, invalid):
+        """Lista os CSVs diários (DD.MM.csv) de uma pasta, ordenados pelo dia.
+
+        Dias que não existem no mês (ex.: 31.02.csv) ficam de fora e vão para `invalid`.
+        """
+        year, month = key
+        entries = []
+        for filename in os.listdir(folder):
+            if not filename.endswith(".csv"):
+                continue
+            day = _day_from_filename(filename)
+            entry = _file_entry(os.path.join(folder, filename))
+            if day is None or not entry:
+                continue
+            if not is_valid_day(year, MESES_ORDER.index(month) + 1, day):
+                invalid.append((entry, f"dia {day} não existe em {month_label(year, month)}"))
+                continue
+            entries.append((day, entry))
+        return sorted(entries, key=lambda item: item[0])
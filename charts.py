@@ -0,0 +1,77 @@
+import numpy as np
+
+# Modo de renderização dos gráficos de linha: 'auto' escolhe WebGL quando há muitos pontos
+CHART_BACKENDS = {'Automático': 'auto', 'WebGL': 'webgl', 'SVG': 'svg'}
+WEBGL_MIN_POINTS = 1000 # Total de pontos a partir do qual o modo automático usa WebGL
+
+# Downsampling no servidor: pontos enviados por série (LTTB preserva picos e vales)
+TARGET_POINTS = 500
+
+# Séries enviadas de início nos gráficos com uma linha por agente (as demais sob demanda)
+INITIAL_SERIES = 10
+
+
+def lttb(values, threshold):
+    """Índices mantidos pelo Largest-Triangle-Three-Buckets (x = posição do ponto).
+
+    Divide a série em `threshold - 2` faixas e, de cada uma, mantém o ponto que forma
+    o maior triângulo com o ponto mantido anterior e a média da faixa seguinte.
+    O primeiro e o último ponto são sempre mantidos.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket = (n - 2) / (threshold - 2)
+    keep = [0]
+    anchor = 0
+    for i in range(threshold - 2):
+        start, end = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, n)
+        if end >= next_end: # Última faixa: a "faixa seguinte" é o último ponto
+            avg_x, avg_y = n - 1, values[-1]
+        else:
+            avg_x, avg_y = (end + next_end - 1) / 2, values[end:next_end].mean()
+        positions = np.arange(start, end)
+        area = np.abs((anchor - avg_x) * (values[start:end] - values[anchor]) - (anchor - positions) * (avg_y - values[anchor]))
+        anchor = start + int(np.argmax(area))
+        keep.append(anchor)
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+def top_series(df, color, rank_col='QTD Atendimento', limit=INITIAL_SERIES):
+    """As `limit` séries com maior volume (ou as primeiras, sem coluna de volume)."""
+    if rank_col in df.columns:
+        ranked = df.groupby(color)[rank_col].sum().sort_values(ascending=False).index
+    else:
+        ranked = df[color].drop_duplicates()
+    return [str(value) for value in ranked[:limit]]
+
+
+def line_figure(df, x, y, title, color=None, series=None, backend='auto', target_points=TARGET_POINTS):
+    """Gráfico de linhas (com marcadores) em WebGL ou SVG, com downsampling LTTB por série.
+
+    `df` já vem na ordem do eixo X. `series` limita as linhas enviadas (None = todas).
+    """
+    import plotly.graph_objects as go
+
+    groups = [(None, df)] if color is None else [(name, group) for name, group in df.groupby(color, sort=False)
+                                                 if series is None or str(name) in series]
+    total_points = sum(len(group) for _, group in groups)
+    webgl = backend == 'webgl' or (backend == 'auto' and total_points >= WEBGL_MIN_POINTS)
+    trace = go.Scattergl if webgl else go.Scatter
+
+    fig = go.Figure()
+    for name, group in groups:
+        group = group.dropna(subset=[y])
+        kept = group.iloc[lttb(group[y].to_numpy(), target_points)]
+        fig.add_trace(trace(
+            x=kept[x].astype(str).tolist(), y=kept[y].tolist(), mode='lines+markers',
+            name=str(name) if name is not None else y, showlegend=color is not None,
+        ))
+    # Mantém a ordem do eixo X dos dados (categorias como '01/11' ou 'Novembro/2025')
+    fig.update_layout(title=title, xaxis=dict(type='category', categoryorder='array', categoryarray=df[x].astype(str).drop_duplicates().tolist()),
+                      yaxis_title=y, xaxis_title=x, legend_title_text=color or '')
+    return fig
@@ -0,0 +1,89 @@
+import datetime
+from collections import namedtuple
+
+import pandas as pd
+
+from date_dimension import date_key
+
+# Métricas comparadas e a agregação de cada uma (a mesma dos cards de KPI)
+COMPARISON_AGG = {
+    'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean', 'TMIC': 'mean',
+    'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum'
+}
+
+# Métricas em que o menor valor é o melhor (tempos); nas demais, maior é melhor
+LOWER_IS_BETTER = {'TMA', 'TME', 'TMIA', 'TMIC'}
+
+# Um período de comparação: rótulo e intervalo de DateKeys (AAAAMMDD, inclusivo)
+Period = namedtuple('Period', ['label', 'start', 'end'])
+
+
+def range_period(start_date, end_date, label=None):
+    """Período personalizado a partir de duas datas do calendário."""
+    label = label or f"{start_date:%d/%m/%Y} a {end_date:%d/%m/%Y}"
+    return Period(label, date_key(start_date.year, start_date.month, start_date.day),
+                  date_key(end_date.year, end_date.month, end_date.day))
+
+
+def calendar_periods(date_dim, date_keys, grain):
+    """Semanas ISO ('Semana') ou meses ('Mês') que contêm algum dos dias informados, em ordem cronológica."""
+    days = date_dim.loc[date_dim.index.intersection(sorted(set(date_keys)))]
+    if days.empty:
+        return []
+    group_col = 'WeekKey' if grain == 'Semana' else 'MonthKey'
+    periods = []
+    for key, group in days.groupby(group_col):
+        if grain == 'Semana':
+            first, last = group['Data'].min(), group['Data'].max()
+            label = f"Semana {key % 100:02d}/{key // 100} ({first:%d/%m} a {last:%d/%m})"
+        else:
+            label = f"{group['MesNome'].iloc[0]}/{key // 100}"
+        periods.append(Period(label, int(group['DateKey'].min()), int(group['DateKey'].max())))
+    return periods
+
+
+def period_month_keys(*periods):
+    """Meses (ano, número do mês) tocados pelos períodos, para carregar só os dados necessários."""
+    months = set()
+    for period in periods:
+        current = datetime.date(period.start // 10000, period.start // 100 % 100, 1)
+        last = datetime.date(period.end // 10000, period.end // 100 % 100, 1)
+        while current <= last:
+            months.add((current.year, current.month))
+            current = (current + datetime.timedelta(days=32)).replace(day=1)
+    return sorted(months)
+
+
+def compare_periods(df_daily, period_base, period_current, metric):
+    """Compara dois períodos por agente numa única agregação vetorizada.
+
+    Retorna uma linha por agente com as métricas de cada período ('<métrica> (Base)',
+    '<métrica> (Atual)'), a variação ('Δ <métrica>'), a posição no ranking de `metric`
+    em cada período e o 'Movimento' (positivo = subiu no ranking).
+    """
+    agg = {col: func for col, func in COMPARISON_AGG.items() if col in df_daily.columns}
+    if df_daily.empty or 'Agente' not in df_daily.columns or metric not in agg:
+        return pd.DataFrame()
+
+    # Cada linha entra no(s) período(s) que a contém (os intervalos podem se sobrepor)
+    keys = df_daily['DateKey']
+    in_base = keys.between(period_base.start, period_base.end)
+    in_current = keys.between(period_current.start, period_current.end)
+    tagged = pd.concat([df_daily[in_base].assign(Periodo='Base'), df_daily[in_current].assign(Periodo='Atual')])
+    if tagged.empty:
+        return pd.DataFrame()
+
+    wide = tagged.groupby(['Agente', 'Periodo']).agg(agg).unstack('Periodo')
+    wide = wide.reindex(columns=pd.MultiIndex.from_product([list(agg), ['Base', 'Atual']]))
+
+    result = pd.DataFrame(index=wide.index)
+    for col in agg:
+        result[f"{col} (Base)"] = wide[(col, 'Base')]
+        result[f"{col} (Atual)"] = wide[(col, 'Atual')]
+        result[f"Δ {col}"] = wide[(col, 'Atual')] - wide[(col, 'Base')]
+
+    ascending = metric in LOWER_IS_BETTER
+    result['Posição (Base)'] = wide[(metric, 'Base')].rank(ascending=ascending, method='min')
+    result['Posição (Atual)'] = wide[(metric, 'Atual')].rank(ascending=ascending, method='min')
+    result['Movimento'] = result['Posição (Base)'] - result['Posição (Atual)']
+    return result.sort_values(['Posição (Atual)', 'Posição (Base)']).reset_index()
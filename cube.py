@@ -0,0 +1,105 @@
+import pandas as pd
+
+# Colunas do arquivo de hierarquia (catalog.HIERARCHY_FILE): uma linha por agente
+HIERARCHY_RENAME = {'AGENTE': 'Agente', 'NOM_AGENTE': 'Agente', 'EQUIPE': 'Equipe', 'SUPERVISOR': 'Supervisor', 'SITE': 'Site'}
+
+# Níveis do drill-down (do mais agregado ao mais detalhado) e rótulo de quem não está no mapeamento
+HIERARCHY_LEVELS = ['Site', 'Equipe', 'Agente']
+UNASSIGNED = 'Sem Cadastro'
+
+# Grãos de tempo do cubo -> coluna de tempo (None = o período inteiro)
+CUBE_GRAINS = {'Mês': None, 'Semana': 'WeekKey', 'Dia': 'DateKey'}
+
+# Métricas do cubo: somas ('sum') continuam somas; médias ('mean') são guardadas como
+# soma + contagem, para que qualquer nível reproduza a média simples das linhas
+CUBE_METRICS = {
+    'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean', 'TMIC': 'mean',
+    'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum'
+}
+
+
+def read_hierarchy(path):
+    """Lê o CSV de hierarquia: colunas Agente, Equipe, Supervisor e Site (uma linha por agente)."""
+    df = pd.read_csv(path, encoding='utf-8', engine='python', dtype=str)
+    df.columns = df.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True)
+    df = df.rename(columns=HIERARCHY_RENAME)
+    if 'Agente' not in df.columns:
+        return pd.DataFrame(columns=['Agente', 'Equipe', 'Supervisor', 'Site'])
+    for col in ['Equipe', 'Supervisor', 'Site']:
+        df[col] = df[col].str.strip() if col in df.columns else None
+    df['Agente'] = df['Agente'].str.strip()
+    return df[['Agente', 'Equipe', 'Supervisor', 'Site']].drop_duplicates('Agente')
+
+
+def attach_hierarchy(df, hierarchy):
+    """Adiciona Site/Equipe/Supervisor às linhas por Agente (quem não está mapeado fica em UNASSIGNED)."""
+    if hierarchy.empty:
+        df = df.assign(Site=UNASSIGNED, Equipe=UNASSIGNED, Supervisor=None)
+    else:
+        df = df.drop(columns=['Site', 'Equipe', 'Supervisor'], errors='ignore').merge(hierarchy, on='Agente', how='left')
+    df[['Site', 'Equipe']] = df[['Site', 'Equipe']].fillna(UNASSIGNED)
+    return df
+
+
+class AggregationCube:
+    """Cubo pré-agregado nível da hierarquia × grão de tempo.
+
+    Montado uma vez: as linhas brutas são reduzidas a somas/contagens por
+    (Site, Equipe, Agente, dia) e, a partir dessa base, cada combinação de nível e
+    grão é agregada uma única vez. O drill-down só filtra tabelas já prontas.
+    """
+
+    def __init__(self, df, hierarchy):
+        self.metrics = {col: agg for col, agg in CUBE_METRICS.items() if col in df.columns}
+        self.grains = [grain for grain, col in CUBE_GRAINS.items() if col is None or col in df.columns]
+        self.supervisors = hierarchy.drop_duplicates('Equipe').set_index('Equipe')['Supervisor'].dropna().to_dict() if not hierarchy.empty else {}
+        self._cells = {}
+        if df.empty or 'Agente' not in df.columns or not self.metrics:
+            return
+
+        time_cols = [CUBE_GRAINS[grain] for grain in self.grains if CUBE_GRAINS[grain]]
+        base = self._reduce(attach_hierarchy(df, hierarchy), HIERARCHY_LEVELS + time_cols)
+        metric_cols = [col for col in base.columns if '|' in col]
+        for depth, level in enumerate(HIERARCHY_LEVELS):
+            path = HIERARCHY_LEVELS[:depth + 1] # O nível leva junto os pais (Site > Equipe > Agente)
+            for grain in self.grains:
+                keys = path + ([CUBE_GRAINS[grain]] if CUBE_GRAINS[grain] else [])
+                self._cells[(level, grain)] = base.groupby(keys, as_index=False)[metric_cols].sum()
+
+    def _reduce(self, df, keys):
+        """Linhas brutas -> somas e contagens aditivas por chave."""
+        parts = {}
+        for col, agg in self.metrics.items():
+            values = pd.to_numeric(df[col], errors='coerce')
+            parts[f"{col}|soma"] = values.fillna(0)
+            if agg == 'mean':
+                parts[f"{col}|n"] = values.notna().astype(int)
+        reduced = pd.concat([df[keys].reset_index(drop=True), pd.DataFrame(parts).reset_index(drop=True)], axis=1)
+        return reduced.groupby(keys, as_index=False).sum()
+
+    def view(self, level, grain='Mês', **filters):
+        """Tabela de um nível/grão (ex.: view('Agente', 'Dia', Equipe='Alfa')) com as métricas finais."""
+        cell = self._cells.get((level, grain))
+        if cell is None:
+            return pd.DataFrame()
+        for col, value in filters.items():
+            if value is not None:
+                cell = cell[cell[col] == value]
+
+        result = cell[[col for col in cell.columns if '|' not in col]].copy()
+        for col, agg in self.metrics.items():
+            total = cell[f"{col}|soma"]
+            result[col] = total if agg == 'sum' else total / cell[f"{col}|n"].where(cell[f"{col}|n"] > 0)
+        if level == 'Equipe' and self.supervisors:
+            result.insert(result.columns.get_loc('Equipe') + 1, 'Supervisor', result['Equipe'].map(self.supervisors))
+        return result.reset_index(drop=True)
+
+    def members(self, level, **filters):
+        """Valores distintos de um nível (para os seletores do drill-down)."""
+        cell = self._cells.get((level, 'Mês'))
+        if cell is None:
+            return []
+        for col, value in filters.items():
+            if value is not None:
+                cell = cell[cell[col] == value]
+        return sorted(cell[level].astype(str).unique())
@@ -0,0 +1,61 @@
+import datetime
+
+import pandas as pd
+
+from catalog import MESES_ORDER
+
+# Nomes dos dias da semana (segunda = 0, como em datetime.weekday())
+DIAS_SEMANA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+
+def date_key(year, month, day):
+    """Chave inteira de um dia: AAAAMMDD."""
+    return year * 10000 + month * 100 + day
+
+
+def month_key(year, month):
+    """Chave inteira de um mês: AAAAMM (ordena corretamente entre anos)."""
+    return year * 100 + month
+
+
+def build_date_dimension(years):
+    """Monta a tabela de dimensão de datas (um registro por dia) para os anos informados.
+
+    Colunas: DateKey (AAAAMMDD), Data, Ano, Mes, MesNome, MonthKey (AAAAMM),
+    Trimestre, QuarterKey (AAAAT), AnoISO, SemanaISO, WeekKey (AAAASS),
+    Dia, DiaSemana, DiaUtil (segunda a sexta).
+    """
+    years = sorted(set(years))
+    if not years:
+        return pd.DataFrame()
+
+    dates = pd.date_range(datetime.date(years[0], 1, 1), datetime.date(years[-1], 12, 31), freq='D')
+    dates = dates[dates.year.isin(years)]
+    iso = dates.isocalendar()
+
+    dim = pd.DataFrame({
+        'Data': dates,
+        'Ano': dates.year,
+        'Mes': dates.month,
+        'Dia': dates.day,
+        'Trimestre': dates.quarter,
+        'AnoISO': iso['year'].to_numpy(),
+        'SemanaISO': iso['week'].to_numpy(),
+        'DiaSemana': [DIAS_SEMANA[weekday] for weekday in dates.weekday],
+        'DiaUtil': dates.weekday < 5,
+    })
+    dim['DateKey'] = date_key(dim['Ano'], dim['Mes'], dim['Dia'])
+    dim['MonthKey'] = month_key(dim['Ano'], dim['Mes'])
+    dim['QuarterKey'] = dim['Ano'] * 10 + dim['Trimestre']
+    dim['WeekKey'] = dim['AnoISO'] * 100 + dim['SemanaISO']
+    dim['MesNome'] = [MESES_ORDER[month - 1].capitalize() for month in dim['Mes']]
+
+    return dim.set_index('DateKey', drop=False)
+
+
+def build_month_dimension(date_dim):
+    """Dimensão no grão de mês (um registro por MonthKey), derivada da dimensão diária."""
+    if date_dim.empty:
+        return pd.DataFrame()
+    cols = ['MonthKey', 'Ano', 'Mes', 'MesNome', 'Trimestre', 'QuarterKey']
+    return date_dim[cols].drop_duplicates('MonthKey').set_index('MonthKey', drop=False)
@@ -0,0 +1,63 @@
+import pandas as pd
+
+# Escala das notas de avaliação (nom_valor) e regras de CSAT/NPS sobre essa escala.
+# Notas fora de [NOTA_MIN, NOTA_MAX] ou não numéricas são ignoradas.
+NOTA_MIN = 1
+NOTA_MAX = 5
+CSAT_MIN_NOTA = 4      # CSAT: % de notas >= 4 ("satisfeito" ou "muito satisfeito")
+NPS_PROMOTOR_MIN = 5   # NPS: promotores = nota máxima
+NPS_DETRATOR_MAX = 3   # NPS: detratores = notas <= 3
+
+NOTA_COLS = [f"Nota {nota}" for nota in range(NOTA_MIN, NOTA_MAX + 1)]
+
+# Colunas aditivas do rollup (podem ser somadas entre dias/agentes)
+COUNT_COLS = NOTA_COLS + ['Avaliacoes', 'SomaNotas', 'Positivas', 'Promotores', 'Detratores']
+
+
+def build_rating_rollup(df, keys=('Agente', 'DaySort', 'Dia')):
+    """Histograma de notas por chave (agente/dia) em uma única passada vetorizada.
+
+    Retorna um DataFrame com as chaves e as colunas aditivas de COUNT_COLS.
+    """
+    keys = [key for key in keys if key in df.columns]
+    if df.empty or 'Nota' not in df.columns or not keys:
+        return pd.DataFrame(columns=keys + COUNT_COLS)
+
+    notas = pd.to_numeric(df['Nota'].astype(str).str.replace(',', '.', regex=False), errors='coerce')
+    valid = notas.between(NOTA_MIN, NOTA_MAX)
+    if not valid.any():
+        return pd.DataFrame(columns=keys + COUNT_COLS)
+
+    notas = notas[valid].round().astype(int)
+    hist = pd.crosstab([df.loc[valid, key] for key in keys], notas)
+    hist = hist.reindex(columns=range(NOTA_MIN, NOTA_MAX + 1), fill_value=0)
+
+    values = hist.columns.to_numpy()
+    rollup = pd.DataFrame(index=hist.index)
+    rollup[NOTA_COLS] = hist.to_numpy()
+    rollup['Avaliacoes'] = hist.sum(axis=1)
+    rollup['SomaNotas'] = hist.to_numpy() @ values
+    rollup['Positivas'] = hist.loc[:, values >= CSAT_MIN_NOTA].sum(axis=1)
+    rollup['Promotores'] = hist.loc[:, values >= NPS_PROMOTOR_MIN].sum(axis=1)
+    rollup['Detratores'] = hist.loc[:, values <= NPS_DETRATOR_MAX].sum(axis=1)
+    return rollup.reset_index()
+
+
+def summarize_ratings(rollup, by=None):
+    """Soma os contadores do rollup (no total ou por colunas `by`) e calcula Média, CSAT e NPS.
+
+    CSAT e NPS são recalculados a partir das contagens, nunca pela média de percentuais.
+    """
+    if rollup.empty:
+        return pd.DataFrame()
+
+    if by:
+        totals = rollup.groupby(list(by), as_index=False)[COUNT_COLS].sum()
+    else:
+        totals = rollup[COUNT_COLS].sum().to_frame().T
+
+    avaliacoes = totals['Avaliacoes'].where(totals['Avaliacoes'] > 0)
+    totals['Media Nota'] = totals['SomaNotas'] / avaliacoes
+    totals['CSAT'] = totals['Positivas'] / avaliacoes
+    totals['NPS'] = (totals['Promotores'] - totals['Detratores']) / avaliacoes * 100
+    return totals
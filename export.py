@@ -0,0 +1,82 @@
+import re
+import tempfile
+
+import pandas as pd
+
+# Formatos de exportação: rótulo -> (extensão, MIME)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Linhas escritas por vez (o DataFrame nunca é formatado inteiro de uma só vez)
+EXPORT_CHUNK_ROWS = 50_000
+
+# Acima deste tamanho o arquivo temporário sai da memória e vai para o disco
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def export_file_name(*parts, fmt="CSV"):
+    """Monta um nome de arquivo seguro: ('Novembro/2025', 'CAMILA') -> 'novembro_2025_camila.csv'."""
+    base = "_".join(str(part) for part in parts if part)
+    base = re.sub(r'[^0-9a-zA-ZÀ-ÿ]+', '_', base).strip('_').lower() or 'export'
+    return f"{base}.{EXPORT_FORMATS[fmt][0]}"
+
+
+def _iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Fatias consecutivas do DataFrame com no máximo chunk_rows linhas."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(df, fileobj, chunk_rows):
+    # utf-8-sig: mantém acentos legíveis quando o CSV é aberto no Excel
+    header = True
+    for chunk in _iter_chunks(df, chunk_rows):
+        fileobj.write(chunk.to_csv(index=False, header=header).encode('utf-8-sig' if header else 'utf-8'))
+        header = False
+    if header: # DataFrame vazio: exporta apenas o cabeçalho
+        fileobj.write(df.to_csv(index=False).encode('utf-8-sig'))
+
+
+def _write_excel(df, fileobj, chunk_rows):
+    # Modo write_only do openpyxl: as linhas são gravadas em fluxo, sem montar a planilha em memória
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Dados")
+    sheet.append([str(col) for col in df.columns])
+    for chunk in _iter_chunks(df, chunk_rows):
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(list(row))
+    workbook.save(fileobj)
+
+
+def _write_parquet(df, fileobj, chunk_rows):
+    # Um row group por fatia, todos com o esquema inferido do DataFrame completo
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for chunk in _iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+_WRITERS = {"CSV": _write_csv, "Excel": _write_excel, "Parquet": _write_parquet}
+
+
+def export_frame(df, fmt="CSV", chunk_rows=EXPORT_CHUNK_ROWS):
+    """Exporta o DataFrame no formato pedido e retorna o conteúdo do arquivo (bytes).
+
+    As linhas são formatadas em fatias e gravadas num arquivo temporário (que vai
+    para o disco quando passa de SPOOL_MAX_BYTES); só o resultado final é lido.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+b') as fileobj:
+        _WRITERS[fmt](pd.DataFrame(df), fileobj, chunk_rows)
+        fileobj.seek(0)
+        return fileobj.read()
@@ -0,0 +1,194 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from alerts import ALERT_TARGETS
+from catalog import CACHE_FOLDER
+from comparison import LOWER_IS_BETTER
+from incremental import FILES_SCHEMA, VERSION_COLUMNS, DayFileStore, day_files
+from ingest import load_metrics
+
+# Arquivo SQLite do atingimento de metas (persistente, ao lado dos alertas)
+GOALS_DB_FILE = os.path.join(CACHE_FOLDER, 'metas.sqlite')
+
+# Métricas que aceitam meta. Tempos: meta é o máximo; demais: meta é o mínimo
+# (mesmas unidades do app: minutos, FCR 0-1, Satisfação 0-5, NPS -100 a 100)
+GOAL_METRICS = ['TMA', 'TME', 'TMIA', 'TMIC', 'FCR', 'Satisfacao', 'NPS']
+
+# Metas gerais usadas quando não há 'data/metas.csv' (as mesmas dos alertas)
+DEFAULT_GOALS = {metric: limit for metric, (_, limit) in ALERT_TARGETS.items()}
+
+# Colunas do arquivo de metas: uma meta por linha; Equipe/Agente vazios = meta geral
+GOALS_RENAME = {'METRICA': 'Métrica', 'META': 'Meta', 'EQUIPE': 'Equipe', 'AGENTE': 'Agente', 'NOM_AGENTE': 'Agente'}
+
+_SCHEMA = FILES_SCHEMA + """
+CREATE TABLE IF NOT EXISTS configuracao (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sequencias (
+    agente TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    atual INTEGER NOT NULL,
+    PRIMARY KEY (agente, metrica)
+);
+CREATE TABLE IF NOT EXISTS atingimento (
+    date_key INTEGER NOT NULL,
+    agente TEXT NOT NULL,
+    metrica TEXT NOT NULL,
+    valor REAL NOT NULL,
+    meta REAL NOT NULL,
+    atingiu INTEGER NOT NULL,
+    gap REAL NOT NULL,
+    sequencia INTEGER NOT NULL,
+    """ + VERSION_COLUMNS + """
+);
+CREATE INDEX IF NOT EXISTS idx_atingimento_data ON atingimento (date_key, agente);
+"""
+
+_ATTAINMENT_QUERY = """
+WITH periodo AS (SELECT * FROM atingimento WHERE date_key BETWEEN ? AND ? AND {visible})
+SELECT p.agente AS Agente, p.metrica AS Métrica, MAX(p.meta) AS Meta, COUNT(*) AS Dias,
+       SUM(p.atingiu) AS "Dias na Meta", AVG(p.gap) AS "Gap Médio",
+       (SELECT q.sequencia FROM periodo q WHERE q.agente = p.agente AND q.metrica = p.metrica
+        ORDER BY q.date_key DESC LIMIT 1) AS Sequência
+FROM periodo p
+"""
+
+
+def read_goals(path):
+    """Lê o CSV de metas: colunas Metrica, Meta e, opcionalmente, Equipe e Agente."""
+    df = pd.read_csv(path, encoding='utf-8', engine='python', dtype=str)
+    df.columns = df.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True)
+    df = df.rename(columns=GOALS_RENAME)
+    for col in ['Equipe', 'Agente']:
+        df[col] = df[col].str.strip().replace('', None) if col in df.columns else None
+    df['Métrica'] = df['Métrica'].str.strip()
+    df['Meta'] = pd.to_numeric(df['Meta'].str.replace(',', '.', regex=False), errors='coerce')
+    return df[df['Métrica'].isin(GOAL_METRICS) & df['Meta'].notna()][['Métrica', 'Meta', 'Equipe', 'Agente']]
+
+
+def default_goals():
+    """Metas gerais padrão (sem arquivo de metas)."""
+    return pd.DataFrame([{'Métrica': metric, 'Meta': limit, 'Equipe': None, 'Agente': None} for metric, limit in DEFAULT_GOALS.items()])
+
+
+def load_goals(catalog):
+    """Metas do arquivo 'data/metas.csv' do catálogo ou, na falta dele, as metas padrão."""
+    entry = catalog.goals_file()
+    return read_goals(entry.path) if entry is not None else default_goals()
+
+
+def resolve_goals(agents, goals, hierarchy):
+    """Meta de cada agente por métrica (a mais específica vence: agente > equipe > geral).
+
+    Retorna um DataFrame indexado por Agente com uma coluna por métrica (NaN = sem meta).
+    """
+    teams = hierarchy.set_index('Agente')['Equipe'] if not hierarchy.empty else pd.Series(dtype=object)
+    index = pd.Index(agents, name='Agente')
+    team_of = pd.Series(index.map(teams), index=index)
+    resolved = pd.DataFrame(index=index)
+    for metric, rows in goals.groupby('Métrica'):
+        general = rows[rows['Equipe'].isna() & rows['Agente'].isna()]['Meta']
+        by_team = rows[rows['Equipe'].notna() & rows['Agente'].isna()].drop_duplicates('Equipe', keep='last').set_index('Equipe')['Meta']
+        by_agent = rows[rows['Agente'].notna()].drop_duplicates('Agente', keep='last').set_index('Agente')['Meta']
+        target = pd.Series(index.map(by_agent), index=index, dtype=float)
+        target = target.fillna(team_of.map(by_team).astype(float))
+        resolved[metric] = target.fillna(general.iloc[-1] if not general.empty else float('nan'))
+    return resolved
+
+
+class GoalStore(DayFileStore):
+    """Atingimento de metas por agente/dia (atingiu, gap e sequência), calculado de forma incremental.
+
+    Cada arquivo diário novo é avaliado uma única vez, em ordem cronológica, contra a
+    meta resolvida do agente; a sequência (dias seguidos na meta, positiva, ou fora
+    dela, negativa) continua a partir do último dia. Um arquivo alterado ou um dia
+    que chega atrasado reavalia só dali em diante (a sequência volta à do dia
+    anterior); mudar as metas ou a hierarquia recalcula a tabela. As telas só
+    consultam a matriz já calculada.
+    """
+
+    SCHEMA = _SCHEMA
+    SCHEMA_VERSION = 2
+    VERSIONED_TABLES = ('atingimento',)
+
+    def __init__(self, path=GOALS_DB_FILE):
+        super().__init__(path)
+
+    @staticmethod
+    def _config_hash(goals, hierarchy):
+        """Hash das metas e do mapeamento de equipes: se mudar, o atingimento é recalculado."""
+        digest = hashlib.sha1(goals.sort_values(['Métrica', 'Equipe', 'Agente']).to_json().encode('utf-8'))
+        if not hierarchy.empty:
+            digest.update(hierarchy[['Agente', 'Equipe']].sort_values('Agente').to_json().encode('utf-8'))
+        return digest.hexdigest()
+
+    def update(self, catalog, goals, hierarchy, usable=None):
+        """Avalia os dias novos do catálogo. `usable(tipo, entry)` pula arquivos em quarentena.
+
+        Retorna quantos arquivos diários foram (re)processados.
+        """
+        config = self._config_hash(goals, hierarchy)
+
+        def score_file(conn, day_key, entry):
+            try:
+                df = load_metrics(entry)
+            except Exception:
+                df = pd.DataFrame()
+            self._score_day(conn, day_key, df, goals, hierarchy)
+
+        with self._lock, self._connect() as conn:
+            stored = conn.execute("SELECT valor FROM configuracao WHERE chave = 'metas'").fetchone()
+            conn.execute("INSERT OR REPLACE INTO configuracao VALUES ('metas', ?)", (config,))
+            return self._sync(conn, day_files(catalog.iter_day_files(), usable=usable), score_file,
+                              rebuild=stored is None or stored[0] != config)
+
+    def _rewind(self, conn, start_key):
+        self._retire(conn, 'atingimento', "date_key >= ?", (start_key,))
+        conn.execute("DELETE FROM sequencias")
+        # Sequência de cada (agente, métrica) no último dia anterior (coluna "solta" do MAX no SQLite)
+        conn.execute(
+            "INSERT INTO sequencias SELECT agente, metrica, sequencia FROM "
+            "(SELECT agente, metrica, sequencia, MAX(date_key) FROM atingimento WHERE removido_em IS NULL GROUP BY agente, metrica)"
+        )
+
+    @staticmethod
+    def _score_day(conn, day_key, df, goals, hierarchy):
+        metrics = [metric for metric in GOAL_METRICS if metric in df.columns]
+        rows, streaks = [], []
+        if not df.empty and 'Agente' in df.columns and metrics:
+            day = df.groupby('Agente')[metrics].mean()
+            targets = resolve_goals(list(day.index), goals, hierarchy)
+            previous = {(row[0], row[1]): row[2] for row in conn.execute("SELECT agente, metrica, atual FROM sequencias")}
+            for metric in metrics:
+                if metric not in targets.columns:
+                    continue
+                for agente, value in day[metric].items():
+                    target = targets.at[agente, metric]
+                    if pd.isna(value) or pd.isna(target):
+                        continue
+                    # Gap positivo = folga dentro da meta; negativo = quanto faltou
+                    gap = (target - value) if metric in LOWER_IS_BETTER else (value - target)
+                    met = gap >= 0
+                    streak = previous.get((agente, metric), 0)
+                    streak = (max(streak, 0) + 1) if met else (min(streak, 0) - 1)
+                    rows.append((day_key, agente, metric, float(value), float(target), int(met), float(gap), streak))
+                    streaks.append((agente, metric, streak))
+
+        conn.executemany("INSERT INTO atingimento VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)", rows)
+        conn.executemany("INSERT OR REPLACE INTO sequencias VALUES (?, ?, ?)", streaks)
+
+    def attainment(self, start_key, end_key, agente=None, generation=None):
+        """Resumo por agente e métrica entre dois DateKeys (como visto na `generation`): meta, dias,
+        dias na meta, gap médio e sequência atual.
+        """
+        visible, visible_params = self._visible(generation)
+        query, params = _ATTAINMENT_QUERY.format(visible=visible), [int(start_key), int(end_key), *visible_params]
+        if agente:
+            query += " WHERE p.agente = ?"
+            params.append(agente)
+        query += " GROUP BY p.agente, p.metrica ORDER BY p.agente, p.metrica"
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
@@ -0,0 +1,197 @@
+import abc
+import contextlib
+import os
+import sqlite3
+import threading
+
+from catalog import MESES_ORDER
+from date_dimension import date_key
+
+# Arquivos já processados por um artefato. A data (DateKey) faz parte da assinatura:
+# um arquivo que muda de dia/ano (ex.: ano inferido de uma pasta legada) é reprocessado
+FILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    date_key INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_arquivos_data ON arquivos (date_key);
+"""
+
+# Geração publicada dos artefatos versionados (uma linha)
+GENERATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geracao (
+    atual INTEGER NOT NULL
+);
+"""
+
+# Colunas das tabelas versionadas: geração em que a linha entrou e em que saiu (NULL = ainda vale)
+VERSION_COLUMNS = "criado_em INTEGER, removido_em INTEGER"
+
+
+def day_files(items, kind='diario', usable=None):
+    """[(DateKey, FileEntry)] em ordem cronológica a partir de (ano, mês, dia, FileEntry) do catálogo.
+
+    `usable(tipo, entry)` deixa de fora os arquivos em quarentena: para o artefato eles
+    não existem (um arquivo que entra em quarentena é tratado como removido).
+    """
+    return sorted(
+        ((date_key(year, MESES_ORDER.index(month) + 1, day), entry) for year, month, day, entry in items
+         if usable is None or usable(kind, entry)),
+        key=lambda item: (item[0], item[1].path)
+    )
+
+
+def file_signature(day_key, entry):
+    """Assinatura de um arquivo processado: tamanho, mtime e a data a que ele pertence."""
+    return (entry.size, entry.mtime, day_key)
+
+
+class SQLiteStore:
+    """Base dos artefatos SQLite em CACHE_FOLDER: esquema, versão e conexões curtas.
+
+    Os artefatos são derivados dos CSVs: se SCHEMA_VERSION mudar, as tabelas antigas
+    são descartadas e o artefato é refeito a partir dos arquivos.
+
+    Nas tabelas de VERSIONED_TABLES (as lidas pelas telas) nada é alterado no lugar:
+    cada atualização publica uma nova geração, as linhas novas entram nela e as
+    substituídas só são marcadas como removidas. Quem lê com a geração da sua versão
+    dos dados continua vendo o mesmo conteúdo; purge() apaga o que nenhuma geração
+    ainda em uso enxerga.
+    """
+
+    SCHEMA = ""
+    SCHEMA_VERSION = 0
+    VERSIONED_TABLES = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+                for table in tables:
+                    conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+                conn.execute(f"PRAGMA user_version = {int(self.SCHEMA_VERSION)}")
+            conn.executescript(self.SCHEMA)
+            if self.VERSIONED_TABLES:
+                conn.executescript(GENERATION_SCHEMA + ''.join(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_nova ON {table} (criado_em) WHERE criado_em IS NULL;"
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_removida ON {table} (removido_em) WHERE removido_em IS NOT NULL;"
+                    for table in self.VERSIONED_TABLES
+                ))
+                if conn.execute("SELECT COUNT(*) FROM geracao").fetchone()[0] == 0:
+                    conn.execute("INSERT INTO geracao VALUES (0)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Conexão curta (uma por operação): confirma a transação e fecha ao sair."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Gerações ---
+
+    def generation(self):
+        """Geração publicada mais recente."""
+        with self._connect() as conn:
+            return self._current_generation(conn)
+
+    @staticmethod
+    def _current_generation(conn):
+        return conn.execute("SELECT atual FROM geracao").fetchone()[0]
+
+    def _retire(self, conn, table, where, params=()):
+        """Tira linhas da próxima geração sem apagá-las (as gerações anteriores continuam vendo)."""
+        conn.execute(f"DELETE FROM {table} WHERE criado_em IS NULL AND {where}", params) # Ainda não publicadas
+        conn.execute(f"UPDATE {table} SET removido_em = ? WHERE removido_em IS NULL AND {where}",
+                     (self._current_generation(conn) + 1, *params))
+
+    def _publish(self, conn):
+        """Fecha a geração: as linhas inseridas (criado_em NULL) e as retiradas passam a valer."""
+        if not self.VERSIONED_TABLES:
+            return
+        generation = self._current_generation(conn) + 1
+        for table in self.VERSIONED_TABLES:
+            conn.execute(f"UPDATE {table} SET criado_em = ? WHERE criado_em IS NULL", (generation,))
+        conn.execute("UPDATE geracao SET atual = ?", (generation,))
+
+    @staticmethod
+    def _visible(generation, alias=''):
+        """Filtro SQL e parâmetros das linhas que a geração enxerga (None = a mais recente)."""
+        prefix = f"{alias}." if alias else ''
+        if generation is None:
+            return f"{prefix}removido_em IS NULL", []
+        return f"{prefix}criado_em <= ? AND ({prefix}removido_em IS NULL OR {prefix}removido_em > ?)", [int(generation)] * 2
+
+    def purge(self, generation):
+        """Apaga as linhas removidas até `generation` (a mais antiga ainda lida). Retorna quantas saíram."""
+        with self._lock, self._connect() as conn:
+            return sum(conn.execute(f"DELETE FROM {table} WHERE removido_em <= ?", (int(generation),)).rowcount
+                       for table in self.VERSIONED_TABLES)
+
+
+class DayFileStore(SQLiteStore, abc.ABC):
+    """Artefato SQLite derivado de arquivos diários, atualizado de forma incremental.
+
+    A tabela 'arquivos' guarda a assinatura (file_signature) de cada arquivo já
+    processado. _sync processa os dias em ordem cronológica: dias novos depois do
+    último processado são só acrescentados; um arquivo alterado, removido, que mudou
+    de data ou um dia novo anterior ao último processado faz o artefato voltar ao
+    primeiro dia afetado (_rewind) e seguir dali, sem refazer os dias anteriores.
+    """
+
+    SCHEMA = FILES_SCHEMA
+
+    @staticmethod
+    def _stored_files(conn):
+        """caminho -> assinatura dos arquivos já processados."""
+        return {row[0]: tuple(row[1:]) for row in conn.execute("SELECT caminho, tamanho, mtime, date_key FROM arquivos")}
+
+    @staticmethod
+    def _mark(conn, day_key, entry):
+        conn.execute("INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?)", (entry.path, *file_signature(day_key, entry)))
+
+    @staticmethod
+    def _forget(conn, paths):
+        conn.executemany("DELETE FROM arquivos WHERE caminho = ?", [(path,) for path in paths])
+
+    @abc.abstractmethod
+    def _rewind(self, conn, start_key):
+        """Desfaz o que foi derivado dos dias >= start_key (implementado por cada artefato)."""
+
+    def _sync(self, conn, files, process, rebuild=False):
+        """Processa [(DateKey, FileEntry)] com process(conn, DateKey, FileEntry). Retorna quantos arquivos foram processados.
+
+        `rebuild` refaz tudo (ex.: mudou a configuração usada no cálculo).
+        """
+        stored = self._stored_files(conn)
+        current = {entry.path: file_signature(day_key, entry) for day_key, entry in files}
+        last_key = max((signature[2] for signature in stored.values()), default=None)
+
+        # Primeiro dia afetado: data antiga e nova dos arquivos alterados/removidos e dias novos "no passado"
+        affected = [signature[2] for path, signature in stored.items() if current.get(path) != signature]
+        affected += [current[path][2] for path, signature in stored.items() if path in current and current[path] != signature]
+        affected += [day_key for day_key, entry in files
+                     if entry.path not in stored and last_key is not None and day_key <= last_key]
+        start_key = 0 if rebuild else min(affected, default=None)
+
+        if start_key is None:
+            pending = [(day_key, entry) for day_key, entry in files if entry.path not in stored]
+        else:
+            conn.execute("DELETE FROM arquivos WHERE date_key >= ?", (start_key,))
+            self._forget(conn, [path for path in stored if path not in current])
+            self._rewind(conn, start_key)
+            pending = [(day_key, entry) for day_key, entry in files if day_key >= start_key]
+
+        for day_key, entry in pending:
+            process(conn, day_key, entry)
+            self._mark(conn, day_key, entry)
+        if pending or start_key is not None:
+            self._publish(conn)
+        return len(pending)
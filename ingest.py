@@ -0,0 +1,343 @@
+"""Ingestão offline: normaliza a árvore 'data/' e grava os artefatos que o app lê.
+
+Uso (na raiz do projeto, depois que as exportações do dia forem copiadas):
+    python ingest.py data/
+    python ingest.py data/ --workers 4 --force
+
+Cada CSV (consolidado mensal, diário, ranking e notas) é validado uma única vez
+(arquivos reprovados ficam em quarentena, ver quality.py), normalizado
+(nomes de colunas, tempos em minutos, percentuais) e gravado em Parquet em
+'.dashboard_cache/artefatos/', junto com o rollup de notas de cada arquivo de
+avaliação e os sketches de quantis dos tempos (quantiles.py) de cada arquivo
+diário. Os arquivos são processados em paralelo (um processo por núcleo) e,
+no fim, o índice de protocolos, as médias móveis (rolling.py), os alertas
+(alerts.py) e o atingimento de metas (goals.py) são atualizados. O app lê esses artefatos quando
+existem e só normaliza o CSV na hora como fallback.
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+from catalog import CACHE_FOLDER, DATA_FOLDER, DataCatalog, file_hash
+from evaluations import build_rating_rollup
+from protocol_index import NOTAS_RENAME, ProtocolIndex
+from quantiles import sketch_frame
+
+# Artefatos pré-calculados (um Parquet por arquivo de origem)
+ARTIFACT_FOLDER = os.path.join(CACHE_FOLDER, 'artefatos')
+
+# Versão da normalização: incrementar quando as regras abaixo mudarem invalida os artefatos antigos
+NORMALIZE_VERSION = 1
+
+# Colunas originais das métricas (após a limpeza dos nomes) -> nomes usados no app
+METRIC_RENAME = {
+    'NOM_AGENTE': 'Agente',
+    'QTDATENDIMENTO': 'QTD Atendimento', # Corrigido (sem S)
+    'SATISFACAO': 'Satisfacao',
+    'QTDSATISFACAO': 'QTD Avaliacoes',
+}
+EXPECTED_METRIC_COLS = {
+    'QTD Atendimento', 'TMA', 'TME', 'TMIA', 'TMIC',
+    'FCR', 'Satisfacao', 'NPS', 'QTD Avaliacoes', 'Agente'
+}
+TIME_COLS = ['TMA', 'TME', 'TMIA', 'TMIC']
+PERCENT_COLS = ['FCR', 'Satisfacao', 'NPS']
+
+# Notas: mesmas colunas do índice de protocolos + a coluna 'dia' original do CSV
+EVALUATION_RENAME = {**NOTAS_RENAME, 'DIA': 'Dia (CSV)'}
+
+# Validação de qualidade (CSV bruto): sem as colunas obrigatórias o arquivo vai para a quarentena;
+# as demais colunas de EXPECTED_METRIC_COLS ausentes geram só aviso
+REQUIRED_COLS = {
+    'mensal': {'Agente', 'QTD Atendimento'}, 'diario': {'Agente', 'QTD Atendimento'},
+    'ranking': {'Agente', 'QTD Atendimento'}, 'notas': {'Agente'},
+}
+TIME_PATTERN = r'^\d{1,3}:\d{2}(:\d{2})?$' # HH:MM:SS ou MM:SS
+PERCENT_PATTERN = r'^-?\d+([.,]\d+)?\s*%?$' # '88,89%', '0.9', '100'
+MAX_INVALID_RATIO = 0.1 # Acima disso (por coluna), valores fora do formato põem o arquivo em quarentena
+
+
+# --- Normalização (compartilhada pelo app e pela ingestão) ---
+
+def clean_columns(df):
+    """Nomes de colunas sem espaços/acentos e em maiúsculas ('Qtd. Atendimento' -> 'QTDATENDIMENTO')."""
+    df.columns = df.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True)
+    return df
+
+
+def time_to_minutes(time_str):
+    """'HH:MM:SS' ou 'MM:SS' -> minutos decimais (0.0 se vazio ou inválido)."""
+    if pd.isna(time_str) or time_str == '': return 0.0
+    try:
+        parts = str(time_str).split(':')
+        if len(parts) == 3: hours, minutes, seconds = map(float, parts); return (hours * 60) + minutes + seconds / 60
+        elif len(parts) == 2: minutes, seconds = map(float, parts); return minutes + seconds / 60
+        else: return 0.0
+    except: return 0.0
+
+
+def normalize_metrics(df):
+    """Renomeia as colunas e converte tempos (minutos), FCR (0-1), Satisfação (0-5) e NPS."""
+    df = clean_columns(df).rename(columns=METRIC_RENAME)
+
+    for col in TIME_COLS:
+        if col in df.columns and not df[col].isnull().all():
+            df[col] = df[col].apply(time_to_minutes)
+
+    for col in PERCENT_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    if 'FCR' in df.columns and pd.api.types.is_numeric_dtype(df['FCR']): df['FCR'] = df['FCR'] / 100
+    if 'Satisfacao' in df.columns and pd.api.types.is_numeric_dtype(df['Satisfacao']): df['Satisfacao'] = df['Satisfacao'] / 100 * 5
+    return df
+
+
+def read_metrics_csv(path):
+    """Lê e normaliza um CSV de métricas (consolidado mensal, diário ou ranking)."""
+    return normalize_metrics(pd.read_csv(path, encoding='utf-8', engine='python'))
+
+
+def read_evaluation_csv(path, day, filename=None):
+    """Lê um CSV de notas do dia e adiciona Dia ('05/11', do nome do arquivo) e DaySort.
+
+    `filename` é o nome final do arquivo quando `path` é uma cópia temporária (envio pelo app).
+    """
+    df = clean_columns(pd.read_csv(path, encoding='utf-8', engine='python'))
+    df = df.rename(columns=EVALUATION_RENAME)
+    df['Dia'] = os.path.basename(filename or path).replace('.csv', '').replace('.', '/')
+    df['DaySort'] = day
+    return df
+
+
+def evaluation_rollup(df):
+    """Rollup de notas do arquivo (vazio se ele não tiver a coluna Agente, que o app ignora)."""
+    return build_rating_rollup(df if 'Agente' in df.columns else pd.DataFrame())
+
+
+def validate_metrics(df, require_all=True):
+    """Problemas de esquema de um arquivo de métricas (lista vazia se estiver ok)."""
+    expected = EXPECTED_METRIC_COLS if require_all else {'Agente'}
+    missing = expected - set(df.columns)
+    return [f"colunas ausentes: {sorted(missing)}"] if missing else []
+
+
+def inspect_file(kind, path):
+    """Valida o CSV bruto contra o esquema esperado. Retorna (problemas fatais, avisos)."""
+    try:
+        raw = clean_columns(pd.read_csv(path, encoding='utf-8', engine='python', dtype=str))
+    except Exception as e:
+        return [f"CSV ilegível: {e}"], []
+    raw = raw.rename(columns=EVALUATION_RENAME if kind == 'notas' else METRIC_RENAME)
+
+    missing = REQUIRED_COLS[kind] - set(raw.columns)
+    fatal = [f"colunas obrigatórias ausentes: {sorted(missing)}"] if missing else []
+    warnings = validate_metrics(raw) if kind in ('mensal', 'diario') else []
+    if kind == 'notas':
+        return fatal, warnings
+
+    formats = [(col, TIME_PATTERN) for col in TIME_COLS] + [(col, PERCENT_PATTERN) for col in PERCENT_COLS]
+    for col, pattern in formats:
+        if col not in raw.columns:
+            continue
+        values = raw[col].dropna().str.strip()
+        values = values[values != '']
+        invalid = values[~values.str.match(pattern)]
+        if invalid.empty:
+            continue
+        message = f"{col}: {len(invalid)} de {len(values)} valores fora do formato (ex.: {invalid.iloc[0]!r})"
+        (fatal if len(invalid) > MAX_INVALID_RATIO * len(values) else warnings).append(message)
+    return fatal, warnings
+
+
+# --- Artefatos em disco ---
+
+def artifact_path(entry, kind, folder=ARTIFACT_FOLDER):
+    """Caminho do artefato de um arquivo de origem; muda quando o arquivo (tamanho/mtime) muda."""
+    source = os.path.normpath(os.path.abspath(entry.path))
+    digest = hashlib.sha1(f"{NORMALIZE_VERSION}|{source}|{entry.size}|{entry.mtime}".encode('utf-8')).hexdigest()
+    return os.path.join(folder, f"{kind}_{digest[:20]}.parquet")
+
+
+def _read_artifact(path):
+    """Lê um artefato Parquet (ou None se ainda não foi gerado / está ilegível)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+
+def _write_artifact(df, path):
+    """Grava o Parquet num arquivo temporário e o publica com rename atômico."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_metrics(entry):
+    """Métricas normalizadas de um arquivo: do artefato pré-calculado ou, na falta dele, do CSV."""
+    df = _read_artifact(artifact_path(entry, 'metricas'))
+    return df if df is not None else read_metrics_csv(entry.path)
+
+
+def load_evaluations(entry, day):
+    """(notas do dia, rollup de notas) de um arquivo: dos artefatos ou, na falta deles, do CSV."""
+    df = _read_artifact(artifact_path(entry, 'notas'))
+    rollup = _read_artifact(artifact_path(entry, 'rollup')) if df is not None else None
+    if df is None or rollup is None:
+        df = read_evaluation_csv(entry.path, day)
+        rollup = evaluation_rollup(df)
+    return df, rollup
+
+
+def load_sketches(entry):
+    """Centroides dos sketches de tempo (Agente, Métrica, Centro, Peso) de um arquivo diário."""
+    df = _read_artifact(artifact_path(entry, 'quantis'))
+    return df if df is not None else sketch_frame(load_metrics(entry))
+
+
+# --- Ingestão em lote ---
+
+def plan_tasks(catalog):
+    """Arquivos da árvore a processar: [(tipo, FileEntry, dia)]."""
+    tasks = [('mensal', catalog.month_file(label), None) for label in catalog.months()]
+    tasks.extend(('diario', entry, day) for _, _, day, entry in catalog.iter_day_files())
+    tasks.extend(('notas', entry, day) for _, _, day, entry in catalog.iter_notas_files())
+    tasks.extend(('ranking', catalog.ranking_file(name), None) for name in catalog.ranking_files())
+    return tasks
+
+
+def task_artifacts(kind, entry):
+    """Artefatos gerados por uma tarefa."""
+    if kind == 'notas':
+        return [artifact_path(entry, 'notas'), artifact_path(entry, 'rollup')]
+    if kind == 'diario':
+        return [artifact_path(entry, 'metricas'), artifact_path(entry, 'quantis')]
+    return [artifact_path(entry, 'metricas')]
+
+
+def ingest_file(task):
+    """Valida e processa um arquivo (executado nos processos do pool).
+
+    Retorna (hash do conteúdo, problemas fatais, avisos, erro); com problema fatal
+    nenhum artefato é gravado e o arquivo vai para a quarentena.
+    """
+    kind, entry, day = task
+    try:
+        digest = file_hash(entry.path)
+        fatal, warnings = inspect_file(kind, entry.path)
+        if fatal:
+            return digest, fatal, warnings, None
+
+        write_artifacts(kind, entry.path, entry, day)
+        return digest, [], warnings, None
+    except Exception as e:
+        return None, [], [], str(e)
+
+
+def write_artifacts(kind, source_path, entry, day=None):
+    """Normaliza `source_path` e grava os artefatos de `entry` (o arquivo publicado na árvore)."""
+    if kind == 'notas':
+        df = read_evaluation_csv(source_path, day, filename=entry.path)
+        _write_artifact(evaluation_rollup(df), artifact_path(entry, 'rollup'))
+        _write_artifact(df, artifact_path(entry, 'notas'))
+        return
+
+    df = read_metrics_csv(source_path)
+    if kind == 'diario':
+        _write_artifact(sketch_frame(df), artifact_path(entry, 'quantis'))
+    _write_artifact(df, artifact_path(entry, 'metricas'))
+
+
+def prune_artifacts(keep, folder=ARTIFACT_FOLDER):
+    """Remove artefatos de arquivos que mudaram ou saíram da árvore. Retorna quantos foram removidos."""
+    if not os.path.isdir(folder):
+        return 0
+    removed = 0
+    for filename in os.listdir(folder):
+        path = os.path.join(folder, filename)
+        if filename.endswith('.parquet') and path not in keep:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def run_ingest(root=DATA_FOLDER, workers=None, force=False, log=print):
+    """Ingere a árvore inteira. Retorna o número de arquivos com erro."""
+    # quality.py, rolling.py, alerts.py, goals.py e reconciliation.py usam este módulo, por isso os imports ficam aqui
+    from alerts import AlertStore
+    from cube import read_hierarchy
+    from goals import GoalStore, load_goals
+    from quality import STATUS_QUARANTINE, QualityStore
+    from reconciliation import ReconciliationStore
+    from rolling import RollingKpis
+    start = time.perf_counter()
+    catalog = DataCatalog(root)
+    quality = QualityStore()
+    tasks = plan_tasks(catalog)
+    quality.prune({entry.path for _, entry, _ in tasks})
+
+    # Arquivos em quarentena (e sem alteração desde a validação) não são relidos
+    quarantined = [task for task in tasks if quality.known(task[1]) == STATUS_QUARANTINE]
+    tasks = [task for task in tasks if task not in quarantined]
+    keep = {path for kind, entry, _ in tasks for path in task_artifacts(kind, entry)}
+    pending = [task for task in tasks if force or not all(os.path.exists(path) for path in task_artifacts(*task[:2]))]
+    log(f"{len(tasks) + len(quarantined)} arquivos na árvore '{root}', {len(pending)} a processar, "
+        f"{len(quarantined)} em quarentena")
+
+    errors = quarantined_now = 0
+    if pending:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            for (kind, entry, _), (digest, fatal, warnings, error) in zip(pending, pool.map(ingest_file, pending, chunksize=4)):
+                if error:
+                    errors += 1
+                    log(f"  ERRO {entry.path}: {error}")
+                    continue
+                quality.record(kind, entry, fatal, warnings, digest)
+                quarantined_now += bool(fatal)
+                for problem in fatal:
+                    log(f"  QUARENTENA {entry.path}: {problem}")
+                for problem in warnings:
+                    log(f"  aviso {entry.path}: {problem}")
+
+    removed = prune_artifacts(keep)
+    # Artefatos derivados sem os arquivos em quarentena (mesma regra do app)
+    changed = ProtocolIndex().update(catalog, quality.usable)
+    rolling_days = RollingKpis().update(catalog, quality.usable)
+    scored_days = AlertStore().update(catalog, quality.usable)
+    # Metas por equipe usam 'data/hierarquia.csv' (o app também aceita equipes cadastradas em users.json)
+    hierarchy = read_hierarchy(catalog.hierarchy_file().path) if catalog.hierarchy_file() else pd.DataFrame(columns=['Agente', 'Equipe'])
+    goal_days = GoalStore().update(catalog, load_goals(catalog), hierarchy, quality.usable)
+    # Consolidado x soma dos diários (só os meses cujos arquivos mudaram)
+    reconciled = ReconciliationStore().update(catalog, quality.usable)
+    log(f"Concluído em {time.perf_counter() - start:.1f} s: {len(pending) - errors - quarantined_now} gerados, "
+        f"{quarantined_now} postos em quarentena, {errors} com erro, {removed} artefatos antigos removidos, {changed} arquivos de notas reindexados, "
+        f"{rolling_days} dias somados às médias móveis, {scored_days} dias pontuados nos alertas, "
+        f"{goal_days} dias avaliados nas metas, {reconciled} meses conciliados")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root', nargs='?', default=DATA_FOLDER, help="pasta de dados (padrão: 'data')")
+    parser.add_argument('--workers', type=int, default=None, help='processos em paralelo (padrão: um por núcleo)')
+    parser.add_argument('--force', action='store_true', help='regera todos os artefatos, mesmo os atualizados')
+    args = parser.parse_args(argv)
+    return 1 if run_ingest(args.root, args.workers, args.force) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import os
+
+import pandas as pd
+
+from catalog import CACHE_FOLDER, MESES_ORDER, month_label
+from date_dimension import date_key
+from incremental import FILES_SCHEMA, DayFileStore, file_signature
+
+# Arquivo SQLite do índice de protocolos (persistente entre reinícios do app)
+INDEX_FILE = os.path.join(CACHE_FOLDER, 'protocolos.sqlite')
+
+# Colunas originais dos CSVs de notas -> nomes usados no índice
+NOTAS_RENAME = {'NOM_AGENTE': 'Agente', 'NUM_PROTOCOLO': 'Protocolo', 'NOM_VALOR': 'Nota'}
+
+_SCHEMA = FILES_SCHEMA + """
+CREATE TABLE IF NOT EXISTS protocolos (
+    protocolo TEXT NOT NULL,
+    agente TEXT,
+    date_key INTEGER NOT NULL,
+    mes TEXT NOT NULL,
+    dia INTEGER NOT NULL,
+    nota TEXT,
+    caminho TEXT NOT NULL,
+    linha INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_protocolo ON protocolos (protocolo);
+CREATE INDEX IF NOT EXISTS idx_agente_data ON protocolos (agente, date_key);
+CREATE INDEX IF NOT EXISTS idx_caminho ON protocolos (caminho);
+"""
+
+
+def read_notas_file(path):
+    """Lê um CSV de notas com as colunas normalizadas (Agente, Protocolo, Nota)."""
+    df = pd.read_csv(path, encoding='utf-8', engine='python', dtype=str)
+    df.columns = df.columns.str.strip().str.upper().str.replace('[^A-Z0-9_]+', '', regex=True)
+    return df.rename(columns=NOTAS_RENAME)
+
+
+class ProtocolIndex(DayFileStore):
+    """Índice persistente protocolo -> (agente, data, mês, nota, arquivo, linha).
+
+    Montado na ingestão a partir dos CSVs de 'notas' e atualizado de forma incremental:
+    só os arquivos novos ou alterados (tamanho, mtime ou data) são relidos. As consultas
+    vão direto ao SQLite e não carregam nenhum mês em memória.
+    """
+
+    SCHEMA = _SCHEMA
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path=INDEX_FILE):
+        super().__init__(path)
+
+    def update(self, catalog, usable=None):
+        """Sincroniza o índice com os arquivos de notas do catálogo. `usable(tipo, entry)` pula arquivos em quarentena.
+
+        Retorna quantos arquivos foram (re)indexados ou removidos.
+        """
+        with self._lock, self._connect() as conn:
+            indexed = self._stored_files(conn)
+            changed = 0
+
+            for year, month, day, entry in catalog.iter_notas_files():
+                if usable is not None and not usable('notas', entry):
+                    continue # Em quarentena: sai do índice como um arquivo removido
+                day_key = date_key(year, MESES_ORDER.index(month) + 1, day)
+                if indexed.pop(entry.path, None) == file_signature(day_key, entry):
+                    continue
+                self._index_file(conn, entry, month_label(year, month), day_key, day)
+                self._mark(conn, day_key, entry)
+                changed += 1
+
+            # Arquivos que sumiram da árvore (ou entraram em quarentena) saem do índice
+            conn.executemany("DELETE FROM protocolos WHERE caminho = ?", [(path,) for path in indexed])
+            self._forget(conn, indexed)
+            return changed + len(indexed)
+
+    def _rewind(self, conn, start_key):
+        """O índice é por arquivo (update não depende da ordem dos dias): só tira as linhas dos dias >= start_key."""
+        conn.execute("DELETE FROM protocolos WHERE date_key >= ?", (start_key,))
+
+    @staticmethod
+    def _index_file(conn, entry, label, day_key, day):
+        conn.execute("DELETE FROM protocolos WHERE caminho = ?", (entry.path,))
+        try:
+            df = read_notas_file(entry.path)
+        except Exception:
+            df = pd.DataFrame()
+
+        if 'Protocolo' in df.columns:
+            df = df[df['Protocolo'].notna()]
+            rows = zip(
+                df['Protocolo'].str.strip(),
+                df['Agente'] if 'Agente' in df.columns else [None] * len(df),
+                [day_key] * len(df),
+                [label] * len(df),
+                [day] * len(df),
+                df['Nota'] if 'Nota' in df.columns else [None] * len(df),
+                [entry.path] * len(df),
+                (df.index + 2).tolist(), # Linha no CSV (1 = cabeçalho)
+            )
+            conn.executemany("INSERT INTO protocolos VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def lookup(self, protocolo):
+        """Registros do protocolo (normalmente um) como DataFrame."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT protocolo AS Protocolo, agente AS Agente, date_key AS DateKey, mes AS Mês, "
+                "dia AS DaySort, nota AS Nota, caminho AS Arquivo, linha AS Linha "
+                "FROM protocolos WHERE protocolo = ?",
+                conn, params=(str(protocolo).strip(),)
+            )
@@ -0,0 +1,115 @@
+import datetime
+import os
+
+import pandas as pd
+
+from catalog import CACHE_FOLDER, file_hash
+from incremental import SQLiteStore
+from ingest import inspect_file
+
+# Arquivo SQLite do resultado da validação (persistente: cada arquivo é validado uma vez)
+QUALITY_FILE = os.path.join(CACHE_FOLDER, 'qualidade.sqlite')
+
+# Situações registradas: válido (pode ter avisos) ou em quarentena (nunca é lido)
+STATUS_OK = 'ok'
+STATUS_QUARANTINE = 'quarentena'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    hash TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    situacao TEXT NOT NULL,
+    motivo TEXT NOT NULL,
+    verificado_em TEXT NOT NULL
+);
+"""
+
+
+class QualityStore(SQLiteStore):
+    """Cache (positivo e negativo) da validação dos arquivos de dados.
+
+    Cada arquivo é validado uma única vez (inspect_file) e o resultado fica gravado
+    com o hash do conteúdo. Um arquivo reprovado fica em quarentena: os loaders o
+    pulam sem tentar lê-lo de novo até que o conteúdo mude. Se só o mtime mudar
+    (arquivo copiado de novo com o mesmo conteúdo), o hash evita uma nova validação.
+    """
+
+    SCHEMA = _SCHEMA
+
+    def __init__(self, path=QUALITY_FILE):
+        super().__init__(path)
+        with self._connect() as conn:
+            # Cópia em memória: a consulta por arquivo nos reruns não toca o SQLite
+            self._rows = {
+                row[0]: row[1:] for row in
+                conn.execute("SELECT caminho, tamanho, mtime, hash, situacao, motivo FROM arquivos")
+            }
+
+    def known(self, entry):
+        """Situação já registrada para o arquivo neste tamanho/mtime (ou None se precisa validar)."""
+        row = self._rows.get(entry.path)
+        return row[3] if row is not None and (row[0], row[1]) == (entry.size, entry.mtime) else None
+
+    def check(self, kind, entry):
+        """True se o arquivo pode ser lido; valida (uma vez) os arquivos novos ou alterados."""
+        status = self.known(entry)
+        if status is not None:
+            return status == STATUS_OK
+        with self._lock:
+            digest = file_hash(entry.path)
+            row = self._rows.get(entry.path)
+            if row is not None and row[2] == digest: # Mesmo conteúdo: só atualiza o tamanho/mtime
+                self._save(kind, entry, digest, row[3], row[4])
+                return row[3] == STATUS_OK
+            fatal, warnings = inspect_file(kind, entry.path)
+            self.record(kind, entry, fatal, warnings, digest)
+            return not fatal
+
+    def usable(self, kind, entry):
+        """check() para os artefatos derivados: um arquivo que sumiu da árvore também não é usado."""
+        try:
+            return self.check(kind, entry)
+        except OSError:
+            return False
+
+    def record(self, kind, entry, fatal, warnings, digest=None):
+        """Grava o resultado de uma validação (feita aqui ou nos processos da ingestão)."""
+        status = STATUS_QUARANTINE if fatal else STATUS_OK
+        self._save(kind, entry, digest or file_hash(entry.path), status, '; '.join(fatal or warnings))
+
+    def _save(self, kind, entry, digest, status, reason):
+        checked_at = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (entry.path, entry.size, entry.mtime, digest, kind, status, reason, checked_at))
+        self._rows[entry.path] = (entry.size, entry.mtime, digest, status, reason)
+
+    def prune(self, paths):
+        """Esquece os arquivos que saíram da árvore. Retorna quantos foram removidos."""
+        gone = [path for path in self._rows if path not in paths]
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM arquivos WHERE caminho = ?", [(path,) for path in gone])
+        for path in gone:
+            del self._rows[path]
+        return len(gone)
+
+    def sync(self, tasks):
+        """Valida os arquivos novos/alterados de [(tipo, FileEntry, dia)] e esquece os que saíram da árvore."""
+        self.prune({entry.path for _, entry, _ in tasks})
+        for kind, entry, _ in tasks:
+            try:
+                self.check(kind, entry)
+            except OSError:
+                continue # Arquivo sumiu durante a verificação
+
+    def report(self):
+        """Arquivos em quarentena e arquivos válidos com avisos (para o relatório do Admin)."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT caminho AS Arquivo, tipo AS Tipo, situacao AS Situação, motivo AS Motivo, "
+                "verificado_em AS \"Verificado em\" FROM arquivos WHERE situacao = ? OR motivo != '' "
+                "ORDER BY situacao DESC, caminho", conn, params=[STATUS_QUARANTINE]
+            )
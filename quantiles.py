@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# Métricas de tempo com distribuição (em minutos, como no resto do app)
+QUANTILE_METRICS = ['TMA', 'TME', 'TMIA', 'TMIC']
+
+# Percentis exibidos nos cards e os usados no box plot (caixa p25-p75, bigodes p1-p99)
+CARD_QUANTILES = {'p50': 0.50, 'p90': 0.90, 'p99': 0.99}
+BOX_QUANTILES = {'p1': 0.01, 'p25': 0.25, 'p50': 0.50, 'p75': 0.75, 'p99': 0.99}
+
+# Compressão do sketch: ~número máximo de centroides (maior = mais preciso e maior)
+SKETCH_COMPRESSION = 100
+
+
+class QuantileSketch:
+    """Sketch de quantis mesclável (estilo t-digest): centroides (média, peso) ordenados.
+
+    A função de escala k1 deixa os centroides das caudas pequenos, então p1/p99 ficam
+    precisos mesmo com poucos centroides. Dois sketches se mesclam concatenando os
+    centroides e recomprimindo, por isso os percentis de um período saem da mescla dos
+    sketches de cada dia, sem reler as linhas de origem.
+    """
+
+    def __init__(self, compression=SKETCH_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @classmethod
+    def from_centroids(cls, means, weights, compression=SKETCH_COMPRESSION):
+        sketch = cls(compression)
+        sketch.add(means, weights)
+        return sketch
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def add(self, values, weights=None):
+        """Acrescenta valores (ou centroides) com pesos; ignora valores vazios e pesos não positivos."""
+        values = np.asarray(values, dtype=float)
+        weights = np.ones_like(values) if weights is None else np.asarray(weights, dtype=float)
+        valid = ~np.isnan(values) & ~np.isnan(weights) & (weights > 0)
+        self.means = np.concatenate([self.means, values[valid]])
+        self.weights = np.concatenate([self.weights, weights[valid]])
+        if len(self.means) > 2 * self.compression:
+            self.compress()
+        return self
+
+    def merge(self, other):
+        return self.add(other.means, other.weights)
+
+    def _k(self, q):
+        """Função de escala k1: centroides estreitos perto de q=0 e q=1."""
+        return self.compression / (2 * np.pi) * np.arcsin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def compress(self):
+        """Funde centroides vizinhos enquanto cabem numa unidade da função de escala."""
+        if len(self.means) <= 1:
+            return self
+        order = np.argsort(self.means, kind='mergesort')
+        means, weights = self.means[order], self.weights[order]
+        total = weights.sum()
+
+        new_means, new_weights = [], []
+        cur_mean, cur_weight, cumulative = means[0], weights[0], 0.0
+        k_low = self._k(0.0)
+        for mean, weight in zip(means[1:], weights[1:]):
+            if self._k((cumulative + cur_weight + weight) / total) - k_low <= 1:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                new_means.append(cur_mean)
+                new_weights.append(cur_weight)
+                cumulative += cur_weight
+                k_low = self._k(cumulative / total)
+                cur_mean, cur_weight = mean, weight
+        new_means.append(cur_mean)
+        new_weights.append(cur_weight)
+        self.means, self.weights = np.array(new_means), np.array(new_weights)
+        return self
+
+    def quantile(self, q):
+        """Quantil q (0-1) por interpolação linear entre os centros dos centroides."""
+        if not len(self.means):
+            return np.nan
+        order = np.argsort(self.means, kind='mergesort')
+        means, weights = self.means[order], self.weights[order]
+        centers = np.cumsum(weights) - weights / 2 # Posição (em peso acumulado) do centro de cada centroide
+        return float(np.interp(q * weights.sum(), centers, means))
+
+    def to_frame(self):
+        """Centroides comprimidos como DataFrame (Centro, Peso), para gravar em Parquet."""
+        self.compress()
+        return pd.DataFrame({'Centro': self.means, 'Peso': self.weights})
+
+
+def sketch_frame(df):
+    """Centroides por (Agente, Métrica) de um arquivo de métricas, ponderados pelos atendimentos.
+
+    Os arquivos trazem uma linha por agente (já é a média do dia), então cada agente-dia
+    costuma virar um único centroide com o peso do seu volume; se o arquivo tiver várias
+    linhas por agente (ex.: por atendimento), elas são resumidas no sketch do agente.
+    """
+    metrics = [col for col in QUANTILE_METRICS if col in df.columns]
+    if df.empty or 'Agente' not in df.columns or not metrics:
+        return pd.DataFrame(columns=['Agente', 'Métrica', 'Centro', 'Peso'])
+
+    weight = pd.to_numeric(df['QTD Atendimento'], errors='coerce') if 'QTD Atendimento' in df.columns else pd.Series(1.0, index=df.index)
+    long = df[['Agente'] + metrics].assign(Peso=weight).melt(id_vars=['Agente', 'Peso'], var_name='Métrica', value_name='Centro')
+    long['Centro'] = pd.to_numeric(long['Centro'], errors='coerce')
+    long = long.dropna(subset=['Centro', 'Peso'])
+    long = long[long['Peso'] > 0]
+
+    parts = []
+    for (agente, metric), group in long.groupby(['Agente', 'Métrica'], sort=False):
+        if len(group) > SKETCH_COMPRESSION:
+            group = QuantileSketch.from_centroids(group['Centro'], group['Peso']).to_frame().assign(Agente=agente, Métrica=metric)
+        parts.append(group)
+    if not parts:
+        return pd.DataFrame(columns=['Agente', 'Métrica', 'Centro', 'Peso'])
+    return pd.concat(parts, ignore_index=True)[['Agente', 'Métrica', 'Centro', 'Peso']]
+
+
+def merge_sketches(df_centroids):
+    """Mescla os centroides (de quantos dias/agentes forem) num sketch por métrica."""
+    if df_centroids.empty:
+        return {}
+    return {
+        metric: QuantileSketch.from_centroids(group['Centro'], group['Peso']).compress()
+        for metric, group in df_centroids.groupby('Métrica', sort=False)
+    }
+
+
+def sketch_quantiles(sketches, quantiles):
+    """Tabela Métrica x percentil (ex.: quantiles=CARD_QUANTILES) a partir dos sketches mesclados."""
+    rows = [
+        {'Métrica': metric, **{label: sketches[metric].quantile(q) for label, q in quantiles.items()}}
+        for metric in QUANTILE_METRICS if metric in sketches
+    ]
+    return pd.DataFrame(rows, columns=['Métrica'] + list(quantiles))
@@ -0,0 +1,223 @@
+import datetime
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from catalog import CACHE_FOLDER, MESES_ORDER, month_label
+from incremental import VERSION_COLUMNS, SQLiteStore
+from ingest import load_metrics
+
+# Arquivo SQLite da conciliação consolidado mensal x soma dos diários (persistente)
+RECONCILIATION_FILE = os.path.join(CACHE_FOLDER, 'conciliacao.sqlite')
+
+# Componentes aditivos comparados: contagens somam direto; médias viram total = média × peso
+ADDITIVE_COLS = ['QTD Atendimento', 'QTD Avaliacoes']
+WEIGHTED_COLS = {
+    'TMA': 'QTD Atendimento', 'TME': 'QTD Atendimento', 'TMIA': 'QTD Atendimento', 'TMIC': 'QTD Atendimento',
+    'FCR': 'QTD Atendimento', 'Satisfacao': 'QTD Avaliacoes', 'NPS': 'QTD Avaliacoes',
+}
+
+# Tolerância: diferença relativa (1%) e absoluta mínima (arredondamento dos CSVs)
+RELATIVE_TOLERANCE = 0.01
+ABSOLUTE_TOLERANCE = 0.5
+
+# Fonte de referência do mês
+SOURCE_DAILY = 'diario'
+SOURCE_MONTHLY = 'mensal'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meses (
+    mes TEXT NOT NULL,
+    assinatura TEXT NOT NULL,
+    fonte TEXT NOT NULL,
+    dias_faltando TEXT NOT NULL,
+    divergencias INTEGER NOT NULL,
+    verificado_em TEXT NOT NULL,
+    """ + VERSION_COLUMNS + """
+);
+CREATE INDEX IF NOT EXISTS idx_meses_mes ON meses (mes);
+CREATE TABLE IF NOT EXISTS divergencias (
+    mes TEXT NOT NULL,
+    agente TEXT NOT NULL,
+    componente TEXT NOT NULL,
+    mensal REAL,
+    diario REAL,
+    diferenca REAL,
+    relativa REAL,
+    """ + VERSION_COLUMNS + """
+);
+CREATE INDEX IF NOT EXISTS idx_divergencias_mes ON divergencias (mes);
+"""
+
+
+def additive_components(df):
+    """Totais aditivos por agente: contagens e média × peso (ex.: TMA × atendimentos = tempo total)."""
+    if df.empty or 'Agente' not in df.columns:
+        return pd.DataFrame()
+    parts = {}
+    for col in ADDITIVE_COLS:
+        if col in df.columns:
+            parts[col] = pd.to_numeric(df[col], errors='coerce')
+    for col, weight_col in WEIGHTED_COLS.items():
+        weight_col = weight_col if weight_col in df.columns else 'QTD Atendimento'
+        if col in df.columns and weight_col in df.columns:
+            parts[f"{col} × {weight_col}"] = pd.to_numeric(df[col], errors='coerce') * pd.to_numeric(df[weight_col], errors='coerce')
+    if not parts:
+        return pd.DataFrame()
+    return pd.DataFrame(parts).assign(Agente=df['Agente'].astype(str)).groupby('Agente').sum(min_count=1)
+
+
+def compare_components(df_monthly, df_daily):
+    """Divergências por agente e componente entre o consolidado e a soma dos dias (vetorizado).
+
+    Agentes presentes em só uma das fontes aparecem com o outro lado vazio (NaN).
+    """
+    monthly, daily = additive_components(df_monthly), additive_components(df_daily)
+    columns = ['Agente', 'Componente', 'Mensal', 'Diário', 'Diferença', 'Relativa']
+    components = monthly.columns.intersection(daily.columns)
+    if components.empty:
+        return pd.DataFrame(columns=columns)
+    agents = monthly.index.union(daily.index)
+    left = monthly.reindex(index=agents, columns=components).to_numpy(dtype=float)
+    right = daily.reindex(index=agents, columns=components).to_numpy(dtype=float)
+
+    diff = right - left
+    scale = np.fmax(np.abs(left), np.abs(right))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(scale > 0, np.abs(diff) / scale, 0.0)
+    one_sided = np.isnan(left) != np.isnan(right)
+    diverges = one_sided | ((np.abs(diff) > ABSOLUTE_TOLERANCE) & (relative > RELATIVE_TOLERANCE))
+
+    rows, cols = np.nonzero(diverges)
+    return pd.DataFrame({
+        'Agente': agents[rows], 'Componente': components[cols], 'Mensal': left[rows, cols],
+        'Diário': right[rows, cols], 'Diferença': diff[rows, cols], 'Relativa': relative[rows, cols],
+    }, columns=columns)
+
+
+def missing_days(days):
+    """Dias sem arquivo entre o primeiro e o último dia diário do mês."""
+    days = sorted(set(days))
+    return sorted(set(range(days[0], days[-1] + 1)) - set(days)) if days else []
+
+
+class ReconciliationStore(SQLiteStore):
+    """Conciliação do consolidado mensal com a soma dos arquivos diários, por mês e agente.
+
+    Cada mês é conciliado uma vez por combinação de arquivos (assinatura com caminho,
+    tamanho e mtime do consolidado e dos diários) e as divergências ficam gravadas.
+    A fonte de referência do mês é a diária quando ela fecha com o consolidado (sem
+    divergências nem dias faltando) e o consolidado mensal caso contrário. As consultas
+    recebem a geração da versão dos dados da sessão (ver SQLiteStore).
+    """
+
+    SCHEMA = _SCHEMA
+    SCHEMA_VERSION = 1
+    VERSIONED_TABLES = ('meses', 'divergencias')
+
+    def __init__(self, path=RECONCILIATION_FILE):
+        super().__init__(path)
+
+    @staticmethod
+    def _signature(month_entry, day_files):
+        entries = ([month_entry] if month_entry else []) + [entry for _, entry in day_files]
+        digest = hashlib.sha1()
+        for entry in entries:
+            digest.update(f"{entry.path}|{entry.size}|{entry.mtime}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def update(self, catalog, usable=None):
+        """Concilia os meses novos ou alterados. `usable(tipo, entry)` pula arquivos em quarentena.
+
+        Retorna quantos meses foram conciliados.
+        """
+        usable = usable or (lambda kind, entry: True)
+        keys = sorted(set(catalog.month_keys()) | {(year, month) for year, month, _, _ in catalog.iter_day_files()},
+                      key=lambda key: (key[0], MESES_ORDER.index(key[1])))
+        with self._lock, self._connect() as conn:
+            stored = dict(conn.execute("SELECT mes, assinatura FROM meses WHERE removido_em IS NULL"))
+            labels = [month_label(year, month) for year, month in keys]
+            gone = [label for label in stored if label not in labels]
+            for label in gone:
+                self._retire(conn, 'meses', "mes = ?", (label,))
+                self._retire(conn, 'divergencias', "mes = ?", (label,))
+
+            updated = 0
+            for label in labels:
+                month_entry = catalog.month_file(label)
+                month_entry = month_entry if month_entry and usable('mensal', month_entry) else None
+                day_files = [(day, entry) for day, entry in catalog.day_files(label) if usable('diario', entry)]
+                signature = self._signature(month_entry, day_files)
+                if stored.get(label) == signature:
+                    continue
+                self._reconcile(conn, label, signature, month_entry, day_files)
+                updated += 1
+            if updated or gone:
+                self._publish(conn)
+            return updated
+
+    @staticmethod
+    def _read(entries):
+        frames = []
+        for entry in entries:
+            try:
+                frames.append(load_metrics(entry))
+            except Exception:
+                continue # O arquivo com problema já aparece no relatório de qualidade
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _reconcile(self, conn, label, signature, month_entry, day_files):
+        df_monthly = self._read([month_entry] if month_entry else [])
+        df_daily = self._read([entry for _, entry in day_files])
+        gaps = missing_days([day for day, _ in day_files])
+        if df_monthly.empty or df_daily.empty:
+            divergences = pd.DataFrame()
+            source = SOURCE_DAILY if df_monthly.empty and not df_daily.empty else SOURCE_MONTHLY
+        else:
+            divergences = compare_components(df_monthly, df_daily)
+            source = SOURCE_DAILY if divergences.empty and not gaps else SOURCE_MONTHLY
+
+        self._retire(conn, 'divergencias', "mes = ?", (label,))
+        self._retire(conn, 'meses', "mes = ?", (label,))
+        conn.executemany(
+            "INSERT INTO divergencias VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)",
+            [(label, row.Agente, row.Componente, *(None if pd.isna(value) else float(value) for value in row[2:]))
+             for row in divergences.itertuples(index=False)]
+        )
+        conn.execute(
+            "INSERT INTO meses VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)",
+            (label, signature, source, ','.join(str(day) for day in gaps), len(divergences),
+             datetime.datetime.now().isoformat(timespec='seconds'))
+        )
+
+    def status(self, label, generation=None):
+        """(fonte de referência, dias faltando, nº de divergências) do mês ou None se não foi conciliado."""
+        visible, params = self._visible(generation)
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT fonte, dias_faltando, divergencias FROM meses WHERE mes = ? AND {visible}",
+                               (label, *params)).fetchone()
+        if row is None:
+            return None
+        return row[0], [int(day) for day in row[1].split(',') if day], row[2]
+
+    def summary(self, generation=None):
+        """Uma linha por mês: fonte de referência, dias faltando e divergências (para o Admin)."""
+        visible, params = self._visible(generation)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT mes AS Mês, fonte AS \"Fonte de Referência\", dias_faltando AS \"Dias Faltando\", "
+                f"divergencias AS Divergências, verificado_em AS \"Verificado em\" FROM meses WHERE {visible}",
+                conn, params=params
+            )
+
+    def divergences(self, label, generation=None):
+        """Divergências do mês por agente e componente (maiores diferenças relativas primeiro)."""
+        visible, params = self._visible(generation)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT agente AS Agente, componente AS Componente, mensal AS Mensal, diario AS Diário, "
+                f"diferenca AS Diferença, relativa AS Relativa FROM divergencias WHERE mes = ? AND {visible} "
+                "ORDER BY relativa DESC, agente", conn, params=[label, *params]
+            )
@@ -0,0 +1,182 @@
+import collections
+import datetime
+import os
+
+import pandas as pd
+
+from catalog import CACHE_FOLDER
+from incremental import FILES_SCHEMA, VERSION_COLUMNS, DayFileStore, day_files
+from ingest import load_metrics
+
+# Janelas (em dias corridos) das médias móveis
+ROLLING_WINDOWS = (7, 30)
+
+# Métricas das médias móveis -> coluna de volume usada como peso
+# (Satisfação pondera pelas avaliações; sem essa coluna, usa os atendimentos)
+ROLLING_METRICS = {'TMA': 'QTD Atendimento', 'FCR': 'QTD Atendimento', 'Satisfacao': 'QTD Avaliacoes'}
+
+# Arquivo SQLite das médias móveis (persistente, ao lado dos demais artefatos)
+ROLLING_FILE = os.path.join(CACHE_FOLDER, 'medias_moveis.sqlite')
+
+_SCHEMA = FILES_SCHEMA + """
+CREATE TABLE IF NOT EXISTS somas (
+    date_key INTEGER NOT NULL,
+    ordinal INTEGER NOT NULL,
+    agente TEXT NOT NULL,
+    componente TEXT NOT NULL,
+    valor REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_somas_dia ON somas (ordinal);
+CREATE TABLE IF NOT EXISTS series (
+    date_key INTEGER NOT NULL,
+    janela INTEGER NOT NULL,
+    agente TEXT NOT NULL,
+    qtd_atendimento REAL NOT NULL,
+    """ + ',\n    '.join([f"{metric} REAL" for metric in ROLLING_METRICS] + [VERSION_COLUMNS]) + """
+);
+CREATE INDEX IF NOT EXISTS idx_series_janela_data ON series (janela, date_key, agente);
+"""
+
+
+def _ordinal(day_key):
+    """Número do dia (date.toordinal) de um DateKey AAAAMMDD já validado pelo catálogo."""
+    return datetime.date(day_key // 10000, day_key // 100 % 100, day_key % 100).toordinal()
+
+
+def day_sums(df):
+    """Somas aditivas de um dia por agente: volume e, por métrica, soma ponderada e peso."""
+    if df.empty or 'Agente' not in df.columns or 'QTD Atendimento' not in df.columns:
+        return pd.DataFrame()
+    volume = pd.to_numeric(df['QTD Atendimento'], errors='coerce').fillna(0)
+    sums = pd.DataFrame({'QTD Atendimento': volume.groupby(df['Agente']).sum()})
+    for metric, weight_col in ROLLING_METRICS.items():
+        if metric not in df.columns:
+            continue
+        weight = pd.to_numeric(df[weight_col], errors='coerce').fillna(0) if weight_col in df.columns else volume
+        weight = weight.where(df[metric].notna(), 0)
+        sums[f"{metric}|peso"] = weight.groupby(df['Agente']).sum()
+        sums[f"{metric}|soma"] = (df[metric].fillna(0) * weight).groupby(df['Agente']).sum()
+    return sums
+
+
+class RollingKpis(DayFileStore):
+    """Médias móveis (7 e 30 dias) de TMA, FCR e Satisfação por agente, ponderadas pelo volume.
+
+    Mantidas de forma incremental: para cada janela há um total corrente por agente; um
+    dia novo é somado e os dias que saíram da janela são subtraídos. As somas de cada
+    dia (somas) e as médias de cada dia/janela (series) são só acrescentadas ao SQLite,
+    e os totais correntes são remontados a partir das somas dos dias ainda dentro da
+    maior janela: o custo por dia novo não cresce com o histórico. Um arquivo alterado
+    ou um dia que chega atrasado apaga e refaz só dali em diante.
+    """
+
+    SCHEMA = _SCHEMA
+    SCHEMA_VERSION = 2
+    VERSIONED_TABLES = ('series',)
+
+    def __init__(self, path=ROLLING_FILE):
+        super().__init__(path)
+        self._running = None # Janelas correntes durante uma atualização
+
+    # --- Atualização incremental ---
+
+    def update(self, catalog, usable=None):
+        """Processa os dias novos do catálogo. `usable(tipo, entry)` pula arquivos em quarentena.
+
+        Retorna quantos dias foram somados.
+        """
+        with self._lock, self._connect() as conn:
+            self._running = None
+            try:
+                return self._sync(conn, day_files(catalog.iter_day_files(), usable=usable), self._add_file)
+            finally:
+                self._running = None
+
+    def _rewind(self, conn, start_key):
+        conn.execute("DELETE FROM somas WHERE date_key >= ?", (start_key,))
+        self._retire(conn, 'series', "date_key >= ?", (start_key,))
+
+    def _add_file(self, conn, day_key, entry):
+        try:
+            sums = day_sums(load_metrics(entry))
+        except Exception:
+            sums = pd.DataFrame()
+        ordinal = _ordinal(day_key)
+        if self._running is None:
+            self._load_windows(conn, ordinal)
+        rows = []
+        for window, totals in self._add_day(ordinal, sums).items():
+            rows.extend(self._snapshot_rows(totals, day_key, window))
+        conn.executemany(f"INSERT INTO series VALUES ({', '.join('?' * (4 + len(ROLLING_METRICS)))}, NULL, NULL)", rows)
+        if not sums.empty:
+            parts = sums.stack()
+            conn.executemany("INSERT INTO somas VALUES (?, ?, ?, ?, ?)",
+                             [(day_key, ordinal, agente, component, float(value)) for (agente, component), value in parts.items()])
+
+    def _load_windows(self, conn, ordinal):
+        """Remonta as janelas correntes com os dias já gravados que ainda cabem na maior janela de `ordinal`."""
+        self._running = {
+            'days': {}, 'queues': {window: collections.deque() for window in ROLLING_WINDOWS},
+            'totals': {window: pd.DataFrame() for window in ROLLING_WINDOWS},
+        }
+        rows = pd.read_sql_query("SELECT ordinal, agente, componente, valor FROM somas WHERE ordinal > ? ORDER BY ordinal",
+                                 conn, params=[ordinal - max(ROLLING_WINDOWS)])
+        for day, group in rows.groupby('ordinal', sort=True):
+            sums = group.pivot_table(index='agente', columns='componente', values='valor', aggfunc='sum')
+            sums.index.name, sums.columns.name = 'Agente', None
+            self._add_day(int(day), sums)
+
+    def _add_day(self, ordinal, sums):
+        """Soma o dia às janelas, tira os dias que saíram e devolve o total corrente de cada janela."""
+        running = self._running
+        running['days'][ordinal] = running['days'].get(ordinal, pd.DataFrame()).add(sums, fill_value=0)
+        for window in ROLLING_WINDOWS:
+            queue = running['queues'][window]
+            totals = running['totals'][window].add(sums, fill_value=0)
+            if not queue or queue[-1] != ordinal:
+                queue.append(ordinal)
+            while queue and queue[0] <= ordinal - window:
+                totals = totals.sub(running['days'][queue.popleft()], fill_value=0)
+            running['totals'][window] = totals
+        # Dias fora da maior janela não serão mais subtraídos
+        for old in [old for old in running['days'] if old <= ordinal - max(ROLLING_WINDOWS)]:
+            del running['days'][old]
+        return running['totals']
+
+    @staticmethod
+    def _snapshot_rows(totals, day_key, window):
+        """Médias ponderadas da janela que termina no dia (agentes com volume na janela)."""
+        if totals.empty:
+            return []
+        totals = totals[totals['QTD Atendimento'] > 0.5] # Ignora resíduos de ponto flutuante
+        columns = [totals['QTD Atendimento'].round()]
+        for metric in ROLLING_METRICS:
+            if f"{metric}|peso" in totals.columns:
+                weight = totals[f"{metric}|peso"].where(totals[f"{metric}|peso"] > 1e-9)
+                columns.append(totals[f"{metric}|soma"] / weight)
+            else:
+                columns.append(pd.Series(float('nan'), index=totals.index))
+        values = pd.concat(columns, axis=1).astype(object)
+        values = values.where(values.notna(), None)
+        return [(day_key, window, agente, *row) for agente, row in zip(totals.index, values.itertuples(index=False))]
+
+    # --- Consultas ---
+
+    def series(self, window, start_key, end_key, agente=None, generation=None):
+        """Médias móveis de uma janela entre dois DateKeys (inclusive), opcionalmente de um agente,
+        como vistas na `generation`.
+
+        Colunas: Agente, QTD Atendimento (da janela), as médias móveis, DateKey e Janela.
+        """
+        visible, visible_params = self._visible(generation)
+        query = ("SELECT agente AS Agente, qtd_atendimento AS \"QTD Atendimento\", "
+                 + ', '.join(ROLLING_METRICS) + ", date_key AS DateKey, janela AS Janela "
+                 f"FROM series WHERE janela = ? AND date_key BETWEEN ? AND ? AND {visible}")
+        params = [int(window), int(start_key), int(end_key), *visible_params]
+        if agente:
+            query += " AND agente = ?"
+            params.append(agente)
+        with self._connect() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        # Métricas ausentes dos arquivos do período não viram colunas vazias
+        return df.drop(columns=[metric for metric in ROLLING_METRICS if df[metric].isna().all()]) if not df.empty else df
@@ -0,0 +1,120 @@
+import collections
+import concurrent.futures
+import datetime
+import itertools
+import os
+import threading
+
+from catalog import MESES_ORDER, FileEntry, file_hash, is_valid_day, parse_month_label
+from ingest import inspect_file, write_artifacts
+
+# Tipos de arquivo aceitos no envio (rótulo -> tipo usado na ingestão e na validação)
+UPLOAD_KINDS = {
+    'Consolidado mensal': 'mensal', 'Diário': 'diario',
+    'Notas (avaliações)': 'notas', 'Ranking semanal': 'ranking',
+}
+
+# Situações de um envio
+JOB_QUEUED = 'na fila'
+JOB_RUNNING = 'validando'
+JOB_PUBLISHED = 'publicado'
+JOB_REJECTED = 'rejeitado'
+JOB_FAILED = 'erro'
+
+MAX_UPLOAD_HISTORY = 50 # Envios mantidos na lista (os mais antigos saem)
+UPLOAD_POLL_SECONDS = 2 # Intervalo de atualização da lista enquanto há envio na fila ou em validação
+
+
+class UploadJob:
+    """Um arquivo enviado: destino na árvore, mês ('Novembro/2025') e dia, situação e mensagens da validação."""
+
+    def __init__(self, job_id, kind, destination, filename, label=None, day=None):
+        self.id = job_id
+        self.kind = kind
+        self.destination = destination
+        self.filename = filename
+        self.label = label
+        self.day = day
+        self.status = JOB_QUEUED
+        self.messages = []
+        self.submitted_at = datetime.datetime.now()
+        self.finished_at = None
+
+
+class UploadManager:
+    """Recebe os envios do app e os publica na árvore 'data/' numa thread de trabalho.
+
+    O arquivo é gravado com um nome temporário na própria pasta de destino (sem a
+    extensão .csv, então o catálogo não o enxerga), validado e normalizado (artefatos
+    da ingestão já gravados para o arquivo final) e só então publicado com
+    os.replace: leitores veem o arquivo antigo ou o novo inteiro, nunca um parcial.
+    Um envio por vez, em ordem; a tela só consulta a situação dos envios.
+    """
+
+    def __init__(self, quality=None):
+        self.quality = quality # QualityStore: registra o arquivo publicado como já validado
+        self.published = 0     # Incrementado a cada publicação (versão dos dados enviados)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._jobs = collections.OrderedDict()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload')
+
+    def submit(self, kind, destination, content, filename, label=None, day=None):
+        """Enfileira um arquivo (bytes) para `destination`. Retorna o envio (sem esperar o processamento)."""
+        with self._lock:
+            job = UploadJob(next(self._ids), kind, destination, filename, label, day)
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_UPLOAD_HISTORY:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._process, job, content)
+        return job
+
+    def jobs(self):
+        """Envios do mais recente para o mais antigo."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def pending(self):
+        """True enquanto há envio na fila ou em validação."""
+        with self._lock:
+            return any(job.status in (JOB_QUEUED, JOB_RUNNING) for job in self._jobs.values())
+
+    def _process(self, job, content):
+        job.status = JOB_RUNNING
+        folder = os.path.dirname(job.destination)
+        tmp_path = os.path.join(folder, f".{os.path.basename(job.destination)}.{os.getpid()}.{job.id}.upload")
+        try:
+            if job.day is not None:
+                year, month = parse_month_label(job.label)
+                if not is_valid_day(year, MESES_ORDER.index(month) + 1, job.day):
+                    job.messages = [f"O dia {job.day} não existe em {job.label}."]
+                    job.status = JOB_REJECTED
+                    return
+            os.makedirs(folder, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+
+            fatal, warnings = inspect_file(job.kind, tmp_path)
+            job.messages = fatal or warnings
+            if fatal:
+                job.status = JOB_REJECTED
+                return
+
+            # O rename preserva tamanho e mtime: os artefatos já ficam com a chave do arquivo final
+            stat = os.stat(tmp_path)
+            entry = FileEntry(job.destination, stat.st_size, stat.st_mtime)
+            write_artifacts(job.kind, tmp_path, entry, job.day)
+            digest = file_hash(tmp_path)
+            os.replace(tmp_path, job.destination)
+            if self.quality is not None:
+                self.quality.record(job.kind, entry, [], warnings, digest)
+            with self._lock:
+                self.published += 1
+            job.status = JOB_PUBLISHED
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.messages = [str(e)]
+        finally:
+            job.finished_at = datetime.datetime.now()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
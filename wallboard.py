@@ -0,0 +1,143 @@
+"""Modo TV (wallboard): snapshot somente-leitura de KPIs da equipe e rankings.
+
+O snapshot é montado por uma thread em segundo plano (uma por processo), que verifica
+a árvore de dados a cada WALLBOARD_REFRESH_SECONDS e o remonta quando ela muda. Ele é
+compartilhado por todas as telas abertas em '?wallboard=<token>': cada tela apenas lê
+o último snapshot, sem recalcular nada.
+Os tokens aceitos vêm da variável de ambiente DASHBOARD_WALLBOARD_TOKENS
+(separados por vírgula); sem tokens configurados, o modo TV fica desativado.
+"""
+import datetime
+import hmac
+import os
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from catalog import DATA_FOLDER, DataCatalog
+from ingest import load_metrics
+from quality import QualityStore
+
+WALLBOARD_TOKENS_ENV = 'DASHBOARD_WALLBOARD_TOKENS'
+WALLBOARD_REFRESH_SECONDS = 60
+
+# Agregação dos KPIs da equipe (mesma regra dos cards de KPI do dashboard)
+TEAM_KPI_AGG = {
+    'QTD Atendimento': 'sum', 'TMA': 'mean', 'TME': 'mean', 'TMIA': 'mean',
+    'FCR': 'mean', 'Satisfacao': 'mean', 'NPS': 'mean', 'QTD Avaliacoes': 'sum'
+}
+
+# Rankings exibidos: título -> arquivo em 'data/semana/' (None = consolidado do último mês)
+RANKING_SOURCES = {
+    "Semana Atual": "ranking_semanal_atual.csv",
+    "Semana Anterior": "ranking_semanal_anterior.csv",
+    "Consolidado do Mês": None,
+}
+
+# Regras do Top 3 (as mesmas da Visão Geral): métrica -> (filtro de valores válidos, maior é melhor)
+RANKING_RULES = {
+    'FCR': (lambda values: (values > 0.0) & (values < 1.0), True),
+    'Satisfacao': (lambda values: (values > 0.0) & (values < 5.0), True),
+    'TMIA': (lambda values: values > 0.0, False),
+}
+
+# Um snapshot pronto para exibição (imutável depois de publicado)
+WallboardSnapshot = namedtuple('WallboardSnapshot', ['month', 'kpis', 'rankings', 'generated_at', 'data_version'])
+
+
+def wallboard_tokens():
+    """Tokens aceitos pelo modo TV (configurados no ambiente)."""
+    return [token.strip() for token in os.environ.get(WALLBOARD_TOKENS_ENV, '').split(',') if token.strip()]
+
+
+def is_valid_wallboard_token(token):
+    """True se o token da URL corresponde a um dos tokens configurados (comparação em tempo constante)."""
+    if not token:
+        return False
+    return any(hmac.compare_digest(str(token), valid) for valid in wallboard_tokens())
+
+
+def top_agents(df_compare, metric, n=3):
+    """Top n agentes de uma métrica (desempate por QTD Atendimento), com as colunas Agente e métrica."""
+    if metric not in df_compare.columns or 'QTD Atendimento' not in df_compare.columns:
+        return pd.DataFrame()
+    is_valid, higher_is_better = RANKING_RULES[metric]
+    df_valid = df_compare[is_valid(df_compare[metric])]
+    df_top = df_valid.sort_values(by=[metric, 'QTD Atendimento'], ascending=[not higher_is_better, False]).head(n)
+    return df_top[['Agente', metric]].reset_index(drop=True)
+
+
+def load_source(kind, entry, usable=None):
+    """Métricas normalizadas de um arquivo (vazio se não existir, não puder ser lido ou estiver em quarentena).
+
+    `usable(tipo, entry)` é a verificação do QualityStore: arquivos reprovados não são relidos.
+    """
+    if entry is None or (usable is not None and not usable(kind, entry)):
+        return pd.DataFrame()
+    try:
+        return load_metrics(entry)
+    except Exception:
+        return pd.DataFrame()
+
+
+def _agent_totals(df):
+    """Uma linha por agente (soma das quantidades, média das demais métricas)."""
+    agg = {col: agg for col, agg in TEAM_KPI_AGG.items() if col in df.columns}
+    if df.empty or 'Agente' not in df.columns or not agg:
+        return pd.DataFrame()
+    return df.groupby('Agente', as_index=False).agg(agg)
+
+
+def build_wallboard_snapshot(catalog, usable=None):
+    """Calcula KPIs da equipe (último mês) e os Top 3 de cada ranking a partir do catálogo.
+
+    `usable(tipo, entry)` pula os arquivos em quarentena.
+    """
+    months = catalog.months()
+    month = months[-1] if months else None
+    df_month = load_source('mensal', catalog.month_file(month), usable) if month else pd.DataFrame()
+
+    kpi_agg = {col: agg for col, agg in TEAM_KPI_AGG.items() if col in df_month.columns}
+    kpis = df_month.agg(kpi_agg).to_dict() if kpi_agg and not df_month.empty else {}
+
+    rankings = {}
+    for title, filename in RANKING_SOURCES.items():
+        df_source = df_month if filename is None else load_source('ranking', catalog.ranking_file(filename), usable)
+        df_compare = _agent_totals(df_source)
+        rankings[title] = {metric: top_agents(df_compare, metric) for metric in RANKING_RULES} if not df_compare.empty else {}
+
+    return WallboardSnapshot(month, kpis, rankings, datetime.datetime.now(), catalog.version)
+
+
+class WallboardPublisher:
+    """Mantém o snapshot mais recente e o atualiza numa thread em segundo plano.
+
+    Usa um catálogo próprio: o refresh feito aqui não consome a detecção de mudanças
+    do catálogo do app (que é o que limpa os caches dos loaders).
+    """
+
+    def __init__(self, root=DATA_FOLDER, interval=WALLBOARD_REFRESH_SECONDS):
+        self.interval = interval
+        self._catalog = DataCatalog(root)
+        self._quality = QualityStore() # Arquivos em quarentena não entram no snapshot
+        self._stop = threading.Event()
+        self._snapshot = build_wallboard_snapshot(self._catalog.snapshot, self._quality.usable) # O primeiro snapshot já sai pronto
+        self._thread = threading.Thread(target=self._run, name='wallboard-publisher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                # Só recalcula quando a árvore de dados mudou
+                if self._catalog.refresh():
+                    self._snapshot = build_wallboard_snapshot(self._catalog.snapshot, self._quality.usable)
+            except Exception:
+                continue # Mantém o último snapshot válido
+
+    def latest(self):
+        """Último snapshot publicado (a troca da referência é atômica; nada é recalculado aqui)."""
+        return self._snapshot
+
+    def stop(self):
+        self._stop.set()